@@ -1,4 +1,6 @@
 """Client configuration utilities."""
+import os
+import tempfile
 from dataclasses import dataclass, field
 from typing import Optional
 from ..utils.system_utils import load_config, save_config
@@ -9,6 +11,32 @@ class ClientConfig:
     """Configuration values for the monitoring client."""
     server_url: str = "http://localhost:5000"
     path: str = "client_config.json"
+    # Seconds after which every section is re-sent in full even if unchanged
+    full_sync_interval: int = 3600
+    # Detection cache location and per-detector TTL overrides in seconds
+    cache_path: str = field(
+        default_factory=lambda: os.path.join(tempfile.gettempdir(), "monitoring-agent-cache.json")
+    )
+    detector_cache_ttl: dict[str, float] = field(default_factory=dict)
+    # Per-detector timeout overrides in seconds
+    detector_timeouts: dict[str, float] = field(default_factory=dict)
+    # Per-detector run interval overrides in seconds
+    detector_intervals: dict[str, float] = field(default_factory=dict)
+    # Seconds between payloads sent to the server
+    report_interval: float = 60
+    # Seconds between lightweight liveness heartbeats; None disables them
+    heartbeat_interval: Optional[float] = 10
+    # Random spread applied to every interval, as a fraction of it
+    schedule_jitter: float = 0.1
+    # Offline spool for payloads the server could not accept
+    spool_dir: str = field(
+        default_factory=lambda: os.path.join(tempfile.gettempdir(), "monitoring-agent-spool")
+    )
+    spool_segment_size: int = 1024 * 1024
+    spool_max_bytes: int = 50 * 1024 * 1024
+    # Spooled payloads replayed per batch and seconds between batches
+    spool_replay_batch_size: int = 100
+    spool_replay_interval: float = 30
 
     @classmethod
     def load(cls, path: Optional[str] = None) -> "ClientConfig":
@@ -1,3 +1,4 @@
 from .agent import MonitoringAgent
+from .scheduler import Scheduler
 
-__all__ = ["MonitoringAgent"]
+__all__ = ["MonitoringAgent", "Scheduler"]
@@ -1,10 +1,17 @@
 import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from datetime import datetime
+from typing import Iterable
 from ..config.client_config import ClientConfig
 from ..detectors.hardware_detector import HardwareDetector
 from ..detectors.software_detector import SoftwareDetector
 from ..detectors.backup_detector import BackupDetector
+from ..utils.detection_cache import DetectionCache
 from ..utils.network_utils import post_json
+from ..utils.spool import PayloadSpool
+from ..utils.system_utils import content_hash
+from .scheduler import Scheduler
 
 
 class MonitoringAgent:
@@ -13,11 +20,27 @@ class MonitoringAgent:
     def __init__(self, config: ClientConfig | None = None, debug_mode: bool = False):
         self.config = config or ClientConfig.load()
         self.debug_mode = debug_mode
-        self.hardware = HardwareDetector(debug_mode)
-        self.software = SoftwareDetector(debug_mode)
-        self.backup = BackupDetector(debug_mode)
+        self.cache = DetectionCache(self.config.cache_path)
+        ttl = self.config.detector_cache_ttl
+        self.hardware = HardwareDetector(debug_mode, cache=self.cache, cache_ttl=ttl.get("hardware"))
+        self.software = SoftwareDetector(debug_mode, cache=self.cache, cache_ttl=ttl.get("software"))
+        self.backup = BackupDetector(debug_mode, cache=self.cache, cache_ttl=ttl.get("backup"))
+        self.detectors = {"system": self.hardware, "software": self.software, "backup": self.backup}
+        self._executor = ThreadPoolExecutor(max_workers=len(self.detectors), thread_name_prefix="detector")
+        self._pending: dict[str, Future] = {}
+        self.scheduler = Scheduler(jitter=self.config.schedule_jitter)
+        self.spool = PayloadSpool(
+            self.config.spool_dir,
+            segment_size=self.config.spool_segment_size,
+            max_bytes=self.config.spool_max_bytes,
+        )
+        self._online = True
+        self._latest: dict[str, dict] = {}
         self._running = False
+        self._stop_event = threading.Event()
         self._thread: threading.Thread | None = None
+        self._sent_hashes: dict[str, str] = {}
+        self._last_full_sync: float | None = None
 
     def debug_log(self, msg: str) -> None:
         if self.debug_mode:
@@ -28,24 +51,222 @@ class MonitoringAgent:
         if self._running:
             return
         self._running = True
+        self._stop_event.clear()
+        self._schedule()
         self._thread = threading.Thread(target=self._run, daemon=True)
         self._thread.start()
 
     def stop(self) -> None:
         """Stop the background monitoring thread."""
         self._running = False
+        self._stop_event.set()
         if self._thread and self._thread.is_alive():
             self._thread.join(timeout=1)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def collect(
+        self, names: Iterable[str] | None = None
+    ) -> tuple[dict[str, dict], dict[str, float], dict[str, dict]]:
+        """Run detectors concurrently and return sections, durations and errors.
+
+        *names* selects the payload sections to refresh; all by default.
+
+        Each detector is bounded by its own timeout; one that does not finish
+        in time is reported in the errors as ``{"status": "timeout"}`` without
+        holding up the others, and is not started again until its previous
+        run completes. Failed detectors produce no section, so the last good
+        one keeps being reported; only the host identity stands in for a
+        system section that was never detected.
+        """
+        names = list(self.detectors if names is None else names)
+        started = time.monotonic()
+        deadlines: dict[str, float] = {}
+        for name in names:
+            detector = self.detectors[name]
+            deadlines[name] = started + self.config.detector_timeouts.get(detector.name, detector.default_timeout)
+            if name not in self._pending:
+                self._pending[name] = self._executor.submit(self._timed, detector)
+        sections: dict[str, dict] = {}
+        durations: dict[str, float] = {}
+        errors: dict[str, dict] = {}
+        for name in names:
+            future = self._pending[name]
+            try:
+                sections[name], elapsed = future.result(timeout=max(0.0, deadlines[name] - time.monotonic()))
+            except FutureTimeoutError:
+                self.debug_log(f"Detector {name} timed out")
+                errors[name], elapsed = {"status": "timeout"}, time.monotonic() - started
+            except Exception as exc:
+                self.debug_log(f"Detector {name} failed: {exc}")
+                errors[name], elapsed = {"status": "error", "error": str(exc)}, time.monotonic() - started
+            durations[name] = round(elapsed, 3)
+        self._pending = {name: f for name, f in self._pending.items() if not f.done()}
+        if "system" in errors and "system" not in self._latest:
+            sections["system"] = self.hardware.identity()
+        return sections, durations, errors
+
+    @staticmethod
+    def _timed(detector) -> tuple[dict, float]:
+        began = time.monotonic()
+        result = detector.detect()
+        return result, time.monotonic() - began
+
+    def build_payload(self, sections: dict[str, dict]) -> tuple[dict, dict[str, str]]:
+        """Replace sections unchanged since the last send with hash references.
+
+        Every section is sent in full once per ``full_sync_interval``. Returns
+        the payload together with the section hashes, which are committed with
+        :meth:`mark_sent` once the server accepted the payload.
+        """
+        hashes = {name: content_hash(data) for name, data in sections.items()}
+        now = time.monotonic()
+        if self._last_full_sync is None or now - self._last_full_sync >= self.config.full_sync_interval:
+            self._sent_hashes.clear()
+            self._last_full_sync = now
+        payload = {}
+        for name, data in sections.items():
+            if self._sent_hashes.get(name) == hashes[name]:
+                payload[name] = {"unchanged": True, "hash": hashes[name]}
+            else:
+                payload[name] = data
+        # The server identifies the agent from the system section.
+        payload["system"] = {**payload["system"], "agent_id": sections["system"].get("agent_id")}
+        return payload, hashes
+
+    def mark_sent(self, hashes: dict[str, str]) -> None:
+        """Remember *hashes* as the content last accepted by the server."""
+        self._sent_hashes.update(hashes)
+
+    def forget_sent(self, response) -> None:
+        """Send in full next time the sections *response* lists under ``resend``.
+
+        The server asks for this when a hash reference does not match the
+        content it holds; batch responses carry the list per payload.
+        """
+        try:
+            body = response.json()
+        except ValueError:
+            return
+        if not isinstance(body, dict):
+            return
+        items = body.get("results") if isinstance(body.get("results"), list) else [body]
+        for item in items:
+            if isinstance(item, dict) and isinstance(item.get("resend"), list):
+                for name in item["resend"]:
+                    self._sent_hashes.pop(name, None)
+
+    def _schedule(self) -> None:
+        """Register detectors, the server report, heartbeats and spool replay with the scheduler."""
+        intervals = self.config.detector_intervals
+        # Detectors first run together with the randomly delayed first
+        # report, so that report carries every section.
+        start = self.scheduler.initial_delay(self.config.report_interval)
+        for name, detector in self.detectors.items():
+            self.scheduler.add(name, intervals.get(detector.name, detector.default_interval), delay=start)
+        self.scheduler.add("report", self.config.report_interval, delay=start)
+        self.scheduler.add("replay", self.config.spool_replay_interval)
+        if self.config.heartbeat_interval:
+            # The first report already tells the server the agent is alive.
+            interval = self.config.heartbeat_interval
+            self.scheduler.add("heartbeat", interval, delay=start + interval)
 
     def _run(self) -> None:
         while self._running:
-            payload = {
-                "system": self.hardware.detect(),
-                "software": self.software.detect(),
-                "backup": self.backup.detect(),
-            }
-            try:
-                post_json(f"{self.config.server_url}/api/agents/monitoring-data", payload)
-            except Exception as exc:  # pragma: no cover - network
-                self.debug_log(f"Failed to send data: {exc}")
-            time.sleep(60)
+            due = self.scheduler.due()
+            detectors = [name for name in due if name in self.detectors]
+            if detectors or "report" in due:
+                sections, durations, errors = self.collect(detectors)
+                self._latest.update(sections)
+                self._report(durations, errors)
+            elif "heartbeat" in due:
+                self._heartbeat()
+            if "replay" in due:
+                self.replay_spool()
+            self._stop_event.wait(self.scheduler.sleep_time())
+
+    def _report(self, durations: dict[str, float], errors: dict[str, dict] | None = None) -> None:
+        """Send the latest sections; unchanged ones go as hash references.
+
+        Detectors that failed this cycle are listed under ``detector_errors``.
+        Payloads that cannot be delivered are appended to the offline spool.
+        """
+        payload, hashes = self.build_payload(self._latest)
+        payload["durations"] = durations
+        if errors:
+            payload["detector_errors"] = errors
+        payload["collected_at"] = datetime.utcnow().isoformat()
+        try:
+            response = post_json(f"{self.config.server_url}/api/agents/monitoring-data", payload)
+        except Exception as exc:  # pragma: no cover - network
+            self.debug_log(f"Failed to send data: {exc}")
+            self._spool(payload, hashes)
+            return
+        if response.ok:
+            self._online = True
+            self.mark_sent(hashes)
+            self.forget_sent(response)
+        elif response.status_code == 429 or response.status_code >= 500:
+            self.debug_log(f"Server unavailable: HTTP {response.status_code}")
+            self._spool(payload, hashes)
+        else:
+            self._sent_hashes.clear()
+            self.debug_log(f"Server rejected data: HTTP {response.status_code}")
+
+    def _heartbeat(self) -> None:
+        """Tell the server the agent is alive without sending any sections."""
+        agent_id = self.hardware.identity()["agent_id"]
+        # A missed heartbeat is replaced by the next one; retrying with
+        # backoff would only hold up the scheduler loop.
+        try:
+            response = post_json(
+                f"{self.config.server_url}/api/agents/heartbeat", {"agent_id": agent_id}, max_retries=0
+            )
+        except Exception as exc:  # pragma: no cover - network
+            self.debug_log(f"Failed to send heartbeat: {exc}")
+            return
+        if not response.ok:
+            self.debug_log(f"Server rejected heartbeat: HTTP {response.status_code}")
+            return
+        try:
+            unknown = response.json().get("unknown", [])
+        except (ValueError, AttributeError):
+            self.debug_log("Heartbeat response is not the expected JSON")
+            return
+        if agent_id in unknown:
+            self.debug_log("Heartbeat from an agent the server does not know")
+
+    def _spool(self, payload: dict, hashes: dict[str, str]) -> None:
+        # Spooled payloads are replayed in order, so later payloads may
+        # reference their content by hash just like delivered ones.
+        self._online = False
+        try:
+            self.spool.append(payload)
+        except OSError as exc:
+            self.debug_log(f"Failed to spool data: {exc}")
+            self._sent_hashes.clear()
+            return
+        self.mark_sent(hashes)
+
+    def replay_spool(self) -> int:
+        """Send one batch of spooled payloads; return how many were delivered."""
+        if not self._online:
+            return 0
+        items, token = self.spool.read_batch(self.config.spool_replay_batch_size)
+        if not items:
+            self.spool.commit(token)
+            return 0
+        try:
+            response = post_json(f"{self.config.server_url}/api/agents/monitoring-data/batch", items)
+        except Exception as exc:  # pragma: no cover - network
+            self.debug_log(f"Failed to replay spool: {exc}")
+            self._online = False
+            return 0
+        if response.status_code == 429 or response.status_code >= 500:
+            self.debug_log(f"Spool replay deferred: HTTP {response.status_code}")
+            return 0
+        if response.ok:
+            self.forget_sent(response)
+        else:
+            self.debug_log(f"Server rejected spooled data, dropping batch: HTTP {response.status_code}")
+        self.spool.commit(token)
+        return len(items) if response.ok else 0
@@ -0,0 +1,68 @@
+"""Interval scheduling for detector runs and server reports."""
+import random
+import time
+from typing import Callable
+
+
+class Scheduler:
+    """Schedule named jobs with independent intervals on a monotonic clock.
+
+    Each run is scheduled relative to the previous *scheduled* time rather
+    than to when the work finished, so detection time does not accumulate
+    as drift. Every interval is randomly stretched or shrunk by up to
+    ``jitter`` (a fraction of the interval) so a fleet started at the same
+    moment spreads its requests out over time.
+    """
+
+    def __init__(
+        self,
+        jitter: float = 0.1,
+        clock: Callable[[], float] = time.monotonic,
+        rng: Callable[[], float] = random.random,
+    ) -> None:
+        self.jitter = jitter
+        self._clock = clock
+        self._rng = rng
+        self._intervals: dict[str, float] = {}
+        self._next_run: dict[str, float] = {}
+
+    def add(self, name: str, interval: float, delay: float | None = None) -> None:
+        """Register *name* to run every *interval* seconds, first after *delay*.
+
+        Without *delay* the first run waits :meth:`initial_delay` seconds.
+        """
+        if delay is None:
+            delay = self.initial_delay(interval)
+        self._intervals[name] = interval
+        self._next_run[name] = self._clock() + delay
+
+    def initial_delay(self, interval: float) -> float:
+        """Return a random delay in ``[0, jitter * interval]`` for a first run.
+
+        Agents restarted together, e.g. after patching, then do not make
+        their first requests in lockstep either.
+        """
+        return interval * self.jitter * self._rng()
+
+    def due(self) -> list[str]:
+        """Return the jobs due now and schedule their next run."""
+        now = self._clock()
+        names = [name for name, at in self._next_run.items() if at <= now]
+        for name in names:
+            interval = self._intervals[name]
+            next_run = self._next_run[name] + interval * (1 + self.jitter * (2 * self._rng() - 1))
+            if next_run <= now:
+                # Missed whole intervals (e.g. after sleep); do not replay them.
+                next_run = now + interval
+            self._next_run[name] = next_run
+        return names
+
+    def trigger(self, name: str) -> None:
+        """Make *name* due immediately."""
+        self._next_run[name] = self._clock()
+
+    def sleep_time(self) -> float:
+        """Seconds until the next job is due."""
+        if not self._next_run:
+            return 0.0
+        return max(0.0, min(self._next_run.values()) - self._clock())
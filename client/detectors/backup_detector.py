@@ -1,29 +1,168 @@
+"""Windows backup detection based on ``wbadmin get versions``."""
+
+import heapq
+import os
 import subprocess
+import threading
+import unicodedata
+from datetime import datetime
+from typing import Iterable, Iterator
+
 from .base_detector import BaseDetector
 
+# wbadmin labels in English and Spanish, compared without case and accents.
+_FIELDS = {
+    "backup time": "backup_time",
+    "backup target": "target",
+    "version identifier": "version_id",
+    "can recover": "can_recover",
+    "hora de copia de seguridad": "backup_time",
+    "destino de copia de seguridad": "target",
+    "identificador de version": "version_id",
+    "se puede recuperar": "can_recover",
+}
+
+# Console programs write in the OEM code page on Windows.
+_CONSOLE_ENCODING = "oem" if os.name == "nt" else None
+
+# Characters of raw output kept when no version could be recognised.
+MAX_RAW_OUTPUT = 64 * 1024
+
+
+def _label(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text.strip().lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def parse_wbadmin_versions(lines: Iterable[str]) -> Iterator[dict]:
+    """Yield one dictionary per backup version found in ``wbadmin`` output.
+
+    Versions are separated by ``Backup time:`` lines (``Hora de copia de
+    seguridad:`` on Spanish systems). ``timestamp`` is taken
+    from the locale independent version identifier (``MM/DD/YYYY-HH:MM``,
+    UTC) and is ``None`` when it cannot be parsed.
+    """
+    version: dict | None = None
+    for line in lines:
+        key, sep, value = line.partition(":")
+        field = _FIELDS.get(_label(key)) if sep else None
+        if field is None:
+            continue
+        if field == "backup_time":
+            if version:
+                yield _finish_version(version)
+            version = {}
+        elif version is None:
+            continue
+        version[field] = value.strip()
+    if version:
+        yield _finish_version(version)
+
+
+def _finish_version(version: dict) -> dict:
+    try:
+        timestamp = datetime.strptime(version.get("version_id", ""), "%m/%d/%Y-%H:%M")
+    except ValueError:
+        timestamp = None
+    recover = version.get("can_recover")
+    return {
+        "timestamp": timestamp.isoformat() if timestamp else None,
+        "backup_time": version.get("backup_time"),
+        "target": version.get("target"),
+        "version_id": version.get("version_id"),
+        "can_recover": [item.strip() for item in recover.split(",")] if recover else [],
+    }
+
 
 class BackupDetector(BaseDetector):
-    """Detector for Windows backup status using ``wbadmin``."""
+    """Detector for Windows backup status using ``wbadmin``.
+
+    Parameters
+    ----------
+    debug_mode: bool, optional
+        Enables debug logging when set to True.
+    max_versions: int, optional
+        Number of most recent backup versions included in the result.
+    """
+    name = "backup"
+    default_timeout = 35.0
+    default_interval = 60 * 60
+
+    def __init__(self, debug_mode: bool = False, max_versions: int = 5, **kwargs) -> None:
+        super().__init__(debug_mode, **kwargs)
+        self.max_versions = max_versions
 
     def detect(self) -> dict:
-        """Run ``wbadmin get versions`` and parse minimal details."""
+        """Run ``wbadmin get versions`` and summarise the newest versions.
+
+        The output is parsed line by line as the command writes it.
+        """
         self.debug_log("Checking backup information with wbadmin")
         info = {"status": "unknown", "versions": []}
         try:
-            result = subprocess.run(
+            process = subprocess.Popen(
                 ["wbadmin", "get", "versions"],
-                capture_output=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
                 text=True,
+                encoding=_CONSOLE_ENCODING,
+                errors="replace",
                 shell=True,
-                timeout=30,
             )
-            if result.returncode == 0:
+            timer = threading.Timer(30, process.kill)
+            timer.start()
+            try:
+                summary = self.summarise(process.stdout)
+                stderr = process.stderr.read()
+                returncode = process.wait()
+            finally:
+                timer.cancel()
+            if returncode == 0:
                 info["status"] = "found"
-                info["output"] = result.stdout
+                info.update(summary)
             else:
                 info["status"] = "error"
-                info["error"] = result.stderr
+                info["error"] = stderr
         except Exception as exc:  # pragma: no cover - platform specific
             info["status"] = "error"
             info["error"] = str(exc)
         return info
+
+    def summarise(self, lines: Iterable[str]) -> dict:
+        """Reduce ``wbadmin`` output to the newest versions and a total count.
+
+        When no version is recognised, e.g. for a wbadmin language without
+        known labels, up to :data:`MAX_RAW_OUTPUT` characters of the output
+        are included as ``output`` for the server to store instead.
+        """
+        count = 0
+        raw: list[str] = []
+        raw_size = 0
+
+        def recorded() -> Iterator[str]:
+            nonlocal raw_size
+            for line in lines:
+                line = line.rstrip("\r\n")
+                if not count and raw_size < MAX_RAW_OUTPUT:
+                    raw.append(line)
+                    raw_size += len(line) + 1
+                yield line
+
+        def counted() -> Iterator[dict]:
+            nonlocal count
+            for version in parse_wbadmin_versions(recorded()):
+                count += 1
+                yield version
+
+        newest = heapq.nlargest(self.max_versions, counted(), key=lambda v: v["timestamp"] or "")
+        latest = newest[0] if newest else {}
+        summary = {
+            "versions": newest,
+            "version_count": count,
+            "last_backup": latest.get("timestamp"),
+            "backup_location": latest.get("target"),
+        }
+        output = "\n".join(raw).strip()
+        if not count and output:
+            summary["output"] = output[:MAX_RAW_OUTPUT]
+        return summary
@@ -1,3 +1,8 @@
+from typing import Any, Callable
+
+from ..utils.detection_cache import DetectionCache
+
+
 class BaseDetector:
     """Base class for all monitoring detectors.
 
@@ -5,15 +10,60 @@ class BaseDetector:
     ----------
     debug_mode: bool, optional
         Enables debug logging when set to True.
+    cache: DetectionCache, optional
+        Persistent cache used by :meth:`cached` for expensive probes.
+    cache_ttl: float, optional
+        Seconds cached results stay valid. Defaults to ``default_cache_ttl``;
+        caching is disabled when neither is set.
     """
-    def __init__(self, debug_mode: bool = False) -> None:
+    name = "base"
+    default_cache_ttl: float | None = None
+    # Seconds MonitoringAgent waits for ``detect`` before reporting a timeout
+    default_timeout: float = 30.0
+    # Seconds between runs scheduled by MonitoringAgent
+    default_interval: float = 60.0
+
+    def __init__(
+        self,
+        debug_mode: bool = False,
+        cache: DetectionCache | None = None,
+        cache_ttl: float | None = None,
+    ) -> None:
         self.debug_mode = debug_mode
+        self.cache = cache
+        self.cache_ttl = self.default_cache_ttl if cache_ttl is None else cache_ttl
 
     def debug_log(self, message: str) -> None:
         """Print debug messages when debug mode is enabled."""
         if self.debug_mode:
             print(f"[DEBUG] {message}")
 
+    def cached(
+        self,
+        key: str,
+        probe: Callable[[], Any],
+        refresh: bool = False,
+        cacheable: Callable[[Any], bool] | None = None,
+    ) -> Any:
+        """Return the cached result for *key*, running *probe* on a miss.
+
+        ``refresh`` forces a new probe and replaces the cached value.
+        Results for which ``cacheable`` returns False, such as failed
+        detections, are returned without being cached.
+        """
+        if self.cache is None or not self.cache_ttl:
+            return probe()
+        cache_key = f"{self.name}.{key}"
+        if not refresh:
+            value = self.cache.get(cache_key, self.cache_ttl)
+            if value is not None:
+                self.debug_log(f"Using cached {cache_key}")
+                return value
+        value = probe()
+        if cacheable is None or cacheable(value):
+            self.cache.set(cache_key, value)
+        return value
+
     def detect(self):  # pragma: no cover - abstract method
         """Perform detection and return structured data.
 
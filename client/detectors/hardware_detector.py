@@ -11,19 +11,41 @@ from .base_detector import BaseDetector
 
 
 class HardwareDetector(BaseDetector):
-    """Detector specialized in system hardware information."""
+    """Detector specialized in system hardware information.
 
-    def detect(self) -> dict:
-        """Collect basic hardware details of the running host."""
+    BIOS serial, manufacturer and model do not change without a reboot, so
+    service tag detection is cached for a day per boot by default.
+    """
+    name = "hardware"
+    default_cache_ttl = 24 * 60 * 60
+    default_timeout = 20.0
+    default_interval = 6 * 60 * 60
+
+    def detect(self, refresh: bool = False) -> dict:
+        """Collect basic hardware details of the running host.
+
+        ``refresh`` re-probes the service tag instead of using the cache.
+        """
         self.debug_log("Collecting hardware information")
-        info = {
+        info = self.identity()
+        info.update(
+            self.cached(
+                "service_tag",
+                self.get_service_tag,
+                refresh=refresh,
+                cacheable=lambda result: bool(result.get("service_tag")),
+            )
+        )
+        return info
+
+    def identity(self) -> dict:
+        """Return the cheap host identification fields without probing."""
+        return {
             "agent_id": f"{socket.gethostname()}_{platform.node()}",
             "hostname": socket.gethostname(),
             "os": f"{platform.system()} {platform.release()}",
             "platform": platform.platform(),
         }
-        info.update(self.get_service_tag())
-        return info
 
     # ------------------------------------------------------------------
     # Service tag detection
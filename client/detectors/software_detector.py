@@ -4,6 +4,9 @@ from .base_detector import BaseDetector
 
 class SoftwareDetector(BaseDetector):
     """Detector for installed productivity and CAD software."""
+    name = "software"
+    default_timeout = 10.0
+    default_interval = 4 * 60 * 60
 
     def detect(self) -> dict:
         """Return minimal information about Office presence.
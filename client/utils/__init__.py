@@ -1,4 +1,17 @@
-from .system_utils import generate_agent_id, load_config, save_config
-from .network_utils import post_json
+from .system_utils import content_hash, generate_agent_id, get_boot_time, load_config, save_config
+from .network_utils import JsonTransport, get_transport, post_json
+from .detection_cache import DetectionCache
+from .spool import PayloadSpool
 
-__all__ = ["generate_agent_id", "load_config", "save_config", "post_json"]
+__all__ = [
+    "content_hash",
+    "generate_agent_id",
+    "get_boot_time",
+    "load_config",
+    "save_config",
+    "JsonTransport",
+    "get_transport",
+    "post_json",
+    "DetectionCache",
+    "PayloadSpool",
+]
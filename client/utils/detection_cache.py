@@ -0,0 +1,65 @@
+"""On-disk cache for detector results that only change across reboots."""
+import json
+import os
+import threading
+import time
+from typing import Any
+
+from .system_utils import get_boot_time
+
+
+class DetectionCache:
+    """JSON file backed cache whose entries are valid for the current boot.
+
+    Entries record the boot time they were collected in and are discarded
+    once the machine reboots or their TTL expires.
+    """
+
+    def __init__(self, path: str, boot_time: float | None = None) -> None:
+        self.path = path
+        self.boot_time = get_boot_time() if boot_time is None else boot_time
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict] = self._load()
+
+    def get(self, key: str, ttl: float) -> Any | None:
+        """Return the cached value for *key* if it is younger than *ttl* seconds."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if not entry or entry.get("boot_time") != self.boot_time:
+            return None
+        if time.time() - entry.get("stored_at", 0) > ttl:
+            return None
+        return entry.get("value")
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = {"boot_time": self.boot_time, "stored_at": time.time(), "value": value}
+            self._save()
+
+    def invalidate(self, key: str | None = None) -> None:
+        """Drop *key*, or every entry when no key is given."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+            self._save()
+
+    def _load(self) -> dict[str, dict]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        return {k: v for k, v in data.items() if isinstance(v, dict) and v.get("boot_time") == self.boot_time}
+
+    def _save(self) -> None:
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as fh:
+                json.dump(self._entries, fh)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
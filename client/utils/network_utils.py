@@ -1,6 +1,102 @@
+import gzip
+import json
+import random
+import threading
+import time
+
 import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUSES = {429, 502, 503, 504}
+
+
+class JsonTransport:
+    """Keep-alive HTTP transport posting JSON with compression and retries.
+
+    Parameters
+    ----------
+    timeout: float, optional
+        Per-request timeout in seconds.
+    max_retries: int, optional
+        Additional attempts after a connection error or a retryable status.
+    backoff_base, backoff_max: float, optional
+        Exponential backoff bounds in seconds; each wait is drawn uniformly
+        from ``[0, min(backoff_max, backoff_base * 2 ** attempt)]``.
+    compress_threshold: int, optional
+        Bodies of at least this many bytes are sent gzip compressed.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 10,
+        max_retries: int = 3,
+        backoff_base: float = 1.0,
+        backoff_max: float = 30.0,
+        compress_threshold: int = 1024,
+    ) -> None:
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.compress_threshold = compress_threshold
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        self.session.headers["Content-Type"] = "application/json"
+
+    def post_json(self, url: str, payload, max_retries: int | None = None) -> requests.Response:
+        """POST ``payload`` as JSON to ``url``, retrying transient failures.
+
+        ``max_retries`` overrides the transport's retry count for this call.
+        Returns the last response; raises the last connection error when no
+        attempt reached the server.
+        """
+        if max_retries is None:
+            max_retries = self.max_retries
+        body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        headers = {}
+        if len(body) >= self.compress_threshold:
+            body = gzip.compress(body, compresslevel=6)
+            headers["Content-Encoding"] = "gzip"
+        attempt = 0
+        while True:
+            try:
+                response = self.session.post(url, data=body, headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= max_retries:
+                    raise
+                time.sleep(self._backoff(attempt))
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= max_retries:
+                    return response
+                time.sleep(self._backoff(attempt, response.headers.get("Retry-After")))
+            attempt += 1
+
+    def close(self) -> None:
+        self.session.close()
+
+    def _backoff(self, attempt: int, retry_after: str | None = None) -> float:
+        if retry_after:
+            try:
+                return min(self.backoff_max, float(retry_after))
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+
+_default_transport: JsonTransport | None = None
+_default_lock = threading.Lock()
+
+
+def get_transport() -> JsonTransport:
+    """Return the process wide transport shared by :func:`post_json`."""
+    global _default_transport
+    with _default_lock:
+        if _default_transport is None:
+            _default_transport = JsonTransport()
+        return _default_transport
 
 
-def post_json(url: str, payload: dict) -> requests.Response:
+def post_json(url: str, payload: dict, max_retries: int | None = None) -> requests.Response:
     """POST ``payload`` as JSON to ``url`` and return the response."""
-    return requests.post(url, json=payload, timeout=10)
+    return get_transport().post_json(url, payload, max_retries=max_retries)
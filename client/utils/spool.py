@@ -0,0 +1,156 @@
+"""Durable on-disk spool for payloads the server could not accept."""
+import json
+import os
+import threading
+
+
+class PayloadSpool:
+    """Append-only spool of JSON payloads split into size-capped segments.
+
+    Payloads are appended as NDJSON lines to ``spool-<n>.ndjson`` segment
+    files. A small cursor file records how far the oldest segment has been
+    replayed, so delivery resumes where it stopped after a restart. When the
+    spool exceeds ``max_bytes`` the oldest segments are evicted first.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_size: int = 1024 * 1024,
+        max_bytes: int = 50 * 1024 * 1024,
+    ) -> None:
+        self.directory = directory
+        self.segment_size = segment_size
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def append(self, payload: dict) -> None:
+        """Append *payload* to the newest segment, rolling and evicting as needed."""
+        line = json.dumps(payload, separators=(",", ":")).encode("utf-8") + b"\n"
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            segments = self._segments()
+            if not segments or os.path.getsize(self._path(segments[-1])) + len(line) > self.segment_size:
+                segments.append(segments[-1] + 1 if segments else 1)
+            with open(self._path(segments[-1]), "ab") as fh:
+                fh.write(line)
+                fh.flush()
+                os.fsync(fh.fileno())
+            self._evict(segments)
+
+    def read_batch(self, limit: int) -> tuple[list[dict], tuple[int, int] | None]:
+        """Return up to *limit* of the oldest payloads and a commit token.
+
+        Pass the token to :meth:`commit` once the payloads were delivered.
+        """
+        with self._lock:
+            segments = self._segments()
+            if not segments:
+                return [], None
+            segment, offset = self._cursor(segments[0])
+            items: list[dict] = []
+            for number in segments:
+                if number != segment:
+                    if offset < os.path.getsize(self._path(segment)):
+                        break
+                    segment, offset = number, 0
+                with open(self._path(segment), "rb") as fh:
+                    fh.seek(offset)
+                    while len(items) < limit:
+                        line = fh.readline()
+                        if not line.endswith(b"\n"):
+                            break
+                        offset += len(line)
+                        try:
+                            items.append(json.loads(line))
+                        except ValueError:
+                            continue
+                if len(items) >= limit:
+                    break
+            return items, (segment, offset)
+
+    def commit(self, token: tuple[int, int] | None) -> None:
+        """Mark everything up to *token* as delivered."""
+        if token is None:
+            return
+        segment, offset = token
+        with self._lock:
+            for number in self._segments():
+                if number > segment:
+                    break
+                path = self._path(number)
+                if number < segment or offset >= os.path.getsize(path):
+                    os.remove(path)
+                    self._remove_cursor()
+                else:
+                    self._write_cursor(segment, offset)
+
+    def __len__(self) -> int:
+        """Number of payloads still waiting to be replayed."""
+        with self._lock:
+            segments = self._segments()
+            if not segments:
+                return 0
+            segment, offset = self._cursor(segments[0])
+            count = 0
+            for number in segments:
+                with open(self._path(number), "rb") as fh:
+                    if number == segment:
+                        fh.seek(offset)
+                    count += sum(1 for line in fh if line.endswith(b"\n"))
+            return count
+
+    def size(self) -> int:
+        """Total size of all segments in bytes."""
+        with self._lock:
+            return sum(os.path.getsize(self._path(n)) for n in self._segments())
+
+    def _evict(self, segments: list[int]) -> None:
+        total = sum(os.path.getsize(self._path(n)) for n in segments)
+        while len(segments) > 1 and total > self.max_bytes:
+            oldest = segments.pop(0)
+            total -= os.path.getsize(self._path(oldest))
+            os.remove(self._path(oldest))
+            self._remove_cursor()
+
+    def _segments(self) -> list[int]:
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        numbers = []
+        for name in names:
+            if name.startswith("spool-") and name.endswith(".ndjson"):
+                try:
+                    numbers.append(int(name[len("spool-"):-len(".ndjson")]))
+                except ValueError:
+                    continue
+        return sorted(numbers)
+
+    def _path(self, number: int) -> str:
+        return os.path.join(self.directory, f"spool-{number:08d}.ndjson")
+
+    def _cursor_path(self) -> str:
+        return os.path.join(self.directory, "cursor.json")
+
+    def _cursor(self, oldest: int) -> tuple[int, int]:
+        try:
+            with open(self._cursor_path(), "r", encoding="utf-8") as fh:
+                data = json.load(fh)
+            if data.get("segment") == oldest:
+                return oldest, int(data.get("offset", 0))
+        except (OSError, ValueError, AttributeError):
+            pass
+        return oldest, 0
+
+    def _write_cursor(self, segment: int, offset: int) -> None:
+        tmp_path = f"{self._cursor_path()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump({"segment": segment, "offset": offset}, fh)
+        os.replace(tmp_path, self._cursor_path())
+
+    def _remove_cursor(self) -> None:
+        try:
+            os.remove(self._cursor_path())
+        except OSError:
+            pass
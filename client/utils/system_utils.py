@@ -1,6 +1,10 @@
+import ctypes
+import hashlib
 import json
 import os
 import socket
+import sys
+import time
 import uuid
 
 
@@ -23,3 +27,25 @@ def save_config(config: dict, path: str = "client_config.json") -> None:
     """Persist *config* to *path* in JSON format."""
     with open(path, "w", encoding="utf-8") as fh:
         json.dump(config, fh, indent=2)
+
+
+def content_hash(data: dict) -> str:
+    """Return a stable SHA-256 hex digest of the JSON encoding of *data*."""
+    encoded = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def get_boot_time() -> float:
+    """Return the system boot time as a POSIX timestamp rounded to a minute."""
+    try:
+        if sys.platform == "win32":
+            get_tick_count = ctypes.windll.kernel32.GetTickCount64
+            # The default c_int result would wrap after 24.8 days of uptime.
+            get_tick_count.restype = ctypes.c_uint64
+            uptime = get_tick_count() / 1000
+        else:
+            with open("/proc/uptime", "r", encoding="utf-8") as fh:
+                uptime = float(fh.read().split()[0])
+    except (OSError, AttributeError, ValueError):
+        uptime = time.monotonic()
+    return round((time.time() - uptime) / 60) * 60
@@ -1,11 +1,19 @@
-from flask import Blueprint, request, jsonify
+import json
+
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
 from ..services.agent_service import AgentService
-from ..services.data_service import DataService
+from ..services.data_service import DataService, HISTORY_FIELDS, HISTORY_SORTS
+from ..services.liveness import OFFLINE_FIELDS, OFFLINE_SORTS
+from ..services.pagination import ListOptions
 
 agents_bp = Blueprint('agents', __name__, url_prefix='/api/agents')
 _agent_service = AgentService()
 _data_service = DataService()
 
+MAX_BATCH_SIZE = 1000
+MAX_PAGE_SIZE = 1000
+DEFAULT_OFFLINE_PAGE_SIZE = 100
+
 
 @agents_bp.route('/register', methods=['POST'])
 def register_agent():
@@ -19,18 +27,182 @@ def register_agent():
 @agents_bp.route('/monitoring-data', methods=['POST'])
 def monitoring_data():
     data = request.get_json(force=True)
-    agent_id = data.get('system', {}).get('agent_id')
-    if not agent_id:
-        return jsonify({'error': 'system.agent_id is required'}), 400
-    _data_service.store_monitoring_data(agent_id, data)
-    return jsonify({'status': 'ok'})
+    error = _data_service.payload_error(data)
+    if error:
+        return jsonify({'error': error}), 400
+    agent_id = data['system']['agent_id']
+    ingest_queue = current_app.extensions.get('ingest_queue')
+    if ingest_queue is None:
+        return jsonify(_with_resend({'status': 'ok'}, _data_service.store_monitoring_data(agent_id, data)))
+    resend = _data_service.stale_references(agent_id, data)
+    if not ingest_queue.put(data):
+        return jsonify({'error': 'ingest queue full'}), 429, {'Retry-After': '1'}
+    return jsonify(_with_resend({'status': 'queued'}, resend)), 202
+
+
+def _with_resend(body: dict, resend: list[str]) -> dict:
+    """Ask the agent to send *resend* sections in full, their hash references being stale."""
+    if resend:
+        body['resend'] = resend
+    return body
+
+
+@agents_bp.route('/heartbeat', methods=['POST'])
+def heartbeat():
+    """Mark agents as alive without storing a monitoring payload.
+
+    Accepts ``{"agent_id": ...}`` or, from relays, ``{"agent_ids": [...]}``;
+    agents that are not registered are returned under ``unknown``.
+    """
+    data = request.get_json(force=True)
+    agent_ids = data.get('agent_ids') if isinstance(data, dict) else None
+    if agent_ids is None and isinstance(data, dict) and data.get('agent_id'):
+        agent_ids = [data['agent_id']]
+    if not isinstance(agent_ids, list) or not all(isinstance(a, str) and a for a in agent_ids):
+        return jsonify({'error': 'agent_id or a list of agent_ids is required'}), 400
+    if len(agent_ids) > MAX_BATCH_SIZE:
+        return jsonify({'error': f'at most {MAX_BATCH_SIZE} agents per heartbeat'}), 413
+    unknown = current_app.extensions['heartbeats'].beat(agent_ids)
+    return jsonify({'status': 'ok', 'unknown': unknown})
+
+
+@agents_bp.route('/heartbeat/metrics', methods=['GET'])
+def heartbeat_metrics():
+    """Return counters of the heartbeat buffer."""
+    return jsonify(current_app.extensions['heartbeats'].metrics())
+
+
+@agents_bp.route('/ingest/metrics', methods=['GET'])
+def ingest_metrics():
+    """Return depth and flush latency of the write-behind ingest queue."""
+    ingest_queue = current_app.extensions.get('ingest_queue')
+    if ingest_queue is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **ingest_queue.metrics()})
+
+
+@agents_bp.route('/registry/metrics', methods=['GET'])
+def registry_metrics():
+    """Return size and lookup hit rates of the in-memory agent registry."""
+    return jsonify(current_app.extensions['agent_registry'].metrics())
+
+
+@agents_bp.route('/monitoring-data/batch', methods=['POST'])
+def monitoring_data_batch():
+    """Store a JSON array or NDJSON stream of monitoring payloads."""
+    if request.mimetype == 'application/x-ndjson':
+        payloads = [_parse_ndjson_line(line) for line in request.stream if line.strip()]
+    else:
+        payloads = request.get_json(force=True)
+        if not isinstance(payloads, list):
+            return jsonify({'error': 'a JSON array of payloads is required'}), 400
+    if len(payloads) > MAX_BATCH_SIZE:
+        return jsonify({'error': f'at most {MAX_BATCH_SIZE} payloads per batch'}), 413
+    results = _data_service.store_monitoring_batch(payloads)
+    return jsonify({'results': results})
+
+
+def _parse_ndjson_line(line: bytes) -> dict | None:
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
 
 
 @agents_bp.route('/history', methods=['GET'])
 def get_agents_history():
-    """Return stored monitoring data for all agents."""
-    agents = _data_service.get_agents_history()
-    return jsonify({'agents': agents})
+    """Return stored monitoring data for all agents.
+
+    With ``since=<cursor>`` only agents changed after that cursor are
+    returned; every response carries the cursor for the next poll.
+    ``limit``/``after`` page through the result in ``sort`` order, ``next``
+    being the ``after`` value of the following page, and ``fields`` selects
+    the returned fields.
+    """
+    try:
+        options = ListOptions.parse(request.args, HISTORY_SORTS, HISTORY_FIELDS, max_limit=MAX_PAGE_SIZE)
+        agents, cursor, next_page = _data_service.get_agents_changes(request.args.get('since'), options)
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+    return jsonify({'agents': agents, 'cursor': cursor, 'next': next_page})
+
+
+@agents_bp.route('/export', methods=['GET'])
+def export_agents():
+    """Stream the history of every agent as one JSON array."""
+    try:
+        fields = ListOptions.parse(request.args, HISTORY_SORTS, HISTORY_FIELDS).fields
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+
+    def generate():
+        yield '['
+        for n, agent in enumerate(_data_service.iter_agents_history(fields)):
+            yield (',' if n else '') + json.dumps(agent)
+        yield ']'
+
+    headers = {'Content-Disposition': 'attachment; filename=agents.json'}
+    return Response(stream_with_context(generate()), mimetype='application/json', headers=headers)
+
+
+@agents_bp.route('/stream', methods=['GET'])
+def stream_events():
+    """Push agent changes to the dashboard as Server-Sent Events."""
+    broadcaster = current_app.extensions['event_broadcaster']
+    keepalive = current_app.config['STREAM_KEEPALIVE']
+    subscription = broadcaster.subscribe()
+
+    def generate():
+        try:
+            yield 'retry: 5000\n\n'
+            while not subscription.closed:
+                message = subscription.get(timeout=keepalive)
+                if message is None:
+                    yield ': keepalive\n\n'
+                    continue
+                event, data = message
+                yield f'event: {event}\ndata: {data}\n\n'
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers=headers)
+
+
+@agents_bp.route('/offline', methods=['GET'])
+def get_offline_agents():
+    """Return agents the liveness tracker currently considers offline.
+
+    Pages with ``limit``/``after`` like the history, newest loss first.
+    """
+    liveness = current_app.extensions['liveness']
+    try:
+        options = ListOptions.parse(
+            request.args, OFFLINE_SORTS, OFFLINE_FIELDS,
+            default_limit=DEFAULT_OFFLINE_PAGE_SIZE, max_limit=MAX_PAGE_SIZE, default_sort='-offline_since',
+        )
+        agents, next_page = liveness.offline(options)
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+    return jsonify({'agents': agents, 'next': next_page, **liveness.metrics()})
+
+
+@agents_bp.route('/<agent_id>/registration-changes', methods=['GET'])
+def get_registration_changes(agent_id):
+    """Return the history of changed registration fields, newest first."""
+    changes = _agent_service.get_registration_changes(agent_id)
+    return jsonify({
+        'agent_id': agent_id,
+        'changes': [
+            {
+                'field': change.field,
+                'old_value': change.old_value,
+                'new_value': change.new_value,
+                'changed_at': change.changed_at.isoformat(),
+            }
+            for change in changes
+        ],
+    })
 
 
 @agents_bp.route('/service-tag/<service_tag>', methods=['GET'])
@@ -0,0 +1,17 @@
+"""Helpers serving cached aggregate responses with HTTP validators."""
+from typing import Callable
+
+from flask import current_app, request
+
+
+def cached_json(key: str, compute: Callable[[], dict]):
+    """Return *compute()* as JSON through the app's aggregate cache.
+
+    Responses carry an ETag and ``Cache-Control: no-cache`` so browsers
+    revalidate every poll; a matching ``If-None-Match`` gets a 304.
+    """
+    entry = current_app.extensions['aggregate_cache'].get(key, compute)
+    response = current_app.response_class(entry.body, mimetype='application/json')
+    response.set_etag(entry.etag)
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
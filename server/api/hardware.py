@@ -1,5 +1,6 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint
 from ..models import db, Agent
+from .caching import cached_json
 
 hardware_bp = Blueprint('hardware', __name__, url_prefix='/api/hardware')
 
@@ -7,6 +8,10 @@ hardware_bp = Blueprint('hardware', __name__, url_prefix='/api/hardware')
 @hardware_bp.route('/', methods=['GET'])
 def get_hardware_overview():
     """Return a simple overview of hardware information."""
+    return cached_json('hardware_overview', _hardware_overview)
+
+
+def _hardware_overview() -> dict:
     manufacturer_counts = (
         db.session.query(Agent.manufacturer, db.func.count(Agent.id))
         .group_by(Agent.manufacturer)
@@ -23,11 +28,9 @@ def get_hardware_overview():
         .scalar()
     )
     total = db.session.query(db.func.count(Agent.id)).scalar()
-    return jsonify(
-        {
-            "manufacturers": {m or "Unknown": c for m, c in manufacturer_counts},
-            "models": {m or "Unknown": c for m, c in model_counts},
-            "service_tags": service_tags,
-            "systems": total,
-        }
-    )
+    return {
+        "manufacturers": {m or "Unknown": c for m, c in manufacturer_counts},
+        "models": {m or "Unknown": c for m, c in model_counts},
+        "service_tags": service_tags,
+        "systems": total,
+    }
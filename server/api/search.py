@@ -1,25 +1,40 @@
-from flask import Blueprint, request, jsonify
-from ..services.agent_service import AgentService
+from flask import Blueprint, current_app, request, jsonify
+from ..services.agent_service import AgentService, SEARCH_FIELDS, SEARCH_SORTS
+from ..services.pagination import ListOptions
 
 search_bp = Blueprint('search', __name__, url_prefix='/api')
 _agent_service = AgentService()
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+MAX_SUGGESTIONS = 50
+
 
 @search_bp.route('/search', methods=['GET'])
 def search_systems():
+    """Search agents with ``limit``, ``after``, ``sort`` and ``fields`` paging."""
     query = request.args.get('q', '')
     if not query:
         return jsonify({'error': 'q parameter required'}), 400
-    agents = _agent_service.search(query)
-    results = [
-        {
-            'agent_id': a.agent_id,
-            'hostname': a.hostname,
-            'service_tag': a.service_tag,
-            'serial_number': a.serial_number,
-            'manufacturer': a.manufacturer,
-            'model': a.model,
-        }
-        for a in agents
-    ]
-    return jsonify({'results': results})
+    try:
+        options = ListOptions.parse(
+            request.args, SEARCH_SORTS, SEARCH_FIELDS,
+            default_limit=DEFAULT_PAGE_SIZE, max_limit=MAX_PAGE_SIZE, default_sort='relevance',
+        )
+        agents, next_page = _agent_service.search(query, options)
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+    fields = options.fields or list(SEARCH_FIELDS)
+    results = [{name: getattr(a, name) for name in fields} for a in agents]
+    return jsonify({'results': results, 'next': next_page})
+
+
+@search_bp.route('/search/suggest', methods=['GET'])
+def suggest():
+    """Return hostnames, service tags and serials starting with ``prefix``."""
+    prefix = request.args.get('prefix', '')
+    if not prefix:
+        return jsonify({'error': 'prefix parameter required'}), 400
+    limit = min(request.args.get('limit', 10, type=int), MAX_SUGGESTIONS)
+    suggestions = current_app.extensions['suggest_index'].suggest(prefix, max(limit, 1))
+    return jsonify({'suggestions': suggestions})
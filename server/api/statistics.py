@@ -1,34 +1,32 @@
-from flask import Blueprint, jsonify
-from ..models import db, Agent
+from flask import Blueprint, current_app, jsonify
+from .caching import cached_json
 
 statistics_bp = Blueprint('statistics', __name__, url_prefix='/api/statistics')
 
 
 @statistics_bp.route('/', methods=['GET'])
 def stats():
-    """Placeholder statistics endpoint."""
-    return jsonify({})
+    """Return fleet counters maintained incrementally by ``FleetStatistics``."""
+    return jsonify(current_app.extensions['fleet_statistics'].snapshot())
 
 
 @statistics_bp.route('/hardware', methods=['GET'])
 def get_hardware_stats():
     """Return basic hardware statistics."""
-    manufacturer_counts = (
-        db.session.query(Agent.manufacturer, db.func.count(Agent.id))
-        .group_by(Agent.manufacturer)
-        .all()
-    )
-    total = db.session.query(db.func.count(Agent.id)).scalar()
-    detected = (
-        db.session.query(db.func.count(Agent.service_tag))
-        .filter(Agent.service_tag.isnot(None))
-        .scalar()
-    )
-    return jsonify(
-        {
-            "manufacturers": {m or "Unknown": c for m, c in manufacturer_counts},
-            "detection_success": detected,
-            "detection_failed": total - detected,
-            "total": total,
-        }
-    )
+    return cached_json('hardware_stats', _hardware_stats)
+
+
+@statistics_bp.route('/cache', methods=['GET'])
+def get_cache_stats():
+    """Return hit/miss counters of the aggregate response cache."""
+    return jsonify(current_app.extensions['aggregate_cache'].metrics())
+
+
+def _hardware_stats() -> dict:
+    snapshot = current_app.extensions['fleet_statistics'].snapshot()
+    return {
+        "manufacturers": snapshot["manufacturers"],
+        "detection_success": snapshot["detection"].get("success", 0),
+        "detection_failed": snapshot["detection"].get("failed", 0),
+        "total": snapshot["total"],
+    }
@@ -2,7 +2,10 @@
 
 from __future__ import annotations
 
+import atexit
+import logging
 import sys
+import weakref
 from pathlib import Path
 
 from flask import Flask, render_template
@@ -15,7 +18,22 @@ if __package__ is None or __package__ == "":  # pragma: no cover - runtime conve
     sys.path.append(str(Path(__file__).resolve().parent.parent))
 
 from server.config.server_config import ServerConfig
+from server.engine import engine_options, install_sqlite_pragmas
+from server.middleware import GzipRequestMiddleware
+from server.migrations import MigrationRunner
 from server.models import db
+from server.services.agent_registry import AgentRegistry
+from server.services.aggregate_cache import AggregateCache
+from server.services.broadcaster import EventBroadcaster
+from server.services.data_service import ONLINE_WINDOW
+from server.services.events import agent_registered, agent_status_changed, monitoring_data_stored
+from server.services.heartbeat import HeartbeatBuffer
+from server.services.ingest_queue import IngestQueue
+from server.services.liveness import LivenessTracker
+from server.services.retention import HistoryCompactor, RetentionWorker
+from server.services.search_index import AgentSearchIndex
+from server.services.statistics import FleetStatistics
+from server.services.suggest_index import SuggestIndex
 from server.api.agents import agents_bp
 from server.api.hardware import hardware_bp
 from server.api.software import software_bp
@@ -23,15 +41,116 @@ from server.api.statistics import statistics_bp
 from server.api.search import search_bp
 
 
+logger = logging.getLogger(__name__)
+
+# Applications whose background workers are stopped at interpreter exit.
+_running_apps: "weakref.WeakSet[Flask]" = weakref.WeakSet()
+
+
+def shutdown_app(app: Flask) -> None:
+    """Stop the background workers of *app*, newest first, flushing their buffers.
+
+    Safe to call more than once; it also runs for every live application
+    at interpreter exit.
+    """
+    hooks = app.extensions.get('shutdown_hooks', [])
+    while hooks:
+        stop = hooks.pop()
+        try:
+            stop()
+        except Exception:
+            logger.exception("Stopping %r failed", stop)
+    _running_apps.discard(app)
+
+
+@atexit.register
+def _shutdown_running_apps() -> None:
+    for app in list(_running_apps):
+        shutdown_app(app)
+
+
 def create_app(config: ServerConfig | None = None) -> Flask:
     """Application factory for the monitoring server."""
     app = Flask(__name__)
+    app.extensions['shutdown_hooks'] = []
+    _running_apps.add(app)
+    app.wsgi_app = GzipRequestMiddleware(app.wsgi_app)
     cfg = config or ServerConfig()
     app.config['SQLALCHEMY_DATABASE_URI'] = cfg.database_uri
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(cfg)
     db.init_app(app)
+    search_index = AgentSearchIndex()
+    suggest_index = SuggestIndex()
+    with app.app_context():
+        install_sqlite_pragmas(db.engine, cfg)
+        if cfg.auto_migrate:
+            MigrationRunner().upgrade()
+        search_index.install(db.engine)
+        suggest_index.load()
+    app.extensions['agent_search_index'] = search_index
+    app.extensions['suggest_index'] = suggest_index
+    agent_registered.connect(suggest_index.on_agent_registered, sender=app, weak=False)
+    agent_registry = AgentRegistry(capacity=cfg.agent_registry_size)
+    app.extensions['agent_registry'] = agent_registry
+    agent_registered.connect(agent_registry.on_agent_registered, sender=app, weak=False)
+    aggregate_cache = AggregateCache(ttl=cfg.aggregate_cache_ttl)
+    app.extensions['aggregate_cache'] = aggregate_cache
+    agent_registered.connect(aggregate_cache.invalidate, sender=app, weak=False)
+    broadcaster = EventBroadcaster(queue_size=cfg.stream_queue_size)
+    app.extensions['event_broadcaster'] = broadcaster
+    app.config['STREAM_KEEPALIVE'] = cfg.stream_keepalive
+    agent_registered.connect(broadcaster.on_agent_registered, sender=app, weak=False)
+    monitoring_data_stored.connect(broadcaster.on_monitoring_data, sender=app, weak=False)
+    agent_status_changed.connect(broadcaster.on_status_changed, sender=app, weak=False)
+    fleet_statistics = FleetStatistics()
+    app.extensions['fleet_statistics'] = fleet_statistics
+    agent_registered.connect(fleet_statistics.on_agent_registered, sender=app, weak=False)
+    monitoring_data_stored.connect(fleet_statistics.on_monitoring_data, sender=app, weak=False)
+    agent_status_changed.connect(fleet_statistics.on_status_changed, sender=app, weak=False)
+    fleet_statistics.start(app, cfg.statistics_reconcile_interval)
+    app.extensions['shutdown_hooks'].append(fleet_statistics.stop)
+    liveness = LivenessTracker(app, timeout=ONLINE_WINDOW, resolution=cfg.liveness_resolution)
+    app.extensions['liveness'] = liveness
     with app.app_context():
-        db.create_all()
+        liveness.load()
+    agent_registered.connect(liveness.on_agent_registered, sender=app, weak=False)
+    monitoring_data_stored.connect(liveness.on_monitoring_data, sender=app, weak=False)
+    liveness.start()
+    app.extensions['shutdown_hooks'].append(liveness.stop)
+    heartbeats = HeartbeatBuffer(
+        app,
+        liveness,
+        flush_interval=cfg.heartbeat_flush_interval,
+        batch_size=cfg.heartbeat_batch_size,
+        registry=agent_registry,
+    )
+    app.extensions['heartbeats'] = heartbeats
+    heartbeats.start()
+    app.extensions['shutdown_hooks'].append(heartbeats.stop)
+    if cfg.ingest_async:
+        ingest_queue = IngestQueue(
+            app,
+            capacity=cfg.ingest_queue_size,
+            batch_size=cfg.ingest_batch_size,
+            flush_interval=cfg.ingest_flush_interval,
+        )
+        app.extensions['ingest_queue'] = ingest_queue
+        app.extensions['shutdown_hooks'].append(ingest_queue.stop)
+    if cfg.retention_interval:
+        retention_worker = RetentionWorker(
+            app,
+            HistoryCompactor(
+                raw_days=cfg.retention_raw_days,
+                max_days=cfg.retention_max_days,
+                batch_size=cfg.retention_batch_size,
+                pause=cfg.retention_pause,
+            ),
+            interval=cfg.retention_interval,
+        )
+        app.extensions['retention_worker'] = retention_worker
+        retention_worker.start()
+        app.extensions['shutdown_hooks'].append(retention_worker.stop)
     app.register_blueprint(agents_bp)
     app.register_blueprint(hardware_bp)
     app.register_blueprint(software_bp)
@@ -0,0 +1,61 @@
+"""Compact and expire office and backup record history on demand."""
+
+import argparse
+
+from sqlalchemy import text
+
+from .app import create_app
+from .config.server_config import ServerConfig
+from .models import db
+from .services.retention import HistoryCompactor
+
+
+def _database_bytes() -> tuple[int, int]:
+    """Return the SQLite database size and its free-page bytes."""
+    if db.engine.dialect.name != "sqlite":
+        return 0, 0
+    page_size = db.session.execute(text("PRAGMA page_size")).scalar()
+    pages = db.session.execute(text("PRAGMA page_count")).scalar()
+    free = db.session.execute(text("PRAGMA freelist_count")).scalar()
+    return pages * page_size, free * page_size
+
+
+def compact_history(argv: list[str] | None = None) -> None:
+    cfg = ServerConfig()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-uri", default=cfg.database_uri)
+    parser.add_argument("--raw-days", type=int, default=cfg.retention_raw_days,
+                        help="keep records younger than this untouched")
+    parser.add_argument("--max-days", type=int, default=cfg.retention_max_days,
+                        help="delete records whose span ended before this age")
+    parser.add_argument("--batch-size", type=int, default=cfg.retention_batch_size)
+    parser.add_argument("--vacuum", action="store_true",
+                        help="VACUUM afterwards to return freed pages to the filesystem")
+    args = parser.parse_args(argv)
+
+    cfg.database_uri = args.database_uri
+    cfg.retention_interval = 0
+    app = create_app(cfg)
+    with app.app_context():
+        size_before, _ = _database_bytes()
+        report = HistoryCompactor(
+            raw_days=args.raw_days, max_days=args.max_days, batch_size=args.batch_size
+        ).run()
+        for table, table_report in report.tables.items():
+            print(
+                f"{table}: scanned {table_report.scanned}, merged {table_report.merged}, "
+                f"expired {table_report.expired}"
+            )
+        size_after, free = _database_bytes()
+        if args.vacuum and db.engine.dialect.name == "sqlite":
+            db.session.commit()
+            with db.engine.connect() as conn:
+                conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("VACUUM"))
+            size_after, free = _database_bytes()
+    print(f"Removed {report.deleted} records in {report.batches} batches")
+    if size_before:
+        print(f"Database {size_before} -> {size_after} bytes, {free} bytes free for reuse")
+
+
+if __name__ == "__main__":  # pragma: no cover - script entry
+    compact_history()
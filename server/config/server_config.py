@@ -5,3 +5,50 @@ from dataclasses import dataclass
 @dataclass
 class ServerConfig:
     database_uri: str = "sqlite:///monitoring.db"
+    # Apply pending schema migrations in create_app; disable to run
+    # ``python -m server.migrate`` as a separate deployment step instead
+    auto_migrate: bool = True
+
+    # SQLite pragmas applied on connect; None keeps the SQLite default
+    sqlite_journal_mode: str | None = "WAL"
+    sqlite_synchronous: str | None = "NORMAL"
+    sqlite_busy_timeout_ms: int | None = 5000
+    sqlite_mmap_size: int | None = 256 * 1024 * 1024
+    # Negative values are KiB: 64 MiB of page cache per connection
+    sqlite_cache_size: int | None = -64000
+
+    # Connection pool of server databases such as PostgreSQL
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_pre_ping: bool = True
+    db_pool_recycle: int = 1800
+
+    # Write-behind ingest of /api/agents/monitoring-data payloads
+    ingest_async: bool = True
+    ingest_queue_size: int = 10000
+    ingest_batch_size: int = 500
+    ingest_flush_interval: float = 1.0
+
+    # Agents whose primary key and service tag are cached in memory
+    agent_registry_size: int = 10000
+    # Seconds dashboard aggregates stay cached between agent registrations
+    aggregate_cache_ttl: float = 30.0
+    # Seconds between reconciling /api/statistics counters with the database
+    statistics_reconcile_interval: float = 300.0
+
+    # Server-Sent Events stream at /api/agents/stream
+    stream_queue_size: int = 100
+    stream_keepalive: float = 15.0
+
+    # Seconds between liveness timer-wheel ticks detecting offline agents
+    liveness_resolution: float = 1.0
+    # /api/agents/heartbeat: seconds between bulk writes of Agent.last_seen
+    heartbeat_flush_interval: float = 30.0
+    heartbeat_batch_size: int = 1000
+
+    # Office/backup history retention; see services.retention
+    retention_raw_days: int = 30
+    retention_max_days: int | None = None
+    retention_batch_size: int = 1000
+    retention_pause: float = 0.05
+    retention_interval: float = 6 * 3600
@@ -0,0 +1,50 @@
+"""Database engine options derived from :class:`ServerConfig`."""
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+from .config.server_config import ServerConfig
+
+
+def engine_options(cfg: ServerConfig) -> dict:
+    """Return ``SQLALCHEMY_ENGINE_OPTIONS`` for the configured backend.
+
+    Pool sizing applies to server databases such as PostgreSQL; SQLite keeps
+    SQLAlchemy's default pool and is tuned per connection with
+    :func:`install_sqlite_pragmas` instead.
+    """
+    if make_url(cfg.database_uri).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "pool_size": cfg.db_pool_size,
+        "max_overflow": cfg.db_max_overflow,
+        "pool_pre_ping": cfg.db_pool_pre_ping,
+        "pool_recycle": cfg.db_pool_recycle,
+    }
+
+
+def install_sqlite_pragmas(engine, cfg: ServerConfig) -> None:
+    """Apply the configured pragmas to every new SQLite connection.
+
+    WAL lets dashboard reads proceed while ingest commits, and
+    ``synchronous=NORMAL`` is durable under WAL except for the last
+    transactions before a power loss. Settings left as ``None`` keep the
+    SQLite defaults.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    pragmas = {
+        "journal_mode": cfg.sqlite_journal_mode,
+        "synchronous": cfg.sqlite_synchronous,
+        "busy_timeout": cfg.sqlite_busy_timeout_ms,
+        "mmap_size": cfg.sqlite_mmap_size,
+        "cache_size": cfg.sqlite_cache_size,
+    }
+    statements = [f"PRAGMA {name}={value}" for name, value in pragmas.items() if value is not None]
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, _record) -> None:
+        cursor = dbapi_connection.cursor()
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.close()
@@ -0,0 +1,102 @@
+"""Measure concurrent ingest and dashboard read throughput on SQLite.
+
+Runs the same workload against a fresh database file with SQLite's default
+rollback journal and with the tuned :class:`ServerConfig` pragmas::
+
+    python -m server.load_test --seconds 10 --writers 4 --readers 4
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+from dataclasses import replace
+
+from .app import create_app
+from .config.server_config import ServerConfig
+from .models import db
+from .services.agent_service import AgentService
+from .services.data_service import DataService
+
+DEFAULT_PRAGMAS = {
+    "sqlite_journal_mode": None,
+    "sqlite_synchronous": None,
+    "sqlite_busy_timeout_ms": 5000,
+    "sqlite_mmap_size": None,
+    "sqlite_cache_size": None,
+}
+
+
+def run_workload(cfg: ServerConfig, agents: int, writers: int, readers: int, seconds: float) -> dict:
+    """Return write and read operation counts per second for *cfg*."""
+    app = create_app(cfg)
+    with app.test_request_context():
+        for n in range(agents):
+            AgentService().register_agent({"agent_id": f"LOAD{n}", "hostname": f"LOAD-{n}"}, "127.0.0.1")
+    counts = {"writes": 0, "reads": 0, "errors": 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def count(key: str) -> None:
+        with lock:
+            counts[key] += 1
+
+    def writer(worker: int) -> None:
+        service = DataService()
+        n = 0
+        while time.monotonic() < deadline:
+            agent_id = f"LOAD{(worker + n * writers) % agents}"
+            payload = {"system": {"agent_id": agent_id}, "backup": {"status": f"run-{n}"}}
+            try:
+                with app.test_request_context():
+                    service.store_monitoring_data(agent_id, payload)
+                count("writes")
+            except Exception:
+                count("errors")
+            n += 1
+
+    def reader() -> None:
+        service = DataService()
+        while time.monotonic() < deadline:
+            try:
+                with app.app_context():
+                    service.get_agents_history()
+                    db.session.remove()
+                count("reads")
+            except Exception:
+                count("errors")
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with app.app_context():
+        db.engine.dispose()
+    return {key: value / seconds for key, value in counts.items()}
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--agents", type=int, default=500)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    tuned = ServerConfig(ingest_async=False, retention_interval=0)
+    configs = {"default": replace(tuned, **DEFAULT_PRAGMAS), "tuned": tuned}
+    with tempfile.TemporaryDirectory() as directory:
+        for name, cfg in configs.items():
+            cfg.database_uri = f"sqlite:///{os.path.join(directory, f'{name}.db')}"
+            result = run_workload(cfg, args.agents, args.writers, args.readers, args.seconds)
+            print(
+                f"{name:>8}: {result['writes']:8.1f} writes/s {result['reads']:8.1f} reads/s "
+                f"{result['errors']:6.1f} errors/s"
+            )
+
+
+if __name__ == "__main__":  # pragma: no cover - script entry
+    main()
@@ -0,0 +1,40 @@
+"""WSGI middleware used by the monitoring server."""
+
+import io
+import zlib
+
+MAX_DECOMPRESSED_SIZE = 32 * 1024 * 1024
+
+
+class GzipRequestMiddleware:
+    """Transparently inflate request bodies sent with ``Content-Encoding: gzip``.
+
+    Agents compress large monitoring payloads; the inflated body is capped
+    at ``max_size`` bytes so a small request cannot expand without bound.
+    """
+
+    def __init__(self, app, max_size: int = MAX_DECOMPRESSED_SIZE) -> None:
+        self.app = app
+        self.max_size = max_size
+
+    def __call__(self, environ, start_response):
+        if environ.get("HTTP_CONTENT_ENCODING", "").strip().lower() != "gzip":
+            return self.app(environ, start_response)
+        length = int(environ.get("CONTENT_LENGTH") or 0)
+        compressed = environ["wsgi.input"].read(length) if length else environ["wsgi.input"].read()
+        inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            body = inflater.decompress(compressed, self.max_size + 1)
+        except zlib.error:
+            return self._error(start_response, "400 Bad Request", b'{"error": "invalid gzip body"}')
+        if len(body) > self.max_size or inflater.unconsumed_tail:
+            return self._error(start_response, "413 Request Entity Too Large", b'{"error": "body too large"}')
+        environ["wsgi.input"] = io.BytesIO(body)
+        environ["CONTENT_LENGTH"] = str(len(body))
+        del environ["HTTP_CONTENT_ENCODING"]
+        return self.app(environ, start_response)
+
+    @staticmethod
+    def _error(start_response, status: str, body: bytes):
+        start_response(status, [("Content-Type", "application/json"), ("Content-Length", str(len(body)))])
+        return [body]
@@ -0,0 +1,37 @@
+"""Apply pending schema migrations to the configured database."""
+
+import argparse
+
+from flask import Flask
+
+from .config.server_config import ServerConfig
+from .engine import engine_options, install_sqlite_pragmas
+from .migrations import MigrationRunner
+from .models import db
+
+
+def migrate(argv: list[str] | None = None) -> None:
+    cfg = ServerConfig()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-uri", default=cfg.database_uri)
+    parser.add_argument("--status", action="store_true", help="show the schema version without migrating")
+    args = parser.parse_args(argv)
+
+    cfg.database_uri = args.database_uri
+    # A bare application: create_app would read tables that may not exist yet.
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = cfg.database_uri
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(cfg)
+    db.init_app(app)
+    with app.app_context():
+        install_sqlite_pragmas(db.engine, cfg)
+        runner = MigrationRunner()
+        if not args.status:
+            for migration in runner.upgrade():
+                print(f"Applied {migration.version:04d} {migration.name}")
+        pending = runner.pending()
+        print(f"Schema version {runner.current_version()} of {runner.head}, {len(pending)} pending")
+
+
+if __name__ == "__main__":  # pragma: no cover - script entry
+    migrate()
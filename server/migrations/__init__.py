@@ -0,0 +1,193 @@
+"""Versioned schema migrations for SQLite and PostgreSQL.
+
+Applied versions are recorded in the ``schema_version`` table and pending
+migrations run in version order. A database without any tables is created
+from the models and stamped with the newest version; a database that
+predates this table is treated as version 0, so every migration is written
+to be idempotent against older schemas.
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable
+
+from sqlalchemy import Column, Table, inspect, text
+
+from ..models import db
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary key serialising concurrent migration runs on PostgreSQL.
+_ADVISORY_LOCK_KEY = 7207731
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    upgrade: Callable[["MigrationContext"], None]
+
+
+class MigrationContext:
+    """Schema operations available to a migration's ``upgrade`` function."""
+
+    def __init__(self, engine) -> None:
+        self.engine = engine
+        self.dialect = engine.dialect.name
+
+    def has_table(self, table: str) -> bool:
+        return inspect(self.engine).has_table(table)
+
+    def has_column(self, table: str, column: str) -> bool:
+        return column in {c["name"] for c in inspect(self.engine).get_columns(table)}
+
+    def execute(self, statement: str, **params) -> int:
+        """Run *statement* in its own transaction and return the affected row count."""
+        with self.engine.begin() as conn:
+            return conn.execute(text(statement), params).rowcount
+
+    def create_table(self, table: Table) -> None:
+        """Create *table* and its indexes if it does not exist yet.
+
+        Pass a definition frozen in the migration, never a model's table:
+        the models describe the newest schema, not the one the migration
+        upgrades to.
+        """
+        if not self.has_table(table.name):
+            table.create(self.engine)
+            logger.info("Created table %s", table.name)
+
+    def add_column(self, table: str, column: Column) -> None:
+        """Add *column* to *table* unless it already exists."""
+        if self.has_column(table, column.name):
+            return
+        ddl = f"ALTER TABLE {table} ADD COLUMN {column.name} {column.type.compile(dialect=self.engine.dialect)}"
+        if column.server_default is not None:
+            ddl += f" DEFAULT {column.server_default.arg}"
+        if not column.nullable:
+            ddl += " NOT NULL"
+        self.execute(ddl)
+        logger.info("Added column %s.%s", table, column.name)
+
+    def create_index(self, name: str, table: str, columns: list[str], unique: bool = False) -> None:
+        """Create an index without blocking writes where the backend allows it.
+
+        PostgreSQL builds the index ``CONCURRENTLY`` outside a transaction and
+        an invalid index left by an interrupted build is dropped and rebuilt.
+        SQLite has no online index build; the statement holds the write lock
+        for its duration.
+        """
+        kind = "UNIQUE INDEX" if unique else "INDEX"
+        target = f"{table} ({', '.join(columns)})"
+        if self.dialect != "postgresql":
+            self.execute(f"CREATE {kind} IF NOT EXISTS {name} ON {target}")
+            return
+        with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            valid = conn.execute(
+                text(
+                    "SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                    "WHERE c.relname = :name"
+                ),
+                {"name": name},
+            ).scalar()
+            if valid is False:
+                conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+            conn.execute(text(f"CREATE {kind} CONCURRENTLY IF NOT EXISTS {name} ON {target}"))
+
+    def backfill(self, table: str, assignments: str, where: str, batch_size: int = 10000) -> int:
+        """Run ``UPDATE table SET assignments`` over rows matching *where* in batches.
+
+        *where* must stop matching a row once it is updated, otherwise the
+        backfill never finishes. Each batch commits on its own so the write
+        lock is released between batches. Returns the number of rows updated.
+        """
+        total = 0
+        while True:
+            updated = self.execute(
+                f"UPDATE {table} SET {assignments} WHERE id IN "
+                f"(SELECT id FROM {table} WHERE {where} LIMIT :batch_size)",
+                batch_size=batch_size,
+            )
+            total += updated
+            if updated < batch_size:
+                return total
+
+
+class MigrationRunner:
+    """Apply :data:`MIGRATIONS` to the database of the current application."""
+
+    def __init__(self, migrations: list[Migration] | None = None) -> None:
+        if migrations is None:
+            from .versions import MIGRATIONS
+            migrations = MIGRATIONS
+        self.migrations = sorted(migrations, key=lambda m: m.version)
+
+    @property
+    def head(self) -> int:
+        return self.migrations[-1].version if self.migrations else 0
+
+    def current_version(self) -> int | None:
+        """Return the applied version, or ``None`` for a database without tables."""
+        engine = db.engine
+        if not inspect(engine).has_table("schema_version"):
+            return 0 if inspect(engine).get_table_names() else None
+        with engine.connect() as conn:
+            return conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_version")).scalar()
+
+    def pending(self) -> list[Migration]:
+        current = self.current_version() or 0
+        return [m for m in self.migrations if m.version > current]
+
+    def upgrade(self) -> list[Migration]:
+        """Bring the schema to the newest version; returns the migrations applied."""
+        engine = db.engine
+        if engine.dialect.name != "postgresql":
+            return self._upgrade(engine)
+        # The lock session must not hold a transaction open, or concurrent
+        # index builds would wait for it forever.
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock:
+            lock.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+            try:
+                return self._upgrade(engine)
+            finally:
+                lock.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+
+    def _upgrade(self, engine) -> list[Migration]:
+        current = self.current_version()
+        self._ensure_version_table(engine)
+        if current is None:
+            db.metadata.create_all(engine)
+            self._record(engine, self.head, "create schema from models")
+            return []
+        context = MigrationContext(engine)
+        applied = []
+        for migration in self.migrations:
+            if migration.version <= current:
+                continue
+            logger.info("Applying migration %04d %s", migration.version, migration.name)
+            migration.upgrade(context)
+            self._record(engine, migration.version, migration.name)
+            applied.append(migration)
+        return applied
+
+    @staticmethod
+    def _ensure_version_table(engine) -> None:
+        with engine.begin() as conn:
+            conn.execute(
+                text(
+                    "CREATE TABLE IF NOT EXISTS schema_version ("
+                    "version INTEGER PRIMARY KEY, name VARCHAR(200) NOT NULL, applied_at TIMESTAMP NOT NULL)"
+                )
+            )
+
+    @staticmethod
+    def _record(engine, version: int, name: str) -> None:
+        with engine.begin() as conn:
+            conn.execute(
+                text("INSERT INTO schema_version (version, name, applied_at) VALUES (:version, :name, :applied_at)"),
+                {"version": version, "name": name, "applied_at": datetime.utcnow()},
+            )
+
+
+__all__ = ["Migration", "MigrationContext", "MigrationRunner"]
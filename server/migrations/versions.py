@@ -0,0 +1,186 @@
+"""Ordered schema migrations. Append new migrations; never edit applied ones.
+
+Migrations only use the table definitions frozen in this module and plain
+SQL, never the models, so an old database can still be brought up to date
+after the models have moved on.
+"""
+
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, MetaData, String, Table, Text
+
+from . import Migration, MigrationContext
+
+_metadata = MetaData()
+
+# Tables of the schema that predates versioned migrations.
+_BASELINE_TABLES = [
+    Table(
+        "agent",
+        _metadata,
+        Column("id", Integer, primary_key=True),
+        Column("agent_id", String(120), unique=True, nullable=False),
+        Column("hostname", String(120)),
+        Column("ip_address", String(45)),
+        Column("operating_system", String(120)),
+        Column("last_seen", DateTime),
+    ),
+    Table(
+        "office_record",
+        _metadata,
+        Column("id", Integer, primary_key=True),
+        Column("agent_id", String(120), ForeignKey("agent.agent_id")),
+        Column("is_installed", Boolean),
+        Column("version", String(50)),
+        Column("activation_status", String(50)),
+        Column("recorded_at", DateTime),
+    ),
+    Table(
+        "cad_record",
+        _metadata,
+        Column("id", Integer, primary_key=True),
+        Column("agent_id", String(120), ForeignKey("agent.agent_id")),
+        Column("software_name", String(50)),
+        Column("is_installed", Boolean),
+        Column("version", String(50)),
+        Column("license_status", String(50)),
+        Column("recorded_at", DateTime),
+    ),
+    Table(
+        "backup_record",
+        _metadata,
+        Column("id", Integer, primary_key=True),
+        Column("agent_id", String(120), ForeignKey("agent.agent_id")),
+        Column("backup_status", String(50)),
+        Column("backup_location", String(255)),
+        Column("versions_data", Text),
+        Column("last_backup_date", DateTime),
+        Column("recorded_at", DateTime),
+    ),
+]
+
+_CHANGE_SEQUENCE = Table(
+    "change_sequence",
+    _metadata,
+    Column("name", String(50), primary_key=True),
+    Column("value", Integer, nullable=False),
+)
+
+_AGENT_LATEST_STATE = Table(
+    "agent_latest_state",
+    _metadata,
+    Column("agent_id", String(120), ForeignKey("agent.agent_id"), primary_key=True),
+    Column("office_installed", Boolean),
+    Column("office_version", String(50)),
+    Column("office_activation_status", String(50)),
+    Column("office_recorded_at", DateTime),
+    Column("office_hash", String(64)),
+    Column("backup_status", String(50)),
+    Column("backup_location", String(255)),
+    Column("last_backup_date", DateTime, index=True),
+    Column("backup_version_count", Integer),
+    Column("backup_recorded_at", DateTime),
+    Column("backup_hash", String(64)),
+    Column("updated_at", DateTime),
+)
+
+_AGENT_STATUS_CHANGE = Table(
+    "agent_status_change",
+    _metadata,
+    Column("id", Integer, primary_key=True),
+    Column("agent_id", String(120), ForeignKey("agent.agent_id"), nullable=False),
+    Column("online", Boolean, nullable=False),
+    Column("changed_at", DateTime, nullable=False),
+    Index("ix_agent_status_change_agent_id_changed_at", "agent_id", "changed_at"),
+)
+
+_AGENT_REGISTRATION_CHANGE = Table(
+    "agent_registration_change",
+    _metadata,
+    Column("id", Integer, primary_key=True),
+    Column("agent_id", String(120), ForeignKey("agent.agent_id"), nullable=False),
+    Column("field", String(50), nullable=False),
+    Column("old_value", String(255)),
+    Column("new_value", String(255)),
+    Column("changed_at", DateTime, nullable=False),
+    Index("ix_agent_registration_change_agent_id_changed_at", "agent_id", "changed_at"),
+)
+
+# Newest office and backup record of every agent, as rows of agent_latest_state.
+_LATEST_STATE_SQL = """
+INSERT INTO agent_latest_state (
+    agent_id, office_installed, office_version, office_activation_status, office_recorded_at,
+    backup_status, backup_location, last_backup_date, backup_version_count, backup_recorded_at, updated_at
+)
+SELECT a.agent_id, o.is_installed, o.version, o.activation_status, o.recorded_at,
+       b.backup_status, b.backup_location, b.last_backup_date, b.version_count, b.recorded_at,
+       CASE WHEN b.recorded_at IS NULL OR o.recorded_at > b.recorded_at THEN o.recorded_at ELSE b.recorded_at END
+FROM agent a
+LEFT JOIN (
+    SELECT agent_id, is_installed, version, activation_status, recorded_at,
+           ROW_NUMBER() OVER (PARTITION BY agent_id ORDER BY recorded_at DESC, id DESC) AS position
+    FROM office_record
+) o ON o.agent_id = a.agent_id AND o.position = 1
+LEFT JOIN (
+    SELECT agent_id, backup_status, backup_location, last_backup_date, version_count, recorded_at,
+           ROW_NUMBER() OVER (PARTITION BY agent_id ORDER BY recorded_at DESC, id DESC) AS position
+    FROM backup_record
+) b ON b.agent_id = a.agent_id AND b.position = 1
+WHERE o.agent_id IS NOT NULL OR b.agent_id IS NOT NULL
+"""
+
+
+def _agent_hardware_columns(ctx: MigrationContext) -> None:
+    # Databases created by hand or by older releases may lack some tables.
+    for table in _BASELINE_TABLES:
+        ctx.create_table(table)
+    ctx.add_column("agent", Column("service_tag", String(50)))
+    ctx.add_column("agent", Column("serial_number", String(50)))
+    ctx.add_column("agent", Column("manufacturer", String(100)))
+    ctx.add_column("agent", Column("model", String(100)))
+    ctx.add_column("agent", Column("detection_method", String(50)))
+    ctx.create_index("ix_agent_service_tag", "agent", ["service_tag"])
+    ctx.create_index("ix_agent_manufacturer_model", "agent", ["manufacturer", "model"])
+
+
+def _record_columns(ctx: MigrationContext) -> None:
+    ctx.add_column("backup_record", Column("version_count", Integer))
+    ctx.add_column("office_record", Column("last_seen", DateTime))
+    ctx.add_column("backup_record", Column("last_seen", DateTime))
+    ctx.create_index("ix_agent_last_seen", "agent", ["last_seen"])
+    ctx.create_index("ix_office_record_agent_id_recorded_at", "office_record", ["agent_id", "recorded_at"])
+    ctx.create_index("ix_backup_record_agent_id_recorded_at", "backup_record", ["agent_id", "recorded_at"])
+
+
+def _change_sequence(ctx: MigrationContext) -> None:
+    ctx.create_table(_CHANGE_SEQUENCE)
+    ctx.add_column("agent", Column("change_seq", Integer, nullable=False, server_default="0"))
+    ctx.create_index("ix_agent_change_seq", "agent", ["change_seq"])
+
+
+def _agent_latest_state(ctx: MigrationContext) -> None:
+    ctx.create_table(_AGENT_LATEST_STATE)
+    ctx.execute("DELETE FROM agent_latest_state")
+    ctx.execute(_LATEST_STATE_SQL)
+
+
+def _agent_status_change(ctx: MigrationContext) -> None:
+    ctx.create_table(_AGENT_STATUS_CHANGE)
+
+
+def _registration_fingerprint(ctx: MigrationContext) -> None:
+    ctx.add_column("agent", Column("registration_fingerprint", String(64)))
+    ctx.create_table(_AGENT_REGISTRATION_CHANGE)
+
+
+def _software_hash(ctx: MigrationContext) -> None:
+    ctx.add_column("agent_latest_state", Column("software_hash", String(64)))
+
+
+MIGRATIONS = [
+    Migration(1, "agent hardware columns", _agent_hardware_columns),
+    Migration(2, "record columns and lookup indexes", _record_columns),
+    Migration(3, "change sequence", _change_sequence),
+    Migration(4, "agent latest state", _agent_latest_state),
+    Migration(5, "agent status change", _agent_status_change),
+    Migration(6, "agent registration fingerprint", _registration_fingerprint),
+    Migration(7, "software section hash", _software_hash),
+]
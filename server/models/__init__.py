@@ -6,5 +6,19 @@ db = SQLAlchemy()
 from .agent import Agent  # noqa: E402
 from .software import OfficeRecord, CadRecord  # noqa: E402
 from .backup import BackupRecord  # noqa: E402
+from .latest_state import AgentLatestState  # noqa: E402
+from .change_sequence import ChangeSequence  # noqa: E402
+from .status_change import AgentStatusChange  # noqa: E402
+from .registration_change import AgentRegistrationChange  # noqa: E402
 
-__all__ = ["db", "Agent", "OfficeRecord", "CadRecord", "BackupRecord"]
+__all__ = [
+    "db",
+    "Agent",
+    "OfficeRecord",
+    "CadRecord",
+    "BackupRecord",
+    "AgentLatestState",
+    "ChangeSequence",
+    "AgentStatusChange",
+    "AgentRegistrationChange",
+]
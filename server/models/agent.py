@@ -9,7 +9,11 @@ class Agent(db.Model):
     hostname = db.Column(db.String(120))
     ip_address = db.Column(db.String(45))
     operating_system = db.Column(db.String(120))
-    last_seen = db.Column(db.DateTime, default=datetime.utcnow)
+    last_seen = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    # ChangeSequence value of the last change visible to the dashboard
+    change_seq = db.Column(db.Integer, index=True, nullable=False, default=0)
+    # Hash of the registered values, to recognise unchanged re-registrations
+    registration_fingerprint = db.Column(db.String(64), nullable=True)
 
     # Hardware information
     service_tag = db.Column(db.String(50), index=True, nullable=True)
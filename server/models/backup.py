@@ -9,4 +9,11 @@ class BackupRecord(db.Model):
     backup_location = db.Column(db.String(255))
     versions_data = db.Column(db.Text)
     last_backup_date = db.Column(db.DateTime)
+    version_count = db.Column(db.Integer)
     recorded_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # End of the span of identical records collapsed into this one
+    last_seen = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index("ix_backup_record_agent_id_recorded_at", "agent_id", "recorded_at"),
+    )
@@ -0,0 +1,32 @@
+from . import db
+
+#: Counter stamped on ``Agent.change_seq`` for dashboard-visible changes.
+AGENT_CHANGES = "agents"
+
+
+class ChangeSequence(db.Model):
+    """Named monotonically increasing counters used as change cursors.
+
+    Incrementing the counter row inside a write transaction serialises
+    writers on it, so a reader that sees value ``n`` has also seen every
+    change stamped with a value ``<= n``.
+    """
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def advance(cls, name: str) -> int:
+        """Increment counter *name* in the current transaction and return it."""
+        updated = db.session.execute(
+            db.update(cls).where(cls.name == name).values(value=cls.value + 1)
+        ).rowcount
+        if not updated:
+            db.session.add(cls(name=name, value=1))
+            db.session.flush()
+            return 1
+        return db.session.execute(db.select(cls.value).where(cls.name == name)).scalar_one()
+
+    @classmethod
+    def current(cls, name: str) -> int:
+        value = db.session.execute(db.select(cls.value).where(cls.name == name)).scalar()
+        return value or 0
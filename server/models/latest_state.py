@@ -0,0 +1,23 @@
+from . import db
+
+
+class AgentLatestState(db.Model):
+    """Most recent office and backup state of an agent, maintained on ingest."""
+    agent_id = db.Column(db.String(120), db.ForeignKey('agent.agent_id'), primary_key=True)
+
+    office_installed = db.Column(db.Boolean)
+    office_version = db.Column(db.String(50))
+    office_activation_status = db.Column(db.String(50))
+    office_recorded_at = db.Column(db.DateTime)
+    office_hash = db.Column(db.String(64))
+    # Hash of the whole software section, as referenced by agents.
+    software_hash = db.Column(db.String(64))
+
+    backup_status = db.Column(db.String(50))
+    backup_location = db.Column(db.String(255))
+    last_backup_date = db.Column(db.DateTime, index=True)
+    backup_version_count = db.Column(db.Integer)
+    backup_recorded_at = db.Column(db.DateTime)
+    backup_hash = db.Column(db.String(64))
+
+    updated_at = db.Column(db.DateTime)
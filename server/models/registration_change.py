@@ -0,0 +1,16 @@
+from datetime import datetime
+from . import db
+
+
+class AgentRegistrationChange(db.Model):
+    """Registration field of an agent that changed between two registrations."""
+    id = db.Column(db.Integer, primary_key=True)
+    agent_id = db.Column(db.String(120), db.ForeignKey('agent.agent_id'), nullable=False)
+    field = db.Column(db.String(50), nullable=False)
+    old_value = db.Column(db.String(255))
+    new_value = db.Column(db.String(255))
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index("ix_agent_registration_change_agent_id_changed_at", "agent_id", "changed_at"),
+    )
@@ -9,6 +9,12 @@ class OfficeRecord(db.Model):
     version = db.Column(db.String(50))
     activation_status = db.Column(db.String(50))
     recorded_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # End of the span of identical records collapsed into this one
+    last_seen = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index("ix_office_record_agent_id_recorded_at", "agent_id", "recorded_at"),
+    )
 
 
 class CadRecord(db.Model):
@@ -0,0 +1,14 @@
+from datetime import datetime
+from . import db
+
+
+class AgentStatusChange(db.Model):
+    """Online/offline transition of an agent detected by the liveness tracker."""
+    id = db.Column(db.Integer, primary_key=True)
+    agent_id = db.Column(db.String(120), db.ForeignKey('agent.agent_id'), nullable=False)
+    online = db.Column(db.Boolean, nullable=False)
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index("ix_agent_status_change_agent_id_changed_at", "agent_id", "changed_at"),
+    )
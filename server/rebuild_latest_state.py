@@ -0,0 +1,15 @@
+"""Regenerate the agent latest-state table from the record history."""
+
+from .app import create_app
+from .services.data_service import DataService
+
+
+def rebuild_latest_state() -> None:
+    app = create_app()
+    with app.app_context():
+        count = DataService().rebuild_latest_state()
+    print(f"Rebuilt latest state for {count} agents")
+
+
+if __name__ == "__main__":  # pragma: no cover - script entry
+    rebuild_latest_state()
@@ -1,4 +1,19 @@
+from .agent_registry import AgentRegistry
 from .agent_service import AgentService
 from .data_service import DataService
+from .ingest_queue import IngestQueue
+from .aggregate_cache import AggregateCache
+from .broadcaster import EventBroadcaster
+from .search_index import AgentSearchIndex
+from .suggest_index import SuggestIndex
 
-__all__ = ["AgentService", "DataService"]
+__all__ = [
+    "AgentRegistry",
+    "AgentService",
+    "DataService",
+    "IngestQueue",
+    "AggregateCache",
+    "EventBroadcaster",
+    "AgentSearchIndex",
+    "SuggestIndex",
+]
@@ -0,0 +1,135 @@
+"""Bounded in-process cache of agent identities for ingest hot paths."""
+
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import NamedTuple
+
+from flask import current_app
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
+
+from ..models import db, Agent
+
+
+class RegistryEntry(NamedTuple):
+    agent_id: str
+    pk: int
+    service_tag: str | None
+    last_seen: datetime | None
+    fingerprint: str | None
+
+
+class AgentRegistry:
+    """LRU map of ``agent_id`` to primary key, service tag and registration fingerprint.
+
+    :meth:`agents` hands out cached agents as persistent ``Agent`` instances
+    carrying only the cached columns, so updating them issues an ``UPDATE``
+    by primary key without a ``SELECT`` first. Entries are refreshed when
+    the agent registers, and ``last_seen`` is kept current by both the
+    ingest path and heartbeats. Registrations and heartbeats handled by
+    another process are not seen; a stale ``last_seen`` can only make an
+    agent look offline, which at worst reports an unchanged agent as
+    changed.
+    """
+
+    def __init__(self, capacity: int = 10000) -> None:
+        self.capacity = capacity
+        self._entries: OrderedDict[str, RegistryEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, agent_id: str) -> RegistryEntry | None:
+        with self._lock:
+            entry = self._entries.get(agent_id)
+            if entry:
+                self.hits += 1
+                self._entries.move_to_end(agent_id)
+            else:
+                self.misses += 1
+            return entry
+
+    def agents(self, agent_ids) -> dict[str, Agent]:
+        """Return the registered agents among *agent_ids*, querying only cache misses."""
+        found = {}
+        missing = []
+        for agent_id in dict.fromkeys(agent_ids):
+            entry = self.get(agent_id)
+            if entry:
+                found[agent_id] = self._attach(entry)
+            else:
+                missing.append(agent_id)
+        if missing:
+            for agent in Agent.query.filter(Agent.agent_id.in_(missing)):
+                self.remember(agent)
+                found[agent.agent_id] = agent
+        return found
+
+    def remember(self, agent: Agent) -> None:
+        self.put(
+            RegistryEntry(agent.agent_id, agent.id, agent.service_tag, agent.last_seen, agent.registration_fingerprint)
+        )
+
+    def put(self, entry: RegistryEntry) -> None:
+        with self._lock:
+            self._remove(entry.agent_id)
+            self._entries[entry.agent_id] = entry
+            while len(self._entries) > self.capacity:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def touch(self, agent_ids, last_seen: datetime) -> None:
+        """Record that *agent_ids* reported at *last_seen*."""
+        with self._lock:
+            for agent_id in agent_ids:
+                entry = self._entries.get(agent_id)
+                if entry:
+                    self._entries[agent_id] = entry._replace(last_seen=last_seen)
+
+    def invalidate(self, agent_id: str) -> None:
+        with self._lock:
+            self._remove(agent_id)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "capacity": self.capacity,
+                "evictions": self.evictions,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    # Signal receivers -------------------------------------------------
+    def on_agent_registered(self, _sender, agent, **_kwargs) -> None:
+        self.remember(agent)
+
+    def _remove(self, agent_id: str) -> None:
+        self._entries.pop(agent_id, None)
+
+    @staticmethod
+    def _attach(entry: RegistryEntry) -> Agent:
+        agent = db.session.identity_map.get(identity_key(Agent, entry.pk))
+        if agent is None:
+            agent = Agent(
+                id=entry.pk,
+                agent_id=entry.agent_id,
+                service_tag=entry.service_tag,
+                last_seen=entry.last_seen,
+                registration_fingerprint=entry.fingerprint,
+            )
+            make_transient_to_detached(agent)
+            db.session.add(agent)
+        return agent
+
+
+def load_agents(agent_ids) -> dict[str, Agent]:
+    """Return registered agents by ``agent_id`` through the app's registry, if any."""
+    registry = current_app.extensions.get('agent_registry')
+    if registry is None:
+        return {a.agent_id: a for a in Agent.query.filter(Agent.agent_id.in_(list(agent_ids)))}
+    return registry.agents(agent_ids)
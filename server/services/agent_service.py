@@ -1,37 +1,137 @@
+import hashlib
+import json
 from datetime import datetime
-from ..models import db, Agent
+from flask import current_app
+from sqlalchemy.orm import load_only
+from ..models import db, Agent, AgentRegistrationChange, ChangeSequence
+from ..models.change_sequence import AGENT_CHANGES
+from .agent_registry import load_agents
+from .events import agent_registered
+from .pagination import ListOptions, paginate
+
+# Agent columns set by a registration and the payload key of each; the IP
+# address is taken from the request.
+REGISTRATION_FIELDS = {
+    "hostname": "hostname",
+    "operating_system": "os",
+    "service_tag": "service_tag",
+    "serial_number": "serial_number",
+    "manufacturer": "manufacturer",
+    "model": "model",
+    "detection_method": "detection_method",
+}
+
+# Agent columns returned by search, selectable with ``fields=``.
+SEARCH_FIELDS = {
+    "agent_id": Agent.agent_id,
+    "hostname": Agent.hostname,
+    "service_tag": Agent.service_tag,
+    "serial_number": Agent.serial_number,
+    "manufacturer": Agent.manufacturer,
+    "model": Agent.model,
+}
+
+# ``relevance`` is added per query by :meth:`AgentService.search`.
+SEARCH_SORTS = {
+    "relevance": None,
+    "id": Agent.id,
+    "agent_id": Agent.agent_id,
+    "hostname": db.func.coalesce(Agent.hostname, ""),
+    "service_tag": db.func.coalesce(Agent.service_tag, ""),
+    "model": db.func.coalesce(Agent.model, ""),
+}
 
 
 class AgentService:
     """Business logic related to agents."""
 
     def register_agent(self, data, ip_address: str) -> Agent:
-        agent = Agent.query.filter_by(agent_id=data['agent_id']).first()
+        """Create or update the agent described by *data*.
+
+        A registration whose fingerprint matches the stored one only counts
+        as a heartbeat and writes nothing; changed fields of a known agent
+        are recorded as :class:`AgentRegistrationChange` rows.
+        """
+        values = {column: data.get(key) for column, key in REGISTRATION_FIELDS.items()}
+        values['ip_address'] = ip_address
+        fingerprint = self._fingerprint(values)
+        agent = load_agents([data['agent_id']]).get(data['agent_id'])
+        heartbeats = current_app.extensions.get('heartbeats')
+        if agent and agent.registration_fingerprint == fingerprint and heartbeats is not None:
+            if not heartbeats.beat([agent.agent_id]):
+                return agent
+        now = datetime.utcnow()
         if not agent:
             agent = Agent(agent_id=data['agent_id'])
             db.session.add(agent)
-        agent.hostname = data.get('hostname')
-        agent.ip_address = ip_address
-        agent.operating_system = data.get('os')
-        agent.last_seen = datetime.utcnow()
-        agent.service_tag = data.get('service_tag')
-        agent.serial_number = data.get('serial_number')
-        agent.manufacturer = data.get('manufacturer')
-        agent.model = data.get('model')
-        agent.detection_method = data.get('detection_method')
+        else:
+            self._record_changes(agent, values, now)
+        for column, value in values.items():
+            setattr(agent, column, value)
+        agent.registration_fingerprint = fingerprint
+        agent.last_seen = now
+        agent.change_seq = ChangeSequence.advance(AGENT_CHANGES)
         db.session.commit()
+        agent_registered.send(current_app._get_current_object(), agent=agent)
         return agent
 
+    @staticmethod
+    def _fingerprint(values: dict) -> str:
+        encoded = json.dumps(values, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _record_changes(agent: Agent, values: dict, now: datetime) -> None:
+        for column, value in values.items():
+            old = getattr(agent, column)
+            if old != value:
+                db.session.add(
+                    AgentRegistrationChange(
+                        agent_id=agent.agent_id, field=column, old_value=old, new_value=value, changed_at=now
+                    )
+                )
+
+    def get_registration_changes(self, agent_id: str) -> list[AgentRegistrationChange]:
+        """Return the recorded registration changes of *agent_id*, newest first."""
+        return (
+            AgentRegistrationChange.query.filter_by(agent_id=agent_id)
+            .order_by(AgentRegistrationChange.changed_at.desc(), AgentRegistrationChange.id.desc())
+            .all()
+        )
+
     def get_by_service_tag(self, service_tag: str) -> Agent | None:
         return Agent.query.filter_by(service_tag=service_tag).first()
 
-    def search(self, query: str) -> list[Agent]:
+    def search(self, query: str, options: ListOptions | None = None) -> tuple[list[Agent], str | None]:
+        """Return one page of agents matching *query* and the next page cursor.
+
+        Matches are found through the trigram full-text index when it is
+        available and otherwise with ``ILIKE``. The ``relevance`` sort puts
+        hostnames and service tags starting with *query* first, then orders
+        full-text matches by bm25 rank. Only the columns in
+        ``options.fields`` are loaded.
+        """
+        options = options or ListOptions(sort="relevance")
         pattern = f"%{query.replace('*', '%')}%"
-        return Agent.query.filter(
-            db.or_(
-                Agent.hostname.ilike(pattern),
-                Agent.service_tag.ilike(pattern),
-                Agent.serial_number.ilike(pattern),
-                Agent.model.ilike(pattern),
-            )
-        ).all()
+        substring = db.or_(
+            Agent.hostname.ilike(pattern),
+            Agent.service_tag.ilike(pattern),
+            Agent.serial_number.ilike(pattern),
+            Agent.model.ilike(pattern),
+        )
+        prefix = f"{query.split('*', 1)[0]}%"
+        boost = db.case((db.or_(Agent.hostname.ilike(prefix), Agent.service_tag.ilike(prefix)), -1000.0), else_=0.0)
+        index = current_app.extensions.get('agent_search_index')
+        expression = index.match_expression(query) if index and index.enabled else None
+        if expression:
+            matches = index.matches(expression)
+            agents = Agent.query.join(matches, matches.c.agent_pk == Agent.id)
+            if '*' in query:
+                agents = agents.filter(substring)
+            relevance = boost + matches.c.score
+        else:
+            agents = Agent.query.filter(substring)
+            relevance = boost
+        fields = options.fields or list(SEARCH_FIELDS)
+        agents = agents.options(load_only(Agent.id, *(SEARCH_FIELDS[name] for name in fields)))
+        return paginate(agents, options, {**SEARCH_SORTS, "relevance": relevance}, Agent.id)
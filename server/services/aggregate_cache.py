@@ -0,0 +1,65 @@
+"""In-memory cache for dashboard aggregate responses."""
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+
+@dataclass
+class CacheEntry:
+    body: bytes
+    etag: str
+    expires_at: float
+
+
+class AggregateCache:
+    """TTL cache of serialised aggregate results keyed by name.
+
+    Entries are dropped on :meth:`invalidate`, which the application wires
+    to agent registrations, so cached aggregates never outlive a write by
+    more than the time it takes to recompute them.
+    """
+
+    def __init__(self, ttl: float = 30.0) -> None:
+        self.ttl = ttl
+        self._entries: dict[str, CacheEntry] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key: str, compute: Callable[[], dict]) -> CacheEntry:
+        """Return the cached entry for *key*, computing it on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry.expires_at > time.monotonic():
+                self.hits += 1
+                return entry
+            self.misses += 1
+            body = json.dumps(compute(), sort_keys=True).encode('utf-8')
+            entry = CacheEntry(
+                body=body,
+                etag=hashlib.sha1(body).hexdigest(),
+                expires_at=time.monotonic() + self.ttl,
+            )
+            self._entries[key] = entry
+            return entry
+
+    def invalidate(self, *_args, **_kwargs) -> None:
+        """Drop every cached entry; accepts and ignores signal arguments."""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def metrics(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "invalidations": self.invalidations,
+            "entries": len(self._entries),
+            "ttl": self.ttl,
+        }
@@ -0,0 +1,72 @@
+"""Fan-out of live agent events to Server-Sent Events subscribers."""
+
+import json
+import queue
+import threading
+
+
+class Subscription:
+    """Bounded event queue of a single stream client."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self.closed = False
+
+    def get(self, timeout: float) -> tuple[str, str] | None:
+        """Return the next ``(event, data)`` pair or ``None`` on timeout."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventBroadcaster:
+    """Publish events to every subscriber without ever blocking the publisher.
+
+    Each subscriber has a bounded queue; a subscriber whose queue is full is
+    considered too slow and is disconnected so ingest never waits on it.
+    """
+
+    def __init__(self, queue_size: int = 100) -> None:
+        self.queue_size = queue_size
+        self._subscribers: set[Subscription] = set()
+        self._lock = threading.Lock()
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscription.closed = True
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event: str, data: dict) -> None:
+        message = (event, json.dumps(data))
+        with self._lock:
+            subscribers = list(self._subscribers)
+        self.published += 1
+        for subscription in subscribers:
+            try:
+                subscription.queue.put_nowait(message)
+            except queue.Full:
+                self.dropped += 1
+                self.unsubscribe(subscription)
+
+    # Signal receivers -------------------------------------------------
+    def on_agent_registered(self, _sender, agent, **_kwargs) -> None:
+        self.publish("agent-registered", {"agent_id": agent.agent_id})
+
+    def on_monitoring_data(self, _sender, agent_ids, changed, **_kwargs) -> None:
+        self.publish("monitoring-data", {"agent_ids": agent_ids, "changed": changed})
+
+    def on_status_changed(self, _sender, agent_id, online, **_kwargs) -> None:
+        self.publish("status", {"agent_id": agent_id, "online": online})
@@ -1,80 +1,467 @@
-from datetime import datetime
-from ..models import db, Agent, OfficeRecord, CadRecord, BackupRecord
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Iterator
+from flask import current_app
+from sqlalchemy.orm import aliased, load_only
+from ..models import db, Agent, OfficeRecord, CadRecord, BackupRecord, AgentLatestState, ChangeSequence
+from ..models.change_sequence import AGENT_CHANGES
+from .agent_registry import load_agents
+from .events import monitoring_data_stored
+from .pagination import ListOptions, paginate
+
+# Agents that reported within this window are considered online.
+ONLINE_WINDOW = timedelta(minutes=5)
+
+# History fields selectable with ``fields=``: the Agent columns each one
+# needs and how it is rendered from an agent, its latest state and "now".
+HISTORY_FIELDS = {
+    "agent_id": ((Agent.agent_id,), lambda agent, state, now: agent.agent_id),
+    "hostname": ((Agent.hostname,), lambda agent, state, now: agent.hostname),
+    "ip_address": ((Agent.ip_address,), lambda agent, state, now: agent.ip_address),
+    "operating_system": ((Agent.operating_system,), lambda agent, state, now: agent.operating_system),
+    "last_seen": ((Agent.last_seen,), lambda agent, state, now: DataService._isoformat(agent.last_seen)),
+    "registered_at": ((Agent.last_seen,), lambda agent, state, now: DataService._isoformat(agent.last_seen)),
+    "online": ((Agent.last_seen,), lambda agent, state, now: DataService._is_online(agent.last_seen, now)),
+    "office": ((), lambda agent, state, now: DataService._office_to_dict(state)),
+    "backup": ((), lambda agent, state, now: DataService._backup_to_dict(state)),
+}
+STATE_FIELDS = {"office", "backup"}
+
+# Payload sections agents may send as ``{"unchanged": true, "hash": ...}``
+# and the stored hash of their content each reference is checked against.
+REFERENCE_HASHES = {
+    "software": AgentLatestState.software_hash,
+    "backup": AgentLatestState.backup_hash,
+}
+
+# Sort keys accepted by ``sort=``; nullable columns are coalesced so that
+# keyset comparisons never meet a NULL.
+HISTORY_SORTS = {
+    "id": Agent.id,
+    "agent_id": Agent.agent_id,
+    "hostname": db.func.coalesce(Agent.hostname, ""),
+    "last_seen": db.func.coalesce(Agent.last_seen, datetime(1970, 1, 1)),
+}
 
 
 class DataService:
     """Persist monitoring data received from agents."""
 
-    def store_monitoring_data(self, agent_id: str, payload: dict) -> None:
-        agent = Agent.query.filter_by(agent_id=agent_id).first()
+    def store_monitoring_data(self, agent_id: str, payload: dict) -> list[str]:
+        """Persist *payload* and return the sections the agent must send in full again."""
+        agent = load_agents([agent_id]).get(agent_id)
         if not agent:
+            return []
+        now = datetime.utcnow()
+        state = db.session.get(AgentLatestState, agent_id)
+        if not state:
+            state = AgentLatestState(agent_id=agent_id)
+            db.session.add(state)
+        resend = self._stale_references(payload, state)
+        office_values, backup_values, changed = self._ingest(agent, state, payload, now)
+        changed_states = {}
+        if changed:
+            agent.change_seq = ChangeSequence.advance(AGENT_CHANGES)
+            changed_states[agent_id] = self._state_to_dict(state)
+        if office_values:
+            db.session.add(OfficeRecord(**office_values))
+        if backup_values:
+            db.session.add(BackupRecord(**backup_values))
+        db.session.commit()
+        self._touch([agent_id], now)
+        self._notify([agent_id], changed_states)
+        return resend
+
+    def stale_references(self, agent_id: str, payload: dict) -> list[str]:
+        """Return the sections *payload* references by a hash the server does not hold.
+
+        Agents sending such a reference are asked to send the section in
+        full, since the content it stands for was never stored or is gone.
+        """
+        if not any(self._is_reference(payload.get(name)) for name in REFERENCE_HASHES):
+            return []
+        stored = (
+            db.session.query(*REFERENCE_HASHES.values())
+            .filter(AgentLatestState.agent_id == agent_id)
+            .first()
+        )
+        return self._stale_references(payload, stored)
+
+    def store_monitoring_batch(self, payloads: list[dict | None]) -> list[dict]:
+        """Persist many monitoring payloads with a single commit.
+
+        Agents and their latest state are resolved with one ``IN`` query
+        each and records are written with bulk inserts. Returns a status
+        entry per payload in input order, listing under ``resend`` the
+        sections whose hash reference did not match the stored content.
+        """
+        errors = [self.payload_error(p) for p in payloads]
+        agent_ids = {p['system']['agent_id'] for p, error in zip(payloads, errors) if error is None}
+        agents = {}
+        states = {}
+        if agent_ids:
+            agents = load_agents(agent_ids)
+            states = {
+                s.agent_id: s
+                for s in AgentLatestState.query.filter(AgentLatestState.agent_id.in_(agent_ids))
+            }
+        now = datetime.utcnow()
+        office_rows: list[dict] = []
+        backup_rows: list[dict] = []
+        results: list[dict] = []
+        changed_agents: list[Agent] = []
+        for index, payload in enumerate(payloads):
+            if errors[index]:
+                results.append({"index": index, "status": "invalid", "error": errors[index]})
+                continue
+            agent_id = payload['system']['agent_id']
+            agent = agents.get(agent_id)
+            if not agent:
+                results.append({"index": index, "agent_id": agent_id, "status": "unknown_agent"})
+                continue
+            state = states.get(agent_id)
+            if not state:
+                state = states[agent_id] = AgentLatestState(agent_id=agent_id)
+                db.session.add(state)
+            resend = self._stale_references(payload, state)
+            office_values, backup_values, changed = self._ingest(agent, state, payload, now)
+            if changed:
+                changed_agents.append(agent)
+            if office_values:
+                office_rows.append(office_values)
+            if backup_values:
+                backup_rows.append(backup_values)
+            result = {"index": index, "agent_id": agent_id, "status": "ok"}
+            if resend:
+                result["resend"] = resend
+            results.append(result)
+        changed_states = {agent.agent_id: self._state_to_dict(states[agent.agent_id]) for agent in changed_agents}
+        if changed_agents:
+            change_seq = ChangeSequence.advance(AGENT_CHANGES)
+            for agent in changed_agents:
+                agent.change_seq = change_seq
+        if office_rows:
+            db.session.execute(db.insert(OfficeRecord), office_rows)
+        if backup_rows:
+            db.session.execute(db.insert(BackupRecord), backup_rows)
+        db.session.commit()
+        stored = sorted({r["agent_id"] for r in results if r["status"] == "ok"})
+        self._touch(stored, now)
+        self._notify(stored, changed_states)
+        return results
+
+    @staticmethod
+    def _touch(agent_ids: list[str], now: datetime) -> None:
+        registry = current_app.extensions.get('agent_registry')
+        if registry is not None:
+            registry.touch(agent_ids, now)
+
+    @staticmethod
+    def _notify(agent_ids: list[str], changed_states: dict[str, dict]) -> None:
+        """Emit ingest signals once the data is committed.
+
+        *changed_states* maps each changed agent to its latest office and
+        backup state, captured before the commit expired the objects.
+        """
+        if not agent_ids:
             return
-        agent.last_seen = datetime.utcnow()
-        office = payload.get('software', {}).get('office', {})
+        app = current_app._get_current_object()
+        monitoring_data_stored.send(app, agent_ids=agent_ids, changed=sorted(changed_states), states=changed_states)
+
+    def _ingest(
+        self, agent: Agent, state: AgentLatestState, payload: dict, now: datetime
+    ) -> tuple[dict | None, dict | None, bool]:
+        """Update *agent* and *state* from *payload* and return record values.
+
+        The last element tells whether the change is visible to the dashboard:
+        the latest state changed or the agent came back online.
+
+        Records are stamped with the payload's ``collected_at`` so payloads
+        replayed from an agent's offline spool keep their original time.
+        Sections the agent reports as unchanged, or whose content hash
+        matches the latest stored record, only bump ``last_seen`` and do not
+        produce a new history record. Sections older than the latest state
+        are stored as history without replacing it.
+
+        The hashes later references are checked against are taken over the
+        whole section, exactly as the agent computes them.
+        """
+        recorded_at = min(self._parse_timestamp(payload.get('collected_at')) or now, now)
+        changed = not self._is_online(agent.last_seen, now)
+        agent.last_seen = now
+        latest = state.updated_at is None or recorded_at >= state.updated_at
+        state.updated_at = max(state.updated_at or recorded_at, recorded_at)
+        office_values = None
+        software = payload.get('software', {})
+        if software and not software.get('unchanged') and latest:
+            state.software_hash = self._content_hash(software)
+        office = software.get('office', {})
         if office:
-            record = OfficeRecord(
-                agent_id=agent_id,
-                is_installed=office.get('installed', False),
-                version=office.get('version'),
-                activation_status=office.get('activation_status'),
-            )
-            db.session.add(record)
+            office_hash = self._content_hash(office)
+            newer = state.office_recorded_at is None or recorded_at >= state.office_recorded_at
+            if not newer or office_hash != state.office_hash:
+                office_values = {
+                    'agent_id': agent.agent_id,
+                    'is_installed': office.get('installed', False),
+                    'version': office.get('version'),
+                    'activation_status': office.get('activation_status'),
+                    'recorded_at': recorded_at,
+                }
+            if newer and office_values:
+                self._apply_office(state, office_values)
+                state.office_hash = office_hash
+                changed = True
+        backup_values = None
         backup = payload.get('backup', {})
-        if backup:
-            record = BackupRecord(
-                agent_id=agent_id,
-                backup_status=backup.get('status'),
-                backup_location=backup.get('backup_location'),
-                versions_data=backup.get('output'),
-            )
-            db.session.add(record)
-        db.session.commit()
+        if backup and not backup.get('unchanged'):
+            backup_hash = self._content_hash(backup)
+            newer = state.backup_recorded_at is None or recorded_at >= state.backup_recorded_at
+            if not newer or backup_hash != state.backup_hash:
+                backup_values = {
+                    'agent_id': agent.agent_id,
+                    'backup_status': backup.get('status'),
+                    'backup_location': backup.get('backup_location'),
+                    'versions_data': self._versions_data(backup),
+                    'last_backup_date': self._parse_timestamp(backup.get('last_backup')),
+                    'version_count': backup.get('version_count'),
+                    'recorded_at': recorded_at,
+                }
+            if newer and backup_values:
+                self._apply_backup(state, backup_values)
+                state.backup_hash = backup_hash
+                changed = True
+        return office_values, backup_values, changed
+
+    @staticmethod
+    def _versions_data(backup: dict) -> str | None:
+        """Serialise parsed backup versions, falling back to raw output."""
+        if backup.get('versions'):
+            return json.dumps(backup['versions'])
+        return backup.get('output')
+
+    @staticmethod
+    def _parse_timestamp(value: str | None) -> datetime | None:
+        if not value:
+            return None
+        try:
+            parsed = datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            return None
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed
+
+    @staticmethod
+    def _content_hash(section: dict) -> str:
+        encoded = json.dumps(section, sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _is_reference(section) -> bool:
+        return isinstance(section, dict) and bool(section.get('unchanged'))
+
+    @classmethod
+    def _stale_references(cls, payload: dict, stored) -> list[str]:
+        """Return the referenced sections of *payload* whose hash differs from *stored*'s."""
+        return [
+            name
+            for name in REFERENCE_HASHES
+            if cls._is_reference(payload.get(name))
+            and (stored is None or payload[name].get('hash') != getattr(stored, f"{name}_hash"))
+        ]
+
+    @staticmethod
+    def payload_error(payload) -> str | None:
+        """Return why *payload* cannot be stored, or ``None`` if it can."""
+        system = payload.get('system') if isinstance(payload, dict) else None
+        agent_id = system.get('agent_id') if isinstance(system, dict) else None
+        if not agent_id:
+            return "system.agent_id is required"
+        if not isinstance(agent_id, str):
+            return "system.agent_id must be a string"
+        software = payload.get('software', {})
+        if not isinstance(software, dict):
+            return "software must be an object"
+        for name, section in (("software.office", software.get('office', {})), ("backup", payload.get('backup', {}))):
+            if not isinstance(section, dict):
+                return f"{name} must be an object"
+        return None
 
     def get_agents_history(self) -> list[dict]:
-        """Return aggregated monitoring data for all agents."""
-        agents = Agent.query.all()
-        results: list[dict] = []
-        for agent in agents:
-            office_record = (
-                OfficeRecord.query.filter_by(agent_id=agent.agent_id)
-                .order_by(OfficeRecord.recorded_at.desc())
-                .first()
+        """Return aggregated monitoring data for all agents.
+
+        Current office and backup status is read from ``AgentLatestState`` so
+        the whole history is served by a single query over O(agents) rows.
+        """
+        agents, _ = self._history_page(self._history_query(None), ListOptions(), datetime.utcnow())
+        return agents
+
+    def get_agents_changes(
+        self, since: str | None = None, options: ListOptions | None = None
+    ) -> tuple[list[dict], str, str | None]:
+        """Return agents changed after the cursor *since*, a new cursor and the next page.
+
+        The cursor combines the ``ChangeSequence`` value with the time of the
+        poll, so agents that silently went offline since the previous poll
+        are included as well. Without *since* every agent is returned.
+        *options* page, sort and project the result; clients paging through
+        a delta keep the change cursor of the first page.
+        """
+        options = options or ListOptions()
+        now = datetime.utcnow()
+        cursor = f"{ChangeSequence.current(AGENT_CHANGES)}-{int(now.replace(tzinfo=timezone.utc).timestamp())}"
+        query = self._history_query(options.fields)
+        parsed = self._parse_cursor(since)
+        if parsed:
+            seq, polled_at = parsed
+            query = query.filter(
+                db.or_(
+                    Agent.change_seq > seq,
+                    db.and_(
+                        Agent.last_seen >= polled_at - ONLINE_WINDOW,
+                        Agent.last_seen < now - ONLINE_WINDOW,
+                    ),
+                )
             )
-            backup_record = (
-                BackupRecord.query.filter_by(agent_id=agent.agent_id)
-                .order_by(BackupRecord.recorded_at.desc())
-                .first()
+        agents, next_page = self._history_page(query, options, now)
+        return agents, cursor, next_page
+
+    def iter_agents_history(self, fields: list[str] | None = None, chunk_size: int = 1000) -> Iterator[dict]:
+        """Yield every agent's history row, fetching *chunk_size* rows at a time."""
+        now = datetime.utcnow()
+        query = self._history_query(fields).order_by(Agent.id).yield_per(chunk_size)
+        for row in query:
+            yield self._history_row(row, fields, now)
+
+    @staticmethod
+    def _is_online(last_seen: datetime | None, now: datetime) -> bool:
+        return last_seen is not None and last_seen >= now - ONLINE_WINDOW
+
+    @staticmethod
+    def _parse_cursor(cursor: str | None) -> tuple[int, datetime] | None:
+        if not cursor:
+            return None
+        try:
+            seq, polled_at = cursor.split("-", 1)
+            return int(seq), datetime.fromtimestamp(int(polled_at), timezone.utc).replace(tzinfo=None)
+        except (ValueError, OverflowError, OSError):
+            raise ValueError(f"invalid cursor: {cursor!r}") from None
+
+    @staticmethod
+    def _history_query(fields: list[str] | None):
+        """Query agents, joining the latest state only when it is selected."""
+        if fields is not None and not STATE_FIELDS.intersection(fields):
+            query = db.session.query(Agent)
+        else:
+            query = db.session.query(Agent, AgentLatestState).outerjoin(
+                AgentLatestState, AgentLatestState.agent_id == Agent.agent_id
             )
-            results.append(
-                {
-                    "agent_id": agent.agent_id,
-                    "hostname": agent.hostname,
-                    "ip_address": agent.ip_address,
-                    "operating_system": agent.operating_system,
-                    "last_seen": agent.last_seen.isoformat() if agent.last_seen else None,
-                    "registered_at": agent.last_seen.isoformat() if agent.last_seen else None,
-                    "office": self._office_to_dict(office_record),
-                    "backup": self._backup_to_dict(backup_record),
-                }
+        if fields is not None:
+            columns = {column for name in fields for column in HISTORY_FIELDS[name][0]}
+            query = query.options(load_only(Agent.id, *columns))
+        return query
+
+    def _history_page(self, query, options: ListOptions, now: datetime) -> tuple[list[dict], str | None]:
+        rows, next_page = paginate(query, options, HISTORY_SORTS, Agent.id)
+        return [self._history_row(row, options.fields, now) for row in rows], next_page
+
+    @staticmethod
+    def _history_row(row, fields: list[str] | None, now: datetime) -> dict:
+        agent, state = (row, None) if isinstance(row, Agent) else row
+        return {name: HISTORY_FIELDS[name][1](agent, state, now) for name in fields or HISTORY_FIELDS}
+
+    @staticmethod
+    def _isoformat(value: datetime | None) -> str | None:
+        return value.isoformat() if value else None
+
+    def rebuild_latest_state(self) -> int:
+        """Regenerate ``AgentLatestState`` from the record history.
+
+        Returns the number of agents whose state was rebuilt.
+        """
+        office_record = self._latest_record(OfficeRecord)
+        backup_record = self._latest_record(BackupRecord)
+        rows = (
+            db.session.query(Agent.agent_id, office_record, backup_record)
+            .outerjoin(office_record, office_record.agent_id == Agent.agent_id)
+            .outerjoin(backup_record, backup_record.agent_id == Agent.agent_id)
+            .all()
+        )
+        AgentLatestState.query.delete()
+        count = 0
+        for agent_id, office, backup in rows:
+            if not office and not backup:
+                continue
+            state = AgentLatestState(agent_id=agent_id)
+            if office:
+                self._apply_office(state, self._record_values(office))
+            if backup:
+                self._apply_backup(state, self._record_values(backup))
+            state.updated_at = max(
+                filter(None, (state.office_recorded_at, state.backup_recorded_at)),
+                default=None,
             )
-        return results
+            db.session.add(state)
+            count += 1
+        db.session.commit()
+        return count
+
+    @staticmethod
+    def _latest_record(model):
+        """Return an alias of *model* restricted to the newest row per agent."""
+        rank = db.func.row_number().over(
+            partition_by=model.agent_id,
+            order_by=(model.recorded_at.desc(), model.id.desc()),
+        )
+        ranked = db.session.query(model, rank.label("rank")).subquery()
+        latest = (
+            db.session.query(aliased(model, ranked))
+            .filter(ranked.c.rank == 1)
+            .subquery()
+        )
+        return aliased(model, latest)
+
+    @staticmethod
+    def _record_values(record) -> dict:
+        return {c.name: getattr(record, c.name) for c in record.__table__.columns}
+
+    @staticmethod
+    def _apply_office(state: AgentLatestState, values: dict) -> None:
+        state.office_installed = values.get('is_installed')
+        state.office_version = values.get('version')
+        state.office_activation_status = values.get('activation_status')
+        state.office_recorded_at = values.get('recorded_at')
+
+    @staticmethod
+    def _apply_backup(state: AgentLatestState, values: dict) -> None:
+        state.backup_status = values.get('backup_status')
+        state.backup_location = values.get('backup_location')
+        state.last_backup_date = values.get('last_backup_date')
+        state.backup_version_count = values.get('version_count')
+        state.backup_recorded_at = values.get('recorded_at')
+
+    @classmethod
+    def _state_to_dict(cls, state: AgentLatestState | None) -> dict:
+        return {"office": cls._office_to_dict(state), "backup": cls._backup_to_dict(state)}
 
     @staticmethod
-    def _office_to_dict(record: OfficeRecord | None) -> dict | None:
-        if not record:
+    def _office_to_dict(state: AgentLatestState | None) -> dict | None:
+        if not state or state.office_recorded_at is None:
             return None
         return {
-            "installed": record.is_installed,
-            "version": record.version,
-            "activation_status": record.activation_status,
+            "installed": state.office_installed,
+            "version": state.office_version,
+            "activation_status": state.office_activation_status,
         }
 
     @staticmethod
-    def _backup_to_dict(record: BackupRecord | None) -> dict | None:
-        if not record:
+    def _backup_to_dict(state: AgentLatestState | None) -> dict | None:
+        if not state or state.backup_recorded_at is None:
             return None
         return {
-            "status": record.backup_status,
-            "location": record.backup_location,
-            "last_backup": record.last_backup_date.isoformat() if record.last_backup_date else None,
+            "status": state.backup_status,
+            "location": state.backup_location,
+            "last_backup": state.last_backup_date.isoformat() if state.last_backup_date else None,
+            "version_count": state.backup_version_count,
         }
@@ -0,0 +1,20 @@
+"""Signals emitted by the service layer.
+
+Receivers subscribe per application, e.g.
+``agent_registered.connect(receiver, sender=app)``; signals are sent with
+the current Flask application as sender.
+"""
+from blinker import Namespace
+
+_signals = Namespace()
+
+#: Sent after an agent registration was committed, with ``agent=Agent``.
+agent_registered = _signals.signal("agent-registered")
+
+#: Sent after monitoring data was committed, with ``agent_ids`` (every agent
+#: that reported), ``changed`` (those whose dashboard-visible state changed)
+#: and ``states`` (the ``{"office", "backup"}`` state of each changed agent).
+monitoring_data_stored = _signals.signal("monitoring-data-stored")
+
+#: Sent when an agent goes online or offline, with ``agent_id`` and ``online``.
+agent_status_changed = _signals.signal("agent-status-changed")
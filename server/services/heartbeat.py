@@ -0,0 +1,141 @@
+"""In-memory heartbeat buffer flushed to ``Agent.last_seen`` in bulk."""
+
+import logging
+import threading
+from datetime import datetime
+
+from ..models import db, Agent, ChangeSequence
+from ..models.change_sequence import AGENT_CHANGES
+from .agent_registry import AgentRegistry
+from .liveness import LivenessTracker
+
+logger = logging.getLogger(__name__)
+
+
+class HeartbeatBuffer:
+    """Accept agent heartbeats without a database round trip per request.
+
+    A heartbeat refreshes the agent's deadline in the liveness tracker at
+    once and records its time in a map; the map is written to
+    ``Agent.last_seen`` every ``flush_interval`` seconds with one bulk
+    ``UPDATE`` per ``batch_size`` agents. The column may therefore lag a
+    heartbeat by up to one interval, which is far below the online window.
+    The agent registry's ``last_seen`` is refreshed at once as well, so a
+    report following a heartbeat does not see the agent as coming back.
+
+    An agent that comes back online through a heartbeat is flushed at once
+    and stamped with a new ``change_seq``, so the history delta shows it
+    online; this write needs an app context.
+    """
+
+    def __init__(
+        self,
+        app,
+        liveness: LivenessTracker,
+        flush_interval: float = 30.0,
+        batch_size: int = 1000,
+        registry: AgentRegistry | None = None,
+    ) -> None:
+        self.app = app
+        self.liveness = liveness
+        self.registry = registry
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._last_seen: dict[str, datetime] = {}
+        self._came_online: set[str] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._received = 0
+        self._unknown = 0
+        self._written = 0
+        self._flushes = 0
+
+    def beat(self, agent_ids, now: datetime | None = None) -> list[str]:
+        """Record heartbeats from *agent_ids*; returns the unregistered ones."""
+        now = now or datetime.utcnow()
+        agent_ids = list(dict.fromkeys(agent_ids))
+        known = self.liveness.known(agent_ids)
+        came_online = self.liveness.seen(known, now)
+        if self.registry is not None:
+            self.registry.touch(known, now)
+        with self._lock:
+            for agent_id in known:
+                self._last_seen[agent_id] = now
+            self._came_online.update(came_online)
+            self._received += len(known)
+            self._unknown += len(agent_ids) - len(known)
+        if came_online:
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Heartbeat flush of agents back online failed")
+        accepted = set(known)
+        return [a for a in agent_ids if a not in accepted]
+
+    def flush(self) -> int:
+        """Write buffered heartbeats; requires an app context."""
+        with self._lock:
+            pending, self._last_seen = self._last_seen, {}
+            came_online, self._came_online = self._came_online, set()
+        if not pending:
+            return 0
+        # Never move last_seen backwards past a monitoring report stored meanwhile.
+        statement = (
+            db.update(Agent)
+            .where(Agent.agent_id == db.bindparam("b_agent_id"))
+            .where(db.or_(Agent.last_seen.is_(None), Agent.last_seen < db.bindparam("b_last_seen")))
+            .values(last_seen=db.bindparam("b_last_seen"))
+        )
+        rows = [{"b_agent_id": agent_id, "b_last_seen": seen} for agent_id, seen in pending.items()]
+        try:
+            for start in range(0, len(rows), self.batch_size):
+                db.session.connection().execute(statement, rows[start:start + self.batch_size])
+            if came_online:
+                db.session.execute(
+                    db.update(Agent)
+                    .where(Agent.agent_id.in_(came_online))
+                    .values(change_seq=ChangeSequence.advance(AGENT_CHANGES))
+                )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            with self._lock:
+                for agent_id, seen in pending.items():
+                    if self._last_seen.get(agent_id, seen) <= seen:
+                        self._last_seen[agent_id] = seen
+                self._came_online |= came_online
+            raise
+        self._written += len(rows)
+        self._flushes += 1
+        return len(rows)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "buffered": len(self._last_seen),
+                "received": self._received,
+                "unknown": self._unknown,
+                "written": self._written,
+                "flushes": self._flushes,
+            }
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="heartbeat-flush", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        try:
+            with self.app.app_context():
+                self.flush()
+        except Exception:
+            logger.exception("Final heartbeat flush failed")
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                with self.app.app_context():
+                    self.flush()
+            except Exception:
+                logger.exception("Heartbeat flush failed")
@@ -0,0 +1,188 @@
+"""Write-behind queue decoupling monitoring-data requests from DB commits."""
+
+import logging
+import queue
+import threading
+import time
+
+from ..models import db
+from .data_service import DataService
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+_FLUSH = object()
+
+
+class IngestQueue:
+    """Bounded in-process queue drained into the database in micro-batches.
+
+    Payloads are accepted with :meth:`put` and written by a background
+    thread once ``batch_size`` payloads are waiting or ``flush_interval``
+    seconds have passed since the first one arrived.
+    """
+
+    def __init__(
+        self,
+        app,
+        data_service: DataService | None = None,
+        capacity: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+    ) -> None:
+        self.app = app
+        self.data_service = data_service or DataService()
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue(maxsize=capacity)
+        self._write_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._enqueued = 0
+        self._rejected = 0
+        self._written = 0
+        self._failed = 0
+        self._flushes = 0
+        self._last_flush_ms = 0.0
+        self._max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    def put(self, payload: dict) -> bool:
+        """Queue *payload* for writing; return ``False`` when the queue is full."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(payload)
+        except queue.Full:
+            with self._metrics_lock:
+                self._rejected += 1
+            return False
+        with self._metrics_lock:
+            self._enqueued += 1
+        return True
+
+    def flush(self) -> None:
+        """Write every queued payload and wait for in-flight batches."""
+        if self._thread and self._thread.is_alive():
+            self._queue.put(_FLUSH)
+        else:
+            while True:
+                batch = self._drain(self.batch_size)
+                if not batch:
+                    break
+                self._write(batch)
+        self._queue.join()
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Stop the writer thread and flush whatever is still queued."""
+        self._stopping.set()
+        if self._thread and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout=timeout)
+        self.flush()
+
+    def metrics(self) -> dict:
+        with self._metrics_lock:
+            return {
+                "depth": self._queue.qsize(),
+                "capacity": self.capacity,
+                "enqueued": self._enqueued,
+                "rejected": self._rejected,
+                "written": self._written,
+                "failed": self._failed,
+                "flushes": self._flushes,
+                "last_flush_ms": round(self._last_flush_ms, 3),
+                "max_flush_ms": round(self._max_flush_ms, 3),
+                "avg_flush_ms": round(self._total_flush_ms / self._flushes, 3) if self._flushes else 0.0,
+            }
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None or self._stopping.is_set():
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="ingest-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                self._queue.task_done()
+                return
+            if first is _FLUSH:
+                self._queue.task_done()
+                continue
+            batch = [first]
+            stop = False
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP or item is _FLUSH:
+                    self._queue.task_done()
+                    stop = item is _STOP
+                    break
+                batch.append(item)
+            self._write(batch)
+            if stop:
+                return
+
+    def _drain(self, limit: int) -> list[dict]:
+        batch: list[dict] = []
+        while len(batch) < limit:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP or item is _FLUSH:
+                self._queue.task_done()
+                continue
+            batch.append(item)
+        return batch
+
+    def _write(self, batch: list[dict]) -> None:
+        """Store *batch* in one transaction, falling back to one per payload.
+
+        Payloads were already acknowledged, so one that cannot be stored
+        must not take the rest of its batch down with it.
+        """
+        began = time.perf_counter()
+        written = 0
+        try:
+            with self._write_lock, self.app.app_context():
+                try:
+                    results = self.data_service.store_monitoring_batch(batch)
+                    written = sum(r["status"] != "invalid" for r in results)
+                except Exception:
+                    db.session.rollback()
+                    logger.warning(
+                        "Failed to write %d monitoring payloads, retrying one by one", len(batch), exc_info=True
+                    )
+                    for payload in batch:
+                        try:
+                            results = self.data_service.store_monitoring_batch([payload])
+                            written += results[0]["status"] != "invalid"
+                        except Exception:
+                            db.session.rollback()
+                            logger.exception("Failed to write a monitoring payload")
+        except Exception:
+            logger.exception("Failed to write %d monitoring payloads", len(batch))
+        finally:
+            elapsed = (time.perf_counter() - began) * 1000
+            with self._metrics_lock:
+                self._written += written
+                self._failed += len(batch) - written
+                self._flushes += 1
+                self._last_flush_ms = elapsed
+                self._max_flush_ms = max(self._max_flush_ms, elapsed)
+                self._total_flush_ms += elapsed
+            for _ in batch:
+                self._queue.task_done()
@@ -0,0 +1,184 @@
+"""Online/offline tracking of agents with a hashed timer wheel."""
+
+import logging
+import math
+import threading
+from datetime import datetime, timedelta, timezone
+
+from ..models import db, Agent, AgentStatusChange
+from .events import agent_status_changed
+from .pagination import ListOptions, paginate_items
+
+logger = logging.getLogger(__name__)
+
+# Sort keys of /api/agents/offline.
+OFFLINE_SORTS = {
+    "offline_since": lambda item: item[1],
+    "agent_id": lambda item: item[0],
+}
+OFFLINE_FIELDS = {"agent_id", "offline_since"}
+
+
+def _epoch(moment: datetime) -> float:
+    return moment.replace(tzinfo=timezone.utc).timestamp()
+
+
+class LivenessTracker:
+    """Keep each agent in a timer-wheel slot keyed by its heartbeat deadline.
+
+    An agent is online until ``timeout`` passes without a report. Reports
+    move the agent to the slot of its new deadline in O(1), and each tick
+    only inspects the slots whose time has come, so the cost of a tick
+    depends on how many deadlines fall in it rather than on the fleet size.
+    Agents found in a due slot whose deadline has since moved later are
+    simply left for a later pass of the wheel.
+
+    Transitions are sent as ``agent_status_changed`` signals and stored as
+    :class:`AgentStatusChange` rows on the next tick.
+    """
+
+    def __init__(self, app, timeout: timedelta = timedelta(minutes=5), resolution: float = 1.0) -> None:
+        self.app = app
+        self.timeout = timeout.total_seconds()
+        self.resolution = resolution
+        self._slots: list[set[str]] = [set() for _ in range(math.ceil(self.timeout / resolution) + 2)]
+        self._deadlines: dict[str, float] = {}
+        self._offline: dict[str, datetime] = {}
+        self._pending: list[dict] = []
+        self._cursor: int | None = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        # Agents examined in due slots; the work done by expire().
+        self.inspected = 0
+
+    def load(self, now: datetime | None = None) -> None:
+        """Seed the wheel from ``Agent.last_seen``; requires an app context."""
+        now = now or datetime.utcnow()
+        rows = db.session.query(Agent.agent_id, Agent.last_seen).all()
+        with self._lock:
+            for agent_id, last_seen in rows:
+                if last_seen and _epoch(last_seen) + self.timeout > _epoch(now):
+                    self._schedule(agent_id, _epoch(last_seen) + self.timeout)
+                else:
+                    self._offline[agent_id] = last_seen + timedelta(seconds=self.timeout) if last_seen else now
+            self._cursor = self._tick_of(_epoch(now)) - 1
+
+    def seen(self, agent_ids, now: datetime | None = None) -> list[str]:
+        """Record reports from *agent_ids*; returns the agents that came online."""
+        now = now or datetime.utcnow()
+        deadline = _epoch(now) + self.timeout
+        came_online = []
+        with self._lock:
+            for agent_id in agent_ids:
+                if self._offline.pop(agent_id, None) is not None:
+                    came_online.append(agent_id)
+                    self._pending.append({"agent_id": agent_id, "online": True, "changed_at": now})
+                self._schedule(agent_id, deadline)
+        for agent_id in came_online:
+            agent_status_changed.send(self.app, agent_id=agent_id, online=True)
+        return came_online
+
+    def known(self, agent_ids) -> list[str]:
+        """Return those of *agent_ids* that are registered agents."""
+        with self._lock:
+            return [a for a in agent_ids if a in self._deadlines or a in self._offline]
+
+    def expire(self, now: datetime | None = None) -> list[str]:
+        """Advance the wheel to *now*; returns the agents that went offline."""
+        now = now or datetime.utcnow()
+        current = _epoch(now)
+        went_offline = []
+        with self._lock:
+            # Only ticks that have fully elapsed; the current one is still filling.
+            target = self._tick_of(current) - 1
+            start = target if self._cursor is None else self._cursor + 1
+            # A gap longer than one revolution needs each slot only once.
+            start = max(start, target - len(self._slots) + 1)
+            for tick in range(start, target + 1):
+                slot = self._slots[tick % len(self._slots)]
+                self.inspected += len(slot)
+                for agent_id in [a for a in slot if self._deadlines[a] <= current]:
+                    slot.discard(agent_id)
+                    offline_since = datetime.utcfromtimestamp(self._deadlines.pop(agent_id))
+                    self._offline[agent_id] = offline_since
+                    self._pending.append({"agent_id": agent_id, "online": False, "changed_at": offline_since})
+                    went_offline.append(agent_id)
+            self._cursor = target
+        for agent_id in went_offline:
+            agent_status_changed.send(self.app, agent_id=agent_id, online=False)
+        return went_offline
+
+    def persist(self) -> int:
+        """Store queued transitions; requires an app context.
+
+        Transitions that cannot be stored stay queued for the next call.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return 0
+        try:
+            db.session.execute(db.insert(AgentStatusChange), pending)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            with self._lock:
+                self._pending[:0] = pending
+            raise
+        return len(pending)
+
+    def offline(self, options: ListOptions | None = None) -> tuple[list[dict], str | None]:
+        """Return a page of offline agents, most recently lost first by default.
+
+        ``options.fields`` selects among ``agent_id`` and ``offline_since``.
+        """
+        options = options or ListOptions(sort="-offline_since")
+        with self._lock:
+            items = list(self._offline.items())
+        page, next_page = paginate_items(items, options, OFFLINE_SORTS, lambda item: item[0])
+        fields = options.fields or ["agent_id", "offline_since"]
+        rows = [{"agent_id": agent_id, "offline_since": since.isoformat()} for agent_id, since in page]
+        return [{name: row[name] for name in fields} for row in rows], next_page
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {"online": len(self._deadlines), "offline": len(self._offline), "pending": len(self._pending)}
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="liveness", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        try:
+            with self.app.app_context():
+                self.persist()
+        except Exception:
+            logger.exception("Final liveness persist failed")
+
+    # Signal receivers -------------------------------------------------
+    def on_agent_registered(self, _sender, agent, **_kwargs) -> None:
+        self.seen([agent.agent_id])
+
+    def on_monitoring_data(self, _sender, agent_ids, **_kwargs) -> None:
+        self.seen(agent_ids)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.resolution):
+            try:
+                self.expire()
+                with self.app.app_context():
+                    self.persist()
+            except Exception:
+                logger.exception("Liveness tick failed")
+
+    def _schedule(self, agent_id: str, deadline: float) -> None:
+        previous = self._deadlines.get(agent_id)
+        if previous is not None:
+            self._slots[self._tick_of(previous) % len(self._slots)].discard(agent_id)
+        self._deadlines[agent_id] = deadline
+        self._slots[self._tick_of(deadline) % len(self._slots)].add(agent_id)
+
+    def _tick_of(self, moment: float) -> int:
+        return int(moment // self.resolution)
@@ -0,0 +1,155 @@
+"""Keyset pagination, sorting and field selection for list endpoints."""
+
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Mapping
+
+from ..models import db
+
+
+@dataclass
+class ListOptions:
+    """Parsed ``limit``/``after``/``sort``/``fields`` query parameters.
+
+    ``limit`` of ``None`` returns every row. ``sort`` names a key of the
+    endpoint's sort map, prefixed with ``-`` for descending order. ``fields``
+    of ``None`` selects every field.
+    """
+
+    limit: int | None = None
+    after: str | None = None
+    sort: str = "id"
+    fields: list[str] | None = None
+
+    @classmethod
+    def parse(
+        cls,
+        args: Mapping[str, str],
+        sorts: Mapping,
+        fields: Mapping,
+        default_limit: int | None = None,
+        max_limit: int = 1000,
+        default_sort: str = "id",
+    ) -> "ListOptions":
+        """Build options from request *args*, raising ``ValueError`` when invalid."""
+        limit = default_limit
+        if args.get("limit"):
+            try:
+                limit = int(args["limit"])
+            except ValueError:
+                raise ValueError(f"invalid limit: {args['limit']!r}") from None
+            if limit < 1:
+                raise ValueError("limit must be positive")
+        if limit is not None:
+            limit = min(limit, max_limit)
+        sort = args.get("sort") or default_sort
+        if sort.lstrip("-") not in sorts:
+            raise ValueError(f"unknown sort {sort!r}; expected one of {', '.join(sorts)}")
+        selected = None
+        if args.get("fields"):
+            selected = [name.strip() for name in args["fields"].split(",") if name.strip()]
+            unknown = [name for name in selected if name not in fields]
+            if unknown:
+                raise ValueError(f"unknown fields: {', '.join(unknown)}")
+        return cls(limit=limit, after=args.get("after") or None, sort=sort, fields=selected)
+
+
+def paginate(query, options: ListOptions, sorts: Mapping, tiebreaker) -> tuple[list, str | None]:
+    """Apply *options* to *query* and return ``(rows, next_cursor)``.
+
+    Rows are ordered by the sort column and then by the unique *tiebreaker*
+    column, and a page starts strictly after the ``(value, tiebreaker)`` pair
+    encoded in ``options.after``. Unlike ``OFFSET`` this keeps every page an
+    index range scan however deep the client pages.
+    """
+    descending = options.sort.startswith("-")
+    column = sorts[options.sort.lstrip("-")]
+    query = query.add_columns(column.label("_sort_value"), tiebreaker.label("_sort_id"))
+    if options.after:
+        value, last_id = _decode_cursor(options.after, column)
+        if descending:
+            query = query.filter(db.or_(column < value, db.and_(column == value, tiebreaker < last_id)))
+        else:
+            query = query.filter(db.or_(column > value, db.and_(column == value, tiebreaker > last_id)))
+    if descending:
+        query = query.order_by(column.desc(), tiebreaker.desc())
+    else:
+        query = query.order_by(column, tiebreaker)
+    if options.limit is not None:
+        query = query.limit(options.limit + 1)
+    rows = query.all()
+    next_cursor = None
+    if options.limit is not None and len(rows) > options.limit:
+        rows = rows[: options.limit]
+        next_cursor = _encode_cursor(rows[-1][-2], rows[-1][-1])
+    return [row[0] if len(row) == 3 else tuple(row[:-2]) for row in rows], next_cursor
+
+
+def _encode_cursor(value, last_id) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([value, last_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def paginate_items(items: list, options: ListOptions, sorts: Mapping, tiebreaker) -> tuple[list, str | None]:
+    """In-memory counterpart of :func:`paginate` for lists kept by services.
+
+    *sorts* maps sort names to key functions of an item and *tiebreaker*
+    returns a unique, string or integer key of an item.
+    """
+    descending = options.sort.startswith("-")
+    key = sorts[options.sort.lstrip("-")]
+    ordered = sorted(items, key=lambda item: (key(item), tiebreaker(item)), reverse=descending)
+    if options.after:
+        value, last_id = _decode_pair(options.after, (int, str))
+        if ordered and isinstance(key(ordered[0]), datetime):
+            value = _parse_datetime(value, options.after)
+        bound = (value, last_id)
+
+        def follows(item) -> bool:
+            position = (key(item), tiebreaker(item))
+            return position < bound if descending else position > bound
+
+        try:
+            ordered = [item for item in ordered if follows(item)]
+        except TypeError:
+            raise ValueError(f"invalid page cursor: {options.after!r}") from None
+    next_cursor = None
+    if options.limit is not None and len(ordered) > options.limit:
+        ordered = ordered[: options.limit]
+        next_cursor = _encode_cursor(key(ordered[-1]), tiebreaker(ordered[-1]))
+    return ordered, next_cursor
+
+
+def _decode_cursor(cursor: str, column) -> tuple:
+    """Return the ``(value, tiebreaker)`` pair of *cursor*, validating its shape."""
+    value, last_id = _decode_pair(cursor, int)
+    if isinstance(column.type, db.DateTime) and value is not None:
+        value = _parse_datetime(value, cursor)
+    return value, last_id
+
+
+def _decode_pair(cursor: str, id_types) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        decoded = json.loads(raw)
+        if not isinstance(decoded, list) or len(decoded) != 2:
+            raise ValueError("cursor is not a pair")
+        value, last_id = decoded
+        if not isinstance(last_id, id_types) or isinstance(last_id, bool):
+            raise ValueError("cursor id has the wrong type")
+        if value is not None and (isinstance(value, bool) or not isinstance(value, (str, int, float))):
+            raise ValueError("cursor value is not a scalar")
+        return value, last_id
+    except (ValueError, TypeError):
+        raise ValueError(f"invalid page cursor: {cursor!r}") from None
+
+
+def _parse_datetime(value, cursor: str) -> datetime:
+    try:
+        return datetime.fromisoformat(value)
+    except (ValueError, TypeError):
+        raise ValueError(f"invalid page cursor: {cursor!r}") from None
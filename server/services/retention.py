@@ -0,0 +1,188 @@
+"""Retention and compaction of office and backup record history."""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import aliased
+
+from ..models import db, Agent, OfficeRecord, BackupRecord
+
+logger = logging.getLogger(__name__)
+
+# Columns whose values make two consecutive records identical.
+CONTENT_COLUMNS = {
+    OfficeRecord: ("is_installed", "version", "activation_status"),
+    BackupRecord: ("backup_status", "backup_location", "versions_data", "last_backup_date", "version_count"),
+}
+
+
+@dataclass
+class TableReport:
+    scanned: int = 0
+    merged: int = 0
+    expired: int = 0
+
+
+@dataclass
+class CompactionReport:
+    tables: dict[str, TableReport] = field(default_factory=dict)
+    batches: int = 0
+
+    @property
+    def deleted(self) -> int:
+        return sum(t.merged + t.expired for t in self.tables.values())
+
+    def to_dict(self) -> dict:
+        return {
+            "batches": self.batches,
+            "deleted": self.deleted,
+            "tables": {name: vars(report) for name, report in self.tables.items()},
+        }
+
+
+class HistoryCompactor:
+    """Collapse and expire old ``OfficeRecord`` and ``BackupRecord`` rows.
+
+    Records younger than ``raw_days`` are left untouched. Older runs of
+    identical consecutive records of an agent are collapsed into their first
+    record, whose ``last_seen`` then marks the end of the span. With
+    ``max_days`` set, records whose span ended before that age are deleted,
+    except each agent's newest record: unchanged sections are not recorded
+    again, so it may still describe the agent's current state.
+
+    Work is done in transactions of at most ``batch_size`` records, sleeping
+    ``pause`` seconds between them, so ingest never waits long for the
+    database write lock.
+    """
+
+    def __init__(
+        self,
+        raw_days: int = 30,
+        max_days: int | None = None,
+        batch_size: int = 1000,
+        pause: float = 0.0,
+    ) -> None:
+        self.raw_days = raw_days
+        self.max_days = max_days
+        self.batch_size = batch_size
+        self.pause = pause
+
+    def run(self, now: datetime | None = None) -> CompactionReport:
+        """Compact every table; must be called inside an application context."""
+        now = now or datetime.utcnow()
+        report = CompactionReport()
+        for model in CONTENT_COLUMNS:
+            table_report = report.tables.setdefault(model.__tablename__, TableReport())
+            if self.max_days is not None:
+                self._expire(model, now - timedelta(days=self.max_days), table_report, report)
+            cutoff = now - timedelta(days=self.raw_days)
+            for (agent_id,) in db.session.query(Agent.agent_id).order_by(Agent.id).all():
+                self._compact_agent(model, agent_id, cutoff, table_report, report)
+        return report
+
+    def _compact_agent(self, model, agent_id: str, cutoff: datetime, table_report: TableReport, report) -> None:
+        columns = [getattr(model, name) for name in CONTENT_COLUMNS[model]]
+        head = None  # (id, content, span end) of the run being collapsed
+        after = None
+        while True:
+            query = db.session.query(model.id, model.recorded_at, model.last_seen, *columns).filter(
+                model.agent_id == agent_id, model.recorded_at < cutoff
+            )
+            if after:
+                query = query.filter(
+                    db.or_(
+                        model.recorded_at > after[0],
+                        db.and_(model.recorded_at == after[0], model.id > after[1]),
+                    )
+                )
+            rows = query.order_by(model.recorded_at, model.id).limit(self.batch_size).all()
+            if not rows:
+                return
+            duplicates: list[int] = []
+            extended: dict[int, datetime] = {}
+            for record_id, recorded_at, last_seen, *content in rows:
+                span_end = last_seen or recorded_at
+                if head and head[1] == content:
+                    duplicates.append(record_id)
+                    if span_end > head[2]:
+                        head = (head[0], head[1], span_end)
+                        extended[head[0]] = span_end
+                else:
+                    head = (record_id, content, span_end)
+            if extended:
+                db.session.execute(
+                    db.update(model), [{"id": record_id, "last_seen": end} for record_id, end in extended.items()]
+                )
+            if duplicates:
+                db.session.execute(db.delete(model).where(model.id.in_(duplicates)))
+            db.session.commit()
+            table_report.scanned += len(rows)
+            table_report.merged += len(duplicates)
+            report.batches += 1
+            after = (rows[-1][1], rows[-1][0])
+            if len(rows) < self.batch_size:
+                return
+            self._yield()
+
+    def _expire(self, model, before: datetime, table_report: TableReport, report) -> None:
+        span_end = db.func.coalesce(model.last_seen, model.recorded_at)
+        newer = aliased(model)
+        has_newer = (
+            db.exists()
+            .where(newer.agent_id == model.agent_id)
+            .where(
+                db.or_(
+                    newer.recorded_at > model.recorded_at,
+                    db.and_(newer.recorded_at == model.recorded_at, newer.id > model.id),
+                )
+            )
+        )
+        while True:
+            ids = [
+                record_id
+                for (record_id,) in db.session.query(model.id)
+                .filter(span_end < before, has_newer)
+                .limit(self.batch_size)
+            ]
+            if not ids:
+                return
+            db.session.execute(db.delete(model).where(model.id.in_(ids)))
+            db.session.commit()
+            table_report.expired += len(ids)
+            report.batches += 1
+            self._yield()
+
+    def _yield(self) -> None:
+        if self.pause:
+            time.sleep(self.pause)
+
+
+class RetentionWorker:
+    """Run a :class:`HistoryCompactor` every ``interval`` seconds in the background."""
+
+    def __init__(self, app, compactor: HistoryCompactor, interval: float) -> None:
+        self.app = app
+        self.compactor = compactor
+        self.interval = interval
+        self.last_report: CompactionReport | None = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="history-retention", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                with self.app.app_context():
+                    self.last_report = self.compactor.run()
+            except Exception:
+                logger.exception("History compaction failed")
+                continue
+            logger.info("History compaction removed %d records", self.last_report.deleted)
@@ -0,0 +1,91 @@
+"""SQLite FTS5 index over the searchable agent columns."""
+
+import logging
+
+from sqlalchemy import column, select, table
+from sqlalchemy.exc import OperationalError
+
+from ..models import db
+
+logger = logging.getLogger(__name__)
+
+SEARCH_COLUMNS = ("hostname", "service_tag", "serial_number", "model")
+# bm25 weights of SEARCH_COLUMNS; identifiers outrank the model name.
+COLUMN_WEIGHTS = (10.0, 10.0, 5.0, 1.0)
+# The trigram tokenizer cannot match terms shorter than three characters.
+MIN_TERM_LENGTH = 3
+
+_COLUMNS = ", ".join(SEARCH_COLUMNS)
+_NEW_VALUES = ", ".join(f"new.{name}" for name in SEARCH_COLUMNS)
+_OLD_VALUES = ", ".join(f"old.{name}" for name in SEARCH_COLUMNS)
+
+# External-content FTS table over ``agent`` kept in sync by triggers, so
+# every write path (ORM, bulk inserts, migrations) updates the index. The
+# update trigger only fires when a searchable column is written, not on
+# the ``last_seen`` bump of every ingest.
+INDEX_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS agent_search USING fts5("
+    f"{_COLUMNS}, content='agent', content_rowid='id', tokenize='trigram')",
+    f"CREATE TRIGGER IF NOT EXISTS agent_search_ai AFTER INSERT ON agent BEGIN "
+    f"INSERT INTO agent_search(rowid, {_COLUMNS}) VALUES (new.id, {_NEW_VALUES}); END",
+    f"CREATE TRIGGER IF NOT EXISTS agent_search_ad AFTER DELETE ON agent BEGIN "
+    f"INSERT INTO agent_search(agent_search, rowid, {_COLUMNS}) VALUES ('delete', old.id, {_OLD_VALUES}); END",
+    f"CREATE TRIGGER IF NOT EXISTS agent_search_au AFTER UPDATE OF {_COLUMNS} ON agent BEGIN "
+    f"INSERT INTO agent_search(agent_search, rowid, {_COLUMNS}) VALUES ('delete', old.id, {_OLD_VALUES}); "
+    f"INSERT INTO agent_search(rowid, {_COLUMNS}) VALUES (new.id, {_NEW_VALUES}); END",
+)
+
+agent_search = table("agent_search", column("rowid"), *(column(name) for name in SEARCH_COLUMNS))
+
+
+class AgentSearchIndex:
+    """Trigram full-text index used by agent search when the database supports it.
+
+    Backends other than SQLite, or SQLite builds without FTS5 or the trigram
+    tokenizer, leave the index disabled and search falls back to ``ILIKE``.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+
+    def install(self, engine) -> bool:
+        """Create the index and its triggers, filling it on first creation."""
+        if engine.dialect.name != "sqlite":
+            return False
+        try:
+            with engine.begin() as conn:
+                exists = conn.exec_driver_sql(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'agent_search'"
+                ).first()
+                for statement in INDEX_DDL:
+                    conn.exec_driver_sql(statement)
+                if not exists:
+                    conn.exec_driver_sql("INSERT INTO agent_search(agent_search) VALUES ('rebuild')")
+        except OperationalError as exc:
+            logger.warning("Full-text agent search unavailable, using ILIKE: %s", exc)
+            return False
+        self.enabled = True
+        return True
+
+    @staticmethod
+    def match_expression(query: str) -> str | None:
+        """Translate a search query into an FTS5 expression.
+
+        ``*`` separates terms that must all occur; terms too short for the
+        trigram index are left to the caller's ``ILIKE`` check. Returns
+        ``None`` when no term can use the index.
+        """
+        terms = [term for term in query.split("*") if len(term) >= MIN_TERM_LENGTH]
+        if not terms:
+            return None
+        return " AND ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+    @staticmethod
+    def matches(expression: str):
+        """Return a subquery of matching ``agent_pk`` values and their bm25 ``score``."""
+        score = db.func.bm25(db.literal_column("agent_search"), *COLUMN_WEIGHTS)
+        return (
+            select(agent_search.c.rowid.label("agent_pk"), score.label("score"))
+            .where(db.literal_column("agent_search").op("MATCH")(expression))
+            .subquery()
+        )
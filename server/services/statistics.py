@@ -0,0 +1,183 @@
+"""Fleet statistics kept up to date incrementally from service signals."""
+
+import logging
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import NamedTuple
+
+from ..models import db, Agent, AgentLatestState
+from .data_service import DataService
+
+logger = logging.getLogger(__name__)
+
+DIMENSIONS = ("manufacturers", "models", "detection", "office", "office_activation", "backup", "status")
+
+
+class AgentBuckets(NamedTuple):
+    """The bucket an agent counts towards in each of :data:`DIMENSIONS`."""
+
+    manufacturer: str = "Unknown"
+    model: str = "Unknown"
+    detection: str = "failed"
+    office: str = "unknown"
+    office_activation: str = "unknown"
+    backup: str = "unknown"
+    status: str = "offline"
+
+
+class FleetStatistics:
+    """Per-bucket agent counters served without touching the database.
+
+    Each agent's buckets are remembered so an update only moves that agent
+    from its old buckets to its new ones; reading the statistics costs
+    O(buckets) however large the fleet is. :meth:`reconcile` recomputes
+    everything from the database to correct any drift, e.g. agents that
+    went offline while nobody was watching. Updates arriving while the
+    reconcile query runs are replayed onto its result.
+    """
+
+    def __init__(self) -> None:
+        self._agents: dict[str, AgentBuckets] = {}
+        self._counters: dict[str, Counter] = {name: Counter() for name in DIMENSIONS}
+        self._lock = threading.Lock()
+        self._reconcile_lock = threading.Lock()
+        # Updates applied since the running reconcile started, or None.
+        self._replay: list[tuple] | None = None
+        self.reconciled_at: datetime | None = None
+        self._stop = threading.Event()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counters = {name: dict(counter) for name, counter in self._counters.items()}
+            total = len(self._agents)
+        return {
+            "total": total,
+            **counters,
+            "reconciled_at": self.reconciled_at.isoformat() if self.reconciled_at else None,
+        }
+
+    def reconcile(self) -> None:
+        """Rebuild every counter from the database; requires an app context."""
+        with self._reconcile_lock:
+            with self._lock:
+                self._replay = []
+            try:
+                agents = self._load_agents()
+            except Exception:
+                with self._lock:
+                    self._replay = None
+                raise
+            counters = {name: Counter() for name in DIMENSIONS}
+            for buckets in agents.values():
+                for name, bucket in zip(DIMENSIONS, buckets):
+                    counters[name][bucket] += 1
+            with self._lock:
+                for update in self._replay:
+                    self._apply(agents, counters, *update)
+                self._replay = None
+                self._agents = agents
+                self._counters = counters
+                self.reconciled_at = datetime.utcnow()
+
+    @classmethod
+    def _load_agents(cls) -> dict[str, AgentBuckets]:
+        now = datetime.utcnow()
+        rows = (
+            db.session.query(
+                Agent.agent_id,
+                Agent.manufacturer,
+                Agent.model,
+                Agent.service_tag,
+                Agent.last_seen,
+                AgentLatestState,
+            )
+            .outerjoin(AgentLatestState, AgentLatestState.agent_id == Agent.agent_id)
+            .all()
+        )
+        agents = {}
+        for agent_id, manufacturer, model, service_tag, last_seen, state in rows:
+            buckets = cls._hardware_buckets(AgentBuckets(), manufacturer, model, service_tag)
+            buckets = cls._state_buckets(buckets, DataService._state_to_dict(state))
+            agents[agent_id] = buckets._replace(
+                status="online" if DataService._is_online(last_seen, now) else "offline"
+            )
+        return agents
+
+    def start(self, app, interval: float) -> None:
+        """Reconcile now and then every *interval* seconds in the background."""
+        with app.app_context():
+            self.reconcile()
+        threading.Thread(target=self._run, args=(app, interval), name="statistics", daemon=True).start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self, app, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                with app.app_context():
+                    self.reconcile()
+            except Exception:
+                logger.exception("Statistics reconciliation failed")
+
+    # Signal receivers -------------------------------------------------
+    def on_agent_registered(self, _sender, agent, **_kwargs) -> None:
+        self._update(
+            agent.agent_id,
+            lambda b: self._hardware_buckets(b, agent.manufacturer, agent.model, agent.service_tag)._replace(
+                status="online"
+            ),
+        )
+
+    def on_monitoring_data(self, _sender, states, **_kwargs) -> None:
+        for agent_id, state in states.items():
+            self._update(agent_id, lambda b: self._state_buckets(b, state), create=False)
+
+    def on_status_changed(self, _sender, agent_id, online, **_kwargs) -> None:
+        self._update(agent_id, lambda b: b._replace(status="online" if online else "offline"), create=False)
+
+    def _update(self, agent_id: str, change, create: bool = True) -> None:
+        with self._lock:
+            self._apply(self._agents, self._counters, agent_id, change, create)
+            if self._replay is not None:
+                self._replay.append((agent_id, change, create))
+
+    @staticmethod
+    def _apply(agents: dict, counters: dict, agent_id: str, change, create: bool) -> None:
+        old = agents.get(agent_id)
+        if old is None and not create:
+            return
+        new = change(old or AgentBuckets())
+        if old == new:
+            return
+        for name, old_bucket, new_bucket in zip(DIMENSIONS, old or (None,) * len(DIMENSIONS), new):
+            if old_bucket == new_bucket:
+                continue
+            if old_bucket is not None:
+                counters[name][old_bucket] -= 1
+                if not counters[name][old_bucket]:
+                    del counters[name][old_bucket]
+            counters[name][new_bucket] += 1
+        agents[agent_id] = new
+
+    @staticmethod
+    def _hardware_buckets(buckets: AgentBuckets, manufacturer, model, service_tag) -> AgentBuckets:
+        return buckets._replace(
+            manufacturer=manufacturer or "Unknown",
+            model=model or "Unknown",
+            detection="success" if service_tag else "failed",
+        )
+
+    @staticmethod
+    def _state_buckets(buckets: AgentBuckets, state: dict) -> AgentBuckets:
+        office = state.get("office")
+        backup = state.get("backup")
+        if office:
+            buckets = buckets._replace(
+                office="installed" if office["installed"] else "not_installed",
+                office_activation=office["activation_status"] or "unknown",
+            )
+        if backup:
+            buckets = buckets._replace(backup=backup["status"] or "unknown")
+        return buckets
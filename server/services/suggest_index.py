@@ -0,0 +1,79 @@
+"""In-memory prefix index for search type-ahead."""
+import bisect
+import threading
+
+from ..models import Agent
+
+SUGGEST_FIELDS = ("hostname", "service_tag", "serial_number")
+
+
+class SuggestIndex:
+    """Sorted index of agent hostnames, service tags and serial numbers.
+
+    Entries are ``(folded value, value, field, agent_id)`` tuples kept in a
+    sorted list, so the suggestions for a prefix are a contiguous run found
+    with one binary search. The index is loaded once from the ``Agent``
+    table and then kept current from agent registrations.
+    """
+
+    def __init__(self) -> None:
+        self._entries: list[tuple[str, str, str, str]] = []
+        self._by_agent: dict[str, list[tuple[str, str, str, str]]] = {}
+        self._lock = threading.Lock()
+
+    def load(self) -> int:
+        """Rebuild the index from the database; returns the number of agents."""
+        rows = Agent.query.with_entities(Agent.agent_id, *(getattr(Agent, f) for f in SUGGEST_FIELDS)).all()
+        by_agent = {agent_id: self._agent_entries(agent_id, values) for agent_id, *values in rows}
+        entries = sorted(entry for agent_entries in by_agent.values() for entry in agent_entries)
+        with self._lock:
+            self._entries = entries
+            self._by_agent = by_agent
+        return len(by_agent)
+
+    def update(self, agent_id: str, values: dict) -> None:
+        """Replace the entries of *agent_id* with its current *values*."""
+        new_entries = self._agent_entries(agent_id, [values.get(f) for f in SUGGEST_FIELDS])
+        with self._lock:
+            old_entries = self._by_agent.get(agent_id, [])
+            if old_entries == new_entries:
+                return
+            for entry in old_entries:
+                position = bisect.bisect_left(self._entries, entry)
+                if position < len(self._entries) and self._entries[position] == entry:
+                    del self._entries[position]
+            for entry in new_entries:
+                bisect.insort(self._entries, entry)
+            self._by_agent[agent_id] = new_entries
+
+    def on_agent_registered(self, _sender, agent, **_kwargs) -> None:
+        self.update(agent.agent_id, {f: getattr(agent, f) for f in SUGGEST_FIELDS})
+
+    def suggest(self, prefix: str, limit: int = 10) -> list[dict]:
+        """Return up to *limit* distinct values starting with *prefix*."""
+        folded = prefix.casefold()
+        results: list[dict] = []
+        seen: set[tuple[str, str]] = set()
+        with self._lock:
+            position = bisect.bisect_left(self._entries, (folded,))
+            while position < len(self._entries) and len(results) < limit:
+                key, value, field, agent_id = self._entries[position]
+                if not key.startswith(folded):
+                    break
+                position += 1
+                if (value, field) in seen:
+                    continue
+                seen.add((value, field))
+                results.append({"value": value, "field": field, "agent_id": agent_id})
+        return results
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _agent_entries(agent_id: str, values) -> list[tuple[str, str, str, str]]:
+        return sorted(
+            (value.casefold(), value, field, agent_id)
+            for field, value in zip(SUGGEST_FIELDS, values)
+            if value
+        )
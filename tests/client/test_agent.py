@@ -1,5 +1,8 @@
 import os
 import sys
+import threading
+import time
+from unittest.mock import patch, Mock
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 
 from client.core.agent import MonitoringAgent
@@ -10,3 +13,101 @@ def test_agent_creation():
     assert agent.hardware.detect()
     assert agent.software.detect() is not None
     assert agent.backup.detect() is not None
+
+
+def test_unchanged_sections_are_sent_as_hash_references():
+    agent = MonitoringAgent(debug_mode=True)
+    sections = {
+        "system": {"agent_id": "HOST_1", "hostname": "HOST"},
+        "software": {"office": {"installed": True}},
+        "backup": {"status": "found", "output": "x" * 1000},
+    }
+    first, hashes = agent.build_payload(sections)
+    assert first == sections
+    agent.mark_sent(hashes)
+
+    sections["software"] = {"office": {"installed": False}}
+    second, _ = agent.build_payload(sections)
+    assert second["software"] == {"office": {"installed": False}}
+    assert second["backup"] == {"unchanged": True, "hash": hashes["backup"]}
+    assert second["system"]["agent_id"] == "HOST_1"
+    assert second["system"]["unchanged"] is True
+
+
+def test_full_sync_interval_resends_everything():
+    agent = MonitoringAgent(debug_mode=True)
+    agent.config.full_sync_interval = 0
+    sections = {"system": {"agent_id": "HOST_1"}, "software": {}, "backup": {"status": "found"}}
+    _, hashes = agent.build_payload(sections)
+    agent.mark_sent(hashes)
+    payload, _ = agent.build_payload(sections)
+    assert payload == sections
+
+
+def test_sections_the_server_cannot_match_are_resent():
+    agent = MonitoringAgent(debug_mode=True)
+    agent._latest = {"system": {"agent_id": "HOST_1"}, "software": {"office": {}}, "backup": {"status": "found"}}
+    _, hashes = agent.build_payload(agent._latest)
+    agent.mark_sent(hashes)
+
+    response = Mock(ok=True)
+    response.json.return_value = {"status": "queued", "resend": ["backup"]}
+    with patch('client.core.agent.post_json', return_value=response) as post:
+        agent._report({})
+        agent._report({})
+    first, second = (c.args[1] for c in post.call_args_list)
+    assert first["backup"] == {"unchanged": True, "hash": hashes["backup"]}
+    assert first["software"]["unchanged"] is True
+    assert second["backup"] == {"status": "found"}
+    agent.stop()
+
+
+def test_collect_reports_timeouts_without_blocking():
+    agent = MonitoringAgent(debug_mode=True)
+    release = threading.Event()
+    agent.backup.detect = lambda: release.wait(5) and {"status": "found"}
+    agent.software.detect = lambda: {"office": {"installed": False}}
+    agent.hardware.detect = lambda: {"agent_id": "HOST_1"}
+    agent.config.detector_timeouts = {"backup": 0.1}
+
+    began = time.monotonic()
+    sections, durations, errors = agent.collect()
+    assert time.monotonic() - began < 2
+    assert "backup" not in sections
+    assert errors == {"backup": {"status": "timeout"}}
+    assert sections["software"] == {"office": {"installed": False}}
+    assert sections["system"] == {"agent_id": "HOST_1"}
+    assert set(durations) == {"system", "software", "backup"}
+
+    release.set()
+    agent._pending["backup"].result(timeout=5)
+    sections, _, errors = agent.collect()
+    assert sections["backup"] == {"status": "found"}
+    assert errors == {}
+    agent.stop()
+
+
+def test_failed_detector_keeps_last_good_section():
+    agent = MonitoringAgent(debug_mode=True)
+    agent._latest = {"system": {"agent_id": "HOST_1"}, "backup": {"status": "found", "version_count": 3}}
+    agent.backup.detect = lambda: 1 / 0
+    sections, _, errors = agent.collect(["backup"])
+    agent._latest.update(sections)
+    assert agent._latest["backup"] == {"status": "found", "version_count": 3}
+    assert errors["backup"]["status"] == "error"
+
+    with patch('client.core.agent.post_json', return_value=Mock(ok=True)) as post:
+        agent._report({"backup": 0.0}, errors)
+    payload = post.call_args.args[1]
+    assert payload["backup"] == {"status": "found", "version_count": 3}
+    assert payload["detector_errors"] == errors
+    agent.stop()
+
+
+def test_collect_keeps_agent_id_when_hardware_fails():
+    agent = MonitoringAgent(debug_mode=True)
+    agent.hardware.detect = lambda: 1 / 0
+    sections, _, errors = agent.collect()
+    assert errors["system"]["status"] == "error"
+    assert sections["system"]["agent_id"]
+    agent.stop()
@@ -0,0 +1,110 @@
+import io
+import os
+import sys
+from unittest.mock import patch, Mock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from client.detectors.backup_detector import MAX_RAW_OUTPUT, BackupDetector, parse_wbadmin_versions
+
+WBADMIN_OUTPUT = """wbadmin 1.0 - Backup command-line tool
+(C) Copyright Microsoft Corporation. All rights reserved.
+
+Backup time: 9/20/2023 9:00 PM
+Backup target: 1394/USB Disk labeled Backup(E:)
+Version identifier: 09/21/2023-04:00
+Can recover: Volume(s), File(s), Application(s), Bare Metal Recovery, System State
+Snapshot ID: {11111111-2222-3333-4444-555555555555}
+
+Backup time: 9/21/2023 9:00 PM
+Backup target: Network Share labeled \\\\nas-office\\respaldos
+Version identifier: 09/22/2023-04:00
+Can recover: Volume(s), File(s)
+
+Backup time: 9/19/2023 9:00 PM
+Backup target: 1394/USB Disk labeled Backup(E:)
+Version identifier: 09/20/2023-04:00
+Can recover: File(s)
+"""
+
+WBADMIN_OUTPUT_ES = """wbadmin 1.0 - Herramienta de línea de comandos de copia de seguridad
+(C) Copyright Microsoft Corporation. Todos los derechos reservados.
+
+Hora de copia de seguridad: 20/09/2023 21:00
+Destino de copia de seguridad: Disco 1394/USB con etiqueta Respaldo(E:)
+Identificador de versión: 09/21/2023-04:00
+Se puede recuperar: Volúmenes, Archivos, Aplicaciones
+
+Hora de copia de seguridad: 21/09/2023 21:00
+Destino de copia de seguridad: Recurso compartido de red con etiqueta \\\\nas-office\\respaldos
+Identificador de version: 09/22/2023-04:00
+Se puede recuperar: Archivos
+"""
+
+
+def wbadmin(stdout: str, returncode: int = 0, stderr: str = ''):
+    """Patch subprocess.Popen with a wbadmin process writing *stdout*."""
+    process = Mock(stdout=io.StringIO(stdout), stderr=io.StringIO(stderr), returncode=returncode)
+    process.wait.return_value = returncode
+    return patch('subprocess.Popen', return_value=process)
+
+
+def test_parse_wbadmin_versions():
+    versions = list(parse_wbadmin_versions(WBADMIN_OUTPUT.splitlines()))
+    assert len(versions) == 3
+    assert versions[0]['timestamp'] == '2023-09-21T04:00:00'
+    assert versions[0]['target'] == '1394/USB Disk labeled Backup(E:)'
+    assert versions[0]['version_id'] == '09/21/2023-04:00'
+    assert 'Bare Metal Recovery' in versions[0]['can_recover']
+
+
+def test_detect_sends_newest_versions_only():
+    detector = BackupDetector(debug_mode=True, max_versions=2)
+    with wbadmin(WBADMIN_OUTPUT):
+        info = detector.detect()
+    assert info['status'] == 'found'
+    assert 'output' not in info
+    assert info['version_count'] == 3
+    assert [v['version_id'] for v in info['versions']] == ['09/22/2023-04:00', '09/21/2023-04:00']
+    assert info['last_backup'] == '2023-09-22T04:00:00'
+    assert info['backup_location'] == 'Network Share labeled \\\\nas-office\\respaldos'
+
+
+def test_detect_without_versions():
+    detector = BackupDetector(debug_mode=True)
+    with wbadmin("No backup was found.\n"):
+        info = detector.detect()
+    assert info['version_count'] == 0
+    assert info['versions'] == []
+    assert info['last_backup'] is None
+
+
+def test_spanish_output_is_parsed():
+    detector = BackupDetector(debug_mode=True)
+    with wbadmin(WBADMIN_OUTPUT_ES):
+        info = detector.detect()
+    assert info['version_count'] == 2
+    assert info['last_backup'] == '2023-09-22T04:00:00'
+    assert info['backup_location'].startswith('Recurso compartido de red')
+    assert info['versions'][1]['can_recover'] == ['Volúmenes', 'Archivos', 'Aplicaciones']
+    assert 'output' not in info
+
+
+def test_unrecognised_output_is_sent_raw():
+    output = "wbadmin 1.0\nSicherungszeit: 20.09.2023 21:00\nVersionsbezeichner: 09/21/2023-04:00\n"
+    detector = BackupDetector(debug_mode=True)
+    with wbadmin(output):
+        info = detector.detect()
+    assert info['status'] == 'found'
+    assert info['version_count'] == 0
+    assert info['output'] == output.strip()
+
+    with wbadmin("x" * (2 * MAX_RAW_OUTPUT)):
+        assert len(detector.detect()['output']) == MAX_RAW_OUTPUT
+
+
+def test_failed_command_reports_stderr():
+    detector = BackupDetector(debug_mode=True)
+    with wbadmin('', returncode=1, stderr='Access denied'):
+        info = detector.detect()
+    assert info == {'status': 'error', 'versions': [], 'error': 'Access denied'}
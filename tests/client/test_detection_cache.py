@@ -0,0 +1,58 @@
+import os
+import sys
+from unittest.mock import patch, Mock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from client.detectors.hardware_detector import HardwareDetector
+from client.utils.detection_cache import DetectionCache
+
+
+def test_cache_entries_expire_with_ttl_and_reboot(tmp_path):
+    path = str(tmp_path / 'cache.json')
+    cache = DetectionCache(path, boot_time=1000)
+    cache.set('hardware.service_tag', {'service_tag': 'ABC'})
+    assert cache.get('hardware.service_tag', ttl=60) == {'service_tag': 'ABC'}
+    assert cache.get('hardware.service_tag', ttl=-1) is None
+
+    assert DetectionCache(path, boot_time=1000).get('hardware.service_tag', ttl=60) == {'service_tag': 'ABC'}
+    assert DetectionCache(path, boot_time=2000).get('hardware.service_tag', ttl=60) is None
+
+
+def test_hardware_detector_probes_once_per_boot(tmp_path):
+    cache = DetectionCache(str(tmp_path / 'cache.json'), boot_time=1000)
+    detector = HardwareDetector(debug_mode=True, cache=cache)
+    detector.identity()  # platform caches its own uname probe on first use
+    run = Mock(return_value=Mock(stdout="HP,ProDesk 600,ABC123,XYZ789"))
+
+    with patch('subprocess.run', run):
+        assert detector.detect()['service_tag'] is not None
+        calls = run.call_count
+        assert detector.detect()['service_tag'] == 'ABC123'
+        assert run.call_count == calls
+        detector.detect(refresh=True)
+        assert run.call_count == 2 * calls
+
+
+def test_cache_disabled_without_ttl(tmp_path):
+    cache = DetectionCache(str(tmp_path / 'cache.json'), boot_time=1000)
+    detector = HardwareDetector(debug_mode=True, cache=cache, cache_ttl=0)
+    detector.identity()  # platform caches its own uname probe on first use
+    run = Mock(return_value=Mock(stdout="HP,ProDesk 600,ABC123,XYZ789"))
+    with patch('subprocess.run', run):
+        detector.detect()
+        calls = run.call_count
+        detector.detect()
+    assert run.call_count == 2 * calls
+
+
+def test_failed_service_tag_detection_is_not_cached(tmp_path):
+    cache = DetectionCache(str(tmp_path / 'cache.json'), boot_time=1000)
+    detector = HardwareDetector(debug_mode=True, cache=cache)
+    with patch('subprocess.run', side_effect=OSError('wmic unavailable')):
+        assert detector.detect()['service_tag'] is None
+    assert cache.get('hardware.service_tag', ttl=60) is None
+
+    run = Mock(return_value=Mock(stdout="HP,ProDesk 600,ABC123,XYZ789"))
+    with patch('subprocess.run', run):
+        assert detector.detect()['service_tag'] == 'ABC123'
@@ -0,0 +1,71 @@
+import gzip
+import json
+import os
+import sys
+from unittest.mock import patch, Mock
+
+import requests
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from client.utils.network_utils import JsonTransport
+
+
+def test_large_bodies_are_gzip_compressed():
+    transport = JsonTransport(compress_threshold=100)
+    payload = {'backup': {'output': 'x' * 1000}}
+    with patch.object(transport.session, 'post', return_value=Mock(status_code=200)) as post:
+        transport.post_json('http://server/api', payload)
+    kwargs = post.call_args.kwargs
+    assert kwargs['headers'] == {'Content-Encoding': 'gzip'}
+    assert json.loads(gzip.decompress(kwargs['data'])) == payload
+
+
+def test_small_bodies_are_sent_plain():
+    transport = JsonTransport(compress_threshold=100)
+    with patch.object(transport.session, 'post', return_value=Mock(status_code=200)) as post:
+        transport.post_json('http://server/api', {'a': 1})
+    assert post.call_args.kwargs['headers'] == {}
+    assert json.loads(post.call_args.kwargs['data']) == {'a': 1}
+
+
+def test_retries_with_backoff_then_succeeds():
+    transport = JsonTransport(max_retries=3, backoff_base=1, backoff_max=8)
+    responses = [
+        requests.ConnectionError('down'),
+        Mock(status_code=503, headers={}),
+        Mock(status_code=429, headers={'Retry-After': '5'}),
+        Mock(status_code=200),
+    ]
+    with patch.object(transport.session, 'post', side_effect=responses), \
+            patch('client.utils.network_utils.time.sleep') as sleep:
+        response = transport.post_json('http://server/api', {})
+    assert response.status_code == 200
+    delays = [c.args[0] for c in sleep.call_args_list]
+    assert 0 <= delays[0] <= 1
+    assert 0 <= delays[1] <= 2
+    assert delays[2] == 5
+
+
+def test_gives_up_after_max_retries():
+    transport = JsonTransport(max_retries=1)
+    with patch.object(transport.session, 'post', side_effect=requests.ConnectionError('down')), \
+            patch('client.utils.network_utils.time.sleep'):
+        try:
+            transport.post_json('http://server/api', {})
+        except requests.ConnectionError:
+            pass
+        else:
+            raise AssertionError('expected ConnectionError')
+        assert transport.session.post.call_count == 2
+
+
+def test_per_call_retry_override():
+    transport = JsonTransport(max_retries=3)
+    unavailable = Mock(status_code=503, headers={'Retry-After': '30'})
+    with patch.object(transport.session, 'post', return_value=unavailable) as post, \
+            patch('client.utils.network_utils.time.sleep') as sleep:
+        response = transport.post_json('http://server/api', {}, max_retries=0)
+    assert response.status_code == 503
+    assert post.call_count == 1
+    sleep.assert_not_called()
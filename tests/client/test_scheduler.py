@@ -0,0 +1,144 @@
+import os
+import sys
+import threading
+from unittest.mock import patch, Mock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from client.core.agent import MonitoringAgent
+from client.core.scheduler import Scheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_jobs_run_on_their_own_intervals():
+    clock = FakeClock()
+    scheduler = Scheduler(jitter=0, clock=clock)
+    scheduler.add('backup', 3600)
+    scheduler.add('report', 60)
+    assert sorted(scheduler.due()) == ['backup', 'report']
+    assert scheduler.sleep_time() == 60
+
+    clock.now += 60
+    assert scheduler.due() == ['report']
+    clock.now += 3540
+    assert sorted(scheduler.due()) == ['backup', 'report']
+
+
+def test_schedule_does_not_drift_with_work_duration():
+    clock = FakeClock()
+    scheduler = Scheduler(jitter=0, clock=clock)
+    scheduler.add('report', 60)
+    scheduler.due()
+    clock.now += 65  # detection overran by five seconds
+    assert scheduler.due() == ['report']
+    assert scheduler.sleep_time() == 55
+
+
+def test_jitter_spreads_intervals_and_skips_missed_runs():
+    clock = FakeClock()
+    scheduler = Scheduler(jitter=0.1, clock=clock, rng=lambda: 1.0)
+    scheduler.add('report', 100)
+    assert scheduler.due() == []
+    clock.now += 10  # first run delayed by up to jitter * interval
+    assert scheduler.due() == ['report']
+    assert scheduler.sleep_time() == 110
+
+    clock.now += 10000
+    assert scheduler.due() == ['report']
+    assert scheduler.sleep_time() == 100
+
+
+def test_agent_uses_configured_intervals():
+    agent = MonitoringAgent(debug_mode=True)
+    agent.config.detector_intervals = {'backup': 900}
+    agent.config.schedule_jitter = 0
+    agent._schedule()
+    assert agent.scheduler._intervals == {
+        'system': agent.hardware.default_interval,
+        'software': agent.software.default_interval,
+        'backup': 900,
+        'report': agent.config.report_interval,
+        'replay': agent.config.spool_replay_interval,
+        'heartbeat': agent.config.heartbeat_interval,
+    }
+    agent.stop()
+
+
+def test_agent_loop_reports_latest_sections():
+    agent = MonitoringAgent(debug_mode=True)
+    agent.hardware.detect = lambda: {'agent_id': 'HOST_1'}
+    agent.software.detect = lambda: {'office': {'installed': True}}
+    agent.backup.detect = lambda: {'status': 'found'}
+    agent.scheduler.jitter = 0
+    sent = threading.Event()
+    payloads = []
+
+    def fake_post(url, payload):  # noqa: ARG001
+        payloads.append(payload)
+        sent.set()
+        return Mock(ok=True)
+
+    with patch('client.core.agent.post_json', side_effect=fake_post):
+        agent.start()
+        assert sent.wait(5)
+        agent.stop()
+    assert payloads[0]['system'] == {'agent_id': 'HOST_1'}
+    assert payloads[0]['backup'] == {'status': 'found'}
+    assert set(payloads[0]['durations']) == {'system', 'software', 'backup'}
+
+
+def test_agent_heartbeats_between_reports():
+    agent = MonitoringAgent(debug_mode=True)
+    agent.config.heartbeat_interval = 0.05
+    agent.scheduler.jitter = 0
+    agent.hardware.detect = lambda: {'agent_id': 'HOST_1'}
+    beat = threading.Event()
+    calls = []
+
+    def fake_post(url, payload, **kwargs):
+        calls.append((url, payload, kwargs))
+        if url.endswith('/api/agents/heartbeat'):
+            beat.set()
+        return Mock(ok=True, json=lambda: {'status': 'ok', 'unknown': []})
+
+    with patch('client.core.agent.post_json', side_effect=fake_post):
+        agent.start()
+        assert beat.wait(5)
+        agent.stop()
+    assert calls[0][0].endswith('/api/agents/monitoring-data')
+    heartbeat = next((payload, kwargs) for url, payload, kwargs in calls if url.endswith('/heartbeat'))
+    assert heartbeat == ({'agent_id': agent.hardware.identity()['agent_id']}, {'max_retries': 0})
+
+
+def test_heartbeat_survives_non_json_response():
+    agent = MonitoringAgent(debug_mode=True)
+    page = Mock(ok=True, status_code=200)
+    page.json.side_effect = ValueError('captive portal page')
+    with patch('client.core.agent.post_json', return_value=page):
+        agent._heartbeat()
+    agent.stop()
+
+
+def test_first_runs_are_spread_over_part_of_the_interval():
+    clock = FakeClock()
+    delays = []
+    for draw in (0.0, 0.5, 1.0):
+        scheduler = Scheduler(jitter=0.2, clock=clock, rng=lambda draw=draw: draw)
+        scheduler.add('report', 60)
+        delays.append(scheduler.sleep_time())
+    assert delays == [0.0, 6.0, 12.0]
+
+    agent = MonitoringAgent(debug_mode=True)
+    agent.scheduler = Scheduler(jitter=0.1, clock=clock, rng=lambda: 0.5)
+    agent._schedule()
+    start = 0.05 * agent.config.report_interval
+    next_runs = agent.scheduler._next_run
+    assert next_runs['report'] == next_runs['system'] == next_runs['backup'] == clock.now + start
+    agent.stop()
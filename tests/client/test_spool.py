@@ -0,0 +1,96 @@
+import os
+import sys
+from unittest.mock import patch, Mock
+
+import requests
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from client.config.client_config import ClientConfig
+from client.core.agent import MonitoringAgent
+from client.utils.spool import PayloadSpool
+
+
+def test_spool_replays_in_order_across_restarts(tmp_path):
+    spool = PayloadSpool(str(tmp_path), segment_size=30)
+    for i in range(10):
+        spool.append({'n': i})
+    assert len(spool) == 10
+    assert len(os.listdir(tmp_path)) > 1
+
+    items, token = spool.read_batch(4)
+    assert [i['n'] for i in items] == [0, 1, 2, 3]
+    spool.commit(token)
+
+    reopened = PayloadSpool(str(tmp_path), segment_size=30)
+    assert len(reopened) == 6
+    delivered = []
+    while True:
+        items, token = reopened.read_batch(4)
+        if not items:
+            break
+        delivered.extend(i['n'] for i in items)
+        reopened.commit(token)
+    assert delivered == [4, 5, 6, 7, 8, 9]
+    assert reopened.size() == 0
+
+
+def test_uncommitted_batch_is_read_again(tmp_path):
+    spool = PayloadSpool(str(tmp_path))
+    spool.append({'n': 1})
+    first, _ = spool.read_batch(10)
+    second, _ = spool.read_batch(10)
+    assert first == second == [{'n': 1}]
+
+
+def test_oldest_segments_are_evicted(tmp_path):
+    spool = PayloadSpool(str(tmp_path), segment_size=100, max_bytes=300)
+    for i in range(50):
+        spool.append({'n': i, 'pad': 'x' * 20})
+    assert spool.size() <= 300 + 100
+    remaining = []
+    while True:
+        items, token = spool.read_batch(100)
+        if not items:
+            break
+        remaining.extend(i['n'] for i in items)
+        spool.commit(token)
+    assert remaining[0] > 0
+    assert remaining == list(range(remaining[0], 50))
+
+
+def make_agent(tmp_path):
+    config = ClientConfig(spool_dir=str(tmp_path / 'spool'), cache_path=str(tmp_path / 'cache.json'))
+    agent = MonitoringAgent(config=config, debug_mode=True)
+    agent._latest = {'system': {'agent_id': 'HOST_1'}, 'software': {}, 'backup': {'status': 'found'}}
+    return agent
+
+
+def test_failed_reports_are_spooled_and_replayed(tmp_path):
+    agent = make_agent(tmp_path)
+    with patch('client.core.agent.post_json', side_effect=requests.ConnectionError('down')):
+        agent._report({})
+        agent._report({})
+    assert len(agent.spool) == 2
+    assert agent.replay_spool() == 0
+
+    with patch('client.core.agent.post_json', return_value=Mock(ok=True, status_code=202)):
+        agent._report({})
+    with patch('client.core.agent.post_json', return_value=Mock(ok=True, status_code=200)) as post:
+        assert agent.replay_spool() == 2
+    url, items = post.call_args.args
+    assert url.endswith('/api/agents/monitoring-data/batch')
+    assert items[0]['backup'] == {'status': 'found'}
+    assert items[1]['backup']['unchanged'] is True
+    assert all('collected_at' in item for item in items)
+    assert len(agent.spool) == 0
+    agent.stop()
+
+
+def test_replay_keeps_batch_when_server_is_busy(tmp_path):
+    agent = make_agent(tmp_path)
+    agent.spool.append({'system': {'agent_id': 'HOST_1'}})
+    with patch('client.core.agent.post_json', return_value=Mock(ok=False, status_code=503)):
+        assert agent.replay_spool() == 0
+    assert len(agent.spool) == 1
+    agent.stop()
@@ -0,0 +1,106 @@
+import os
+import sys
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from server.app import create_app
+from server.config.server_config import ServerConfig
+from server.models import db, Agent
+from server.services.agent_registry import AgentRegistry
+
+
+def create_test_app(**kwargs):
+    return create_app(ServerConfig(database_uri="sqlite:///:memory:", ingest_async=False, **kwargs))
+
+
+def agent_selects(app, action):
+    statements = []
+
+    def record(_conn, _cursor, statement, *_args):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        action()
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    return [s for s in statements if s.startswith('SELECT') and 'FROM agent ' in s + ' ']
+
+
+def test_ingest_skips_agent_lookup_for_cached_agents():
+    app = create_test_app()
+    client = app.test_client()
+    client.post('/api/agents/register', json={'agent_id': 'A1', 'hostname': 'HOST-1'})
+
+    def report():
+        for n in range(3):
+            client.post('/api/agents/monitoring-data', json={'system': {'agent_id': 'A1'}, 'backup': {'status': f's{n}'}})
+        client.post('/api/agents/monitoring-data/batch', json=[{'system': {'agent_id': 'A1'}}])
+
+    assert agent_selects(app, report) == []
+    with app.app_context():
+        agent = Agent.query.filter_by(agent_id='A1').one()
+        assert agent.hostname == 'HOST-1'
+    body = client.get('/api/agents/history').get_json()
+    assert body['agents'][0]['backup']['status'] == 's2'
+    metrics = client.get('/api/agents/registry/metrics').get_json()
+    assert metrics['entries'] == 1
+    assert metrics['hits'] >= 4
+
+
+def test_reregistration_refreshes_service_tag():
+    app = create_test_app()
+    client = app.test_client()
+    client.post('/api/agents/register', json={'agent_id': 'A1', 'hostname': 'H', 'service_tag': 'OLD'})
+    assert client.get('/api/agents/service-tag/OLD').get_json()['agent_id'] == 'A1'
+
+    client.post('/api/agents/register', json={'agent_id': 'A1', 'hostname': 'H', 'service_tag': 'NEW'})
+    assert client.get('/api/agents/service-tag/OLD').status_code == 404
+    body = client.get('/api/agents/service-tag/NEW').get_json()
+    assert (body['agent_id'], body['hostname']) == ('A1', 'H')
+
+
+def test_heartbeat_refreshes_cached_last_seen():
+    app = create_test_app()
+    client = app.test_client()
+    client.post('/api/agents/register', json={'agent_id': 'A1'})
+    report = {'system': {'agent_id': 'A1'}, 'backup': {'status': 'ok'}}
+    client.post('/api/agents/monitoring-data', json=report)
+    with app.app_context():
+        seq = Agent.query.filter_by(agent_id='A1').one().change_seq
+    registry = app.extensions['agent_registry']
+    registry.touch(['A1'], datetime.utcnow() - timedelta(minutes=10))
+
+    client.post('/api/agents/heartbeat', json={'agent_ids': ['A1']})
+    assert registry.get('A1').last_seen > datetime.utcnow() - timedelta(minutes=1)
+    client.post('/api/agents/monitoring-data', json=report)
+    with app.app_context():
+        assert Agent.query.filter_by(agent_id='A1').one().change_seq == seq
+
+
+def test_registry_evicts_least_recently_used():
+    app = create_test_app()
+    client = app.test_client()
+    for agent_id in ('A1', 'A2', 'A3'):
+        client.post('/api/agents/register', json={'agent_id': agent_id})
+    registry = AgentRegistry(capacity=2)
+    with app.app_context():
+        registry.agents(['A1', 'A2'])
+        registry.get('A1')
+        registry.agents(['A3'])
+    assert registry.get('A2') is None
+    assert registry.get('A1') and registry.get('A3')
+    assert registry.metrics()['evictions'] == 1
+
+
+def test_unknown_agents_are_not_cached():
+    app = create_test_app()
+    client = app.test_client()
+    client.post('/api/agents/monitoring-data', json={'system': {'agent_id': 'GHOST'}})
+    assert client.get('/api/agents/registry/metrics').get_json()['entries'] == 0
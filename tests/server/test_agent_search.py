@@ -0,0 +1,106 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from server.app import create_app
+from server.config.server_config import ServerConfig
+from server.models import db, Agent
+from server.services.agent_service import AgentService
+
+
+def create_test_app():
+    return create_app(ServerConfig(database_uri="sqlite:///:memory:", ingest_async=False))
+
+
+def search(client, q, **params):
+    return [r['agent_id'] for r in client.get('/api/search', query_string=dict(params, q=q)).get_json()['results']]
+
+
+def test_index_follows_registration_updates():
+    app = create_test_app()
+    client = app.test_client()
+    assert app.extensions['agent_search_index'].enabled
+    client.post('/api/agents/register', json={'agent_id': 'A1', 'hostname': 'ACCOUNTING-01'})
+    assert search(client, 'counting') == ['A1']
+
+    client.post('/api/agents/register', json={'agent_id': 'A1', 'hostname': 'RECEPTION-01'})
+    assert search(client, 'counting') == []
+    assert search(client, 'reception') == ['A1']
+
+
+def test_results_are_ranked_prefix_first():
+    app = create_test_app()
+    client = app.test_client()
+    client.post('/api/agents/register', json={'agent_id': 'A1', 'hostname': 'PC-1', 'model': 'Latitude DELL'})
+    client.post('/api/agents/register', json={'agent_id': 'A2', 'hostname': 'MY-DELL-PC'})
+    client.post('/api/agents/register', json={'agent_id': 'A3', 'hostname': 'DELL-PC'})
+    assert search(client, 'dell') == ['A3', 'A2', 'A1']
+    first = client.get('/api/search', query_string={'q': 'dell', 'limit': 2}).get_json()
+    assert [r['agent_id'] for r in first['results']] == ['A3', 'A2']
+    assert search(client, 'dell', limit=2, after=first['next']) == ['A1']
+
+
+def test_wildcards_and_short_queries():
+    app = create_test_app()
+    client = app.test_client()
+    client.post('/api/agents/register', json={'agent_id': 'A1', 'hostname': 'SALES-LAPTOP'})
+    client.post('/api/agents/register', json={'agent_id': 'A2', 'hostname': 'LAPTOP-SALES'})
+    assert search(client, 'sales*top') == ['A1']
+    assert search(client, 'es') == ['A1', 'A2']
+
+
+def test_fallback_without_index():
+    app = create_test_app()
+    client = app.test_client()
+    client.post('/api/agents/register', json={'agent_id': 'A1', 'service_tag': 'XYZ789'})
+    app.extensions['agent_search_index'].enabled = False
+    assert search(client, 'yz78') == ['A1']
+
+
+def vm_steps(func):
+    """Return the result of *func* and roughly how many SQLite VM instructions it ran."""
+    connection = db.session.connection().connection.dbapi_connection
+    steps = 0
+
+    def count():
+        nonlocal steps
+        steps += 1000
+        return 0
+
+    connection.set_progress_handler(count, 1000)
+    try:
+        return func(), steps
+    finally:
+        connection.set_progress_handler(None, 1000)
+
+
+def test_search_100k_agents_uses_index():
+    app = create_test_app()
+    with app.test_request_context():
+        db.session.execute(
+            db.insert(Agent),
+            [
+                {
+                    'agent_id': f'AGENT{i}',
+                    'hostname': f'HOST-{i:06d}',
+                    'service_tag': f'TAG{i * 7919 % 1000003:07d}',
+                    'model': ('OptiPlex 7090', 'Latitude 5420', 'ThinkPad T14')[i % 3],
+                }
+                for i in range(100_000)
+            ],
+        )
+        db.session.commit()
+        service = AgentService()
+        index = app.extensions['agent_search_index']
+
+        (agents, _), indexed = vm_steps(lambda: service.search('HOST-04213'))
+        assert sorted(a.hostname for a in agents) == [f'HOST-{n:06d}' for n in range(42130, 42140)]
+
+        index.enabled = False
+        (scanned, _), fallback = vm_steps(lambda: service.search('HOST-04213'))
+        assert {a.id for a in scanned} == {a.id for a in agents}
+
+    # The scan visits every agent; the index only the few trigram matches.
+    assert fallback > 100_000
+    assert indexed * 20 < fallback
@@ -0,0 +1,74 @@
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from server.app import create_app
+from server.config.server_config import ServerConfig
+from server.models import db, Agent
+
+
+def create_test_app():
+    app = create_app(ServerConfig(database_uri="sqlite:///:memory:", ingest_async=False))
+    client = app.test_client()
+    for agent_id in ('A1', 'A2', 'A3'):
+        client.post('/api/agents/register', json={'agent_id': agent_id, 'hostname': agent_id})
+    return app, client
+
+
+def backup(agent_id, status):
+    return {'system': {'agent_id': agent_id}, 'backup': {'status': status}}
+
+
+def test_since_returns_only_changed_agents():
+    app, client = create_test_app()
+    full = client.get('/api/agents/history').get_json()
+    assert len(full['agents']) == 3
+    assert all(a['online'] for a in full['agents'])
+    cursor = full['cursor']
+
+    client.post('/api/agents/monitoring-data', json=backup('A2', 'found'))
+    delta = client.get('/api/agents/history', query_string={'since': cursor}).get_json()
+    assert [a['agent_id'] for a in delta['agents']] == ['A2']
+    assert delta['agents'][0]['backup']['status'] == 'found'
+    assert delta['cursor'] != cursor
+
+    client.post('/api/agents/monitoring-data', json=backup('A2', 'found'))
+    unchanged = client.get('/api/agents/history', query_string={'since': delta['cursor']}).get_json()
+    assert unchanged['agents'] == []
+
+
+def test_since_includes_agents_that_went_offline():
+    app, client = create_test_app()
+    now = datetime.utcnow()
+    with app.app_context():
+        agent = Agent.query.filter_by(agent_id='A3').one()
+        agent.last_seen = now - timedelta(minutes=6)
+        seq = agent.change_seq
+        db.session.commit()
+    polled_at = int((now - timedelta(minutes=2)).replace(tzinfo=timezone.utc).timestamp())
+    delta = client.get('/api/agents/history', query_string={'since': f'{seq}-{polled_at}'}).get_json()
+    assert [a['agent_id'] for a in delta['agents']] == ['A3']
+    assert delta['agents'][0]['online'] is False
+
+
+def test_returning_agent_is_reported_as_changed():
+    app, client = create_test_app()
+    with app.app_context():
+        agent = Agent.query.filter_by(agent_id='A1').one()
+        agent.last_seen = datetime.utcnow() - timedelta(hours=1)
+        db.session.commit()
+    # Written behind the service layer's back, so the cached copy is stale.
+    app.extensions['agent_registry'].invalidate('A1')
+    cursor = client.get('/api/agents/history').get_json()['cursor']
+    client.post('/api/agents/monitoring-data', json={'system': {'agent_id': 'A1'}})
+    delta = client.get('/api/agents/history', query_string={'since': cursor}).get_json()
+    assert [a['agent_id'] for a in delta['agents']] == ['A1']
+    assert delta['agents'][0]['online'] is True
+
+
+def test_invalid_cursor_is_rejected():
+    _, client = create_test_app()
+    resp = client.get('/api/agents/history', query_string={'since': 'bogus'})
+    assert resp.status_code == 400
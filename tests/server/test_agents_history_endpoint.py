@@ -1,10 +1,15 @@
+import gzip
+import json
 import os
 import sys
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 
+from client.utils.system_utils import content_hash
 from server.app import create_app
 from server.config.server_config import ServerConfig
+from server.models import db, AgentLatestState, BackupRecord
+from server.services.data_service import DataService
 
 
 def create_test_app():
@@ -29,6 +34,7 @@ def test_agents_history_endpoint():
         },
     }
     client.post("/api/agents/monitoring-data", json=monitoring_payload)
+    app.extensions["ingest_queue"].flush()
 
     resp = client.get("/api/agents/history")
     assert resp.status_code == 200
@@ -38,3 +44,117 @@ def test_agents_history_endpoint():
     agent = data["agents"][0]
     assert agent["agent_id"] == "AGENT1"
     assert agent["backup"]["status"] == "found"
+
+
+def test_monitoring_data_updates_latest_state():
+    app = create_test_app()
+    client = app.test_client()
+    client.post("/api/agents/register", json={"agent_id": "AGENT1", "hostname": "HOST1"})
+    client.post(
+        "/api/agents/monitoring-data",
+        json={"system": {"agent_id": "AGENT1"}, "software": {"office": {"installed": True, "version": "16.0"}}},
+    )
+    client.post(
+        "/api/agents/monitoring-data",
+        json={"system": {"agent_id": "AGENT1"}, "backup": {"status": "error"}},
+    )
+    app.extensions["ingest_queue"].flush()
+
+    with app.app_context():
+        state = db.session.get(AgentLatestState, "AGENT1")
+        assert state.office_version == "16.0"
+        assert state.backup_status == "error"
+        assert state.updated_at == state.backup_recorded_at
+
+    agent = client.get("/api/agents/history").get_json()["agents"][0]
+    assert agent["office"]["installed"] is True
+    assert agent["backup"]["status"] == "error"
+
+
+def test_unchanged_sections_do_not_create_records():
+    app = create_test_app()
+    client = app.test_client()
+    client.post("/api/agents/register", json={"agent_id": "AGENT1", "hostname": "HOST1"})
+    backup = {"status": "found", "output": "Backup time: 01/01/2024"}
+    client.post("/api/agents/monitoring-data", json={"system": {"agent_id": "AGENT1"}, "backup": backup})
+    client.post("/api/agents/monitoring-data", json={"system": {"agent_id": "AGENT1"}, "backup": backup})
+    client.post(
+        "/api/agents/monitoring-data",
+        json={"system": {"agent_id": "AGENT1", "unchanged": True}, "backup": {"unchanged": True, "hash": "abc"}},
+    )
+    app.extensions["ingest_queue"].flush()
+
+    with app.app_context():
+        assert BackupRecord.query.count() == 1
+    agent = client.get("/api/agents/history").get_json()["agents"][0]
+    assert agent["backup"]["status"] == "found"
+
+
+def test_stale_hash_references_ask_for_a_resend():
+    app = create_test_app()
+    client = app.test_client()
+    client.post("/api/agents/register", json={"agent_id": "AGENT1", "hostname": "HOST1"})
+    software = {"office": {"installed": True, "version": "16.0"}, "cad": []}
+    backup = {"status": "found"}
+    system = {"agent_id": "AGENT1"}
+    resp = client.post("/api/agents/monitoring-data", json={"system": system, "software": software})
+    assert "resend" not in resp.get_json()
+    app.extensions["ingest_queue"].flush()
+
+    references = {
+        "system": system,
+        "software": {"unchanged": True, "hash": content_hash(software)},
+        "backup": {"unchanged": True, "hash": content_hash(backup)},
+    }
+    resp = client.post("/api/agents/monitoring-data", json=references)
+    assert resp.get_json()["resend"] == ["backup"]
+
+    with app.app_context():
+        stale = {"unchanged": True, "hash": "0" * 64}
+        payloads = [{**references, "software": stale, "backup": backup}, references]
+        results = DataService().store_monitoring_batch(payloads)
+    # The full backup section of the first payload satisfies the second's reference.
+    assert [r.get("resend") for r in results] == [["software"], None]
+
+
+def test_parsed_backup_versions_fill_last_backup_date():
+    app = create_test_app()
+    client = app.test_client()
+    client.post("/api/agents/register", json={"agent_id": "AGENT1", "hostname": "HOST1"})
+    backup = {
+        "status": "found",
+        "versions": [{"timestamp": "2023-09-22T04:00:00", "target": "E:", "version_id": "09/22/2023-04:00"}],
+        "version_count": 7,
+        "last_backup": "2023-09-22T04:00:00",
+        "backup_location": "E:",
+    }
+    client.post("/api/agents/monitoring-data", json={"system": {"agent_id": "AGENT1"}, "backup": backup})
+    app.extensions["ingest_queue"].flush()
+
+    with app.app_context():
+        record = BackupRecord.query.one()
+        assert record.last_backup_date.isoformat() == "2023-09-22T04:00:00"
+        assert "09/22/2023-04:00" in record.versions_data
+    agent = client.get("/api/agents/history").get_json()["agents"][0]
+    assert agent["backup"]["last_backup"] == "2023-09-22T04:00:00"
+    assert agent["backup"]["version_count"] == 7
+    assert agent["backup"]["location"] == "E:"
+
+
+def test_gzip_compressed_payloads_are_accepted():
+    app = create_test_app()
+    client = app.test_client()
+    client.post("/api/agents/register", json={"agent_id": "AGENT1", "hostname": "HOST1"})
+    body = gzip.compress(json.dumps({"system": {"agent_id": "AGENT1"}, "backup": {"status": "found"}}).encode())
+    resp = client.post(
+        "/api/agents/monitoring-data",
+        data=body,
+        headers={"Content-Encoding": "gzip", "Content-Type": "application/json"},
+    )
+    assert resp.status_code == 202
+    app.extensions["ingest_queue"].flush()
+    agent = client.get("/api/agents/history").get_json()["agents"][0]
+    assert agent["backup"]["status"] == "found"
+
+    resp = client.post("/api/agents/monitoring-data", data=b"not gzip", headers={"Content-Encoding": "gzip"})
+    assert resp.status_code == 400
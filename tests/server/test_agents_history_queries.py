@@ -0,0 +1,85 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from sqlalchemy import event
+
+from server.app import create_app
+from server.config.server_config import ServerConfig
+from server.models import db, Agent, OfficeRecord, BackupRecord
+from server.services.data_service import DataService
+
+
+def create_test_app():
+    return create_app(ServerConfig(database_uri="sqlite:///:memory:"))
+
+
+def seed(agents: int, history: int) -> None:
+    start = datetime(2024, 1, 1)
+    db.session.execute(
+        db.insert(Agent),
+        [{'agent_id': f'AGENT{i}', 'hostname': f'HOST{i}'} for i in range(agents)],
+    )
+    office_rows = []
+    backup_rows = []
+    for i in range(agents):
+        for n in range(history):
+            recorded_at = start + timedelta(minutes=n)
+            office_rows.append(
+                {'agent_id': f'AGENT{i}', 'is_installed': True, 'version': f'16.{n}', 'recorded_at': recorded_at}
+            )
+            backup_rows.append(
+                {'agent_id': f'AGENT{i}', 'backup_status': f'status-{n}', 'recorded_at': recorded_at}
+            )
+    db.session.execute(db.insert(OfficeRecord), office_rows)
+    db.session.execute(db.insert(BackupRecord), backup_rows)
+    db.session.commit()
+    DataService().rebuild_latest_state()
+
+
+def count_queries(func):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):  # noqa: ARG001
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        result = func()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return result, len(statements)
+
+
+def test_rebuild_latest_state_from_history():
+    app = create_test_app()
+    with app.app_context():
+        seed(agents=3, history=5)
+        db.session.add(Agent(agent_id='EMPTY', hostname='EMPTY'))
+        db.session.commit()
+        agents = {a['agent_id']: a for a in DataService().get_agents_history()}
+    assert len(agents) == 4
+    assert agents['AGENT1']['office']['version'] == '16.4'
+    assert agents['AGENT1']['backup']['status'] == 'status-4'
+    assert agents['EMPTY']['office'] is None
+    assert agents['EMPTY']['backup'] is None
+
+
+def test_history_query_count_is_constant():
+    service = DataService()
+
+    small_app = create_test_app()
+    with small_app.app_context():
+        seed(agents=2, history=2)
+        small, small_queries = count_queries(service.get_agents_history)
+
+    large_app = create_test_app()
+    with large_app.app_context():
+        seed(agents=2000, history=20)
+        large, large_queries = count_queries(service.get_agents_history)
+
+    assert len(small) == 2
+    assert len(large) == 2000
+    assert small_queries == large_queries == 1
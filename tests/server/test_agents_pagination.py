@@ -0,0 +1,95 @@
+import base64
+import json
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from server.app import create_app
+from server.config.server_config import ServerConfig
+
+
+def create_test_app():
+    app = create_app(ServerConfig(database_uri="sqlite:///:memory:", ingest_async=False))
+    client = app.test_client()
+    for n in range(7):
+        client.post('/api/agents/register', json={
+            'agent_id': f'A{n}',
+            'hostname': f'host-{(n * 3) % 7}',
+            'service_tag': f'TAG{n}',
+            'model': 'OptiPlex',
+        })
+    client.post('/api/agents/register', json={'agent_id': 'A7', 'model': 'OptiPlex'})
+    return app, client
+
+
+def collect_pages(client, url, key, **params):
+    items, after, pages = [], None, 0
+    while True:
+        query = dict(params, **({'after': after} if after else {}))
+        body = client.get(url, query_string=query).get_json()
+        items.extend(body[key])
+        pages += 1
+        after = body['next']
+        if not after:
+            return items, pages
+
+
+def test_history_pages_cover_every_agent_in_sort_order():
+    app, client = create_test_app()
+    agents, pages = collect_pages(client, '/api/agents/history', 'agents', limit=3, sort='-hostname')
+    assert pages == 3
+    hostnames = [a['hostname'] for a in agents]
+    assert hostnames == [f'host-{n}' for n in range(6, -1, -1)] + [None]
+
+
+def test_history_fields_projection():
+    app, client = create_test_app()
+    body = client.get('/api/agents/history', query_string={'fields': 'agent_id,online', 'limit': 2}).get_json()
+    assert body['agents'] == [{'agent_id': 'A0', 'online': True}, {'agent_id': 'A1', 'online': True}]
+    assert body['cursor']
+
+
+def test_history_rejects_invalid_options():
+    app, client = create_test_app()
+    for params in ({'sort': 'secret'}, {'fields': 'password'}, {'limit': '0'}, {'after': '!!'}):
+        assert client.get('/api/agents/history', query_string=params).status_code == 400
+
+
+def test_tampered_cursors_are_rejected():
+    app, client = create_test_app()
+    tampered = [5, 'x', {'a': 1, 'b': 2}, [[1], 2], ['x', 'y'], [1, 2, 3], ['x', True], [{'a': 1}, 2]]
+    for value in tampered:
+        cursor = base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip('=')
+        for sort in ('hostname', 'last_seen'):
+            params = {'limit': '2', 'sort': sort, 'after': cursor}
+            assert client.get('/api/agents/history', query_string=params).status_code == 400, (value, sort)
+    cursor = base64.urlsafe_b64encode(b'["yesterday",1]').decode()
+    assert client.get('/api/agents/history', query_string={'sort': 'last_seen', 'after': cursor}).status_code == 400
+
+
+def test_search_pages_and_projects_fields():
+    app, client = create_test_app()
+    results, pages = collect_pages(
+        client, '/api/search', 'results', q='optiplex', limit=5, sort='service_tag', fields='service_tag'
+    )
+    assert pages == 2
+    assert [r['service_tag'] for r in results] == [None] + [f'TAG{n}' for n in range(7)]
+    assert all(list(r) == ['service_tag'] for r in results)
+
+
+def test_search_clamps_oversized_limit():
+    app, client = create_test_app()
+    body = client.get('/api/search', query_string={'q': 'optiplex', 'limit': 100000}).get_json()
+    assert len(body['results']) == 8
+    assert body['next'] is None
+
+
+def test_export_streams_a_json_array():
+    app, client = create_test_app()
+    response = client.get('/api/agents/export', query_string={'fields': 'agent_id'}, buffered=False)
+    assert response.mimetype == 'application/json'
+    chunks = list(response.response)
+    assert len(chunks) > 2
+    exported = json.loads(b''.join(chunks))
+    assert exported == [{'agent_id': f'A{n}'} for n in range(8)]
@@ -0,0 +1,54 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from sqlalchemy import event
+
+from server.app import create_app
+from server.config.server_config import ServerConfig
+from server.models import db
+
+
+def create_test_app():
+    return create_app(ServerConfig(database_uri="sqlite:///:memory:"))
+
+
+def register(client, agent_id, manufacturer):
+    client.post('/api/agents/register', json={'agent_id': agent_id, 'manufacturer': manufacturer})
+
+
+def test_repeated_polls_revalidate_without_queries():
+    app = create_test_app()
+    client = app.test_client()
+    register(client, 'A1', 'Dell')
+
+    first = client.get('/api/statistics/hardware')
+    assert first.status_code == 200
+    assert first.headers['Cache-Control'] == 'no-cache'
+    etag = first.headers['ETag']
+
+    statements = []
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+    second = client.get('/api/statistics/hardware', headers={'If-None-Match': etag})
+    assert second.status_code == 304
+    assert statements == []
+
+    metrics = client.get('/api/statistics/cache').get_json()
+    assert metrics['hits'] == 1
+    assert metrics['misses'] == 1
+
+
+def test_registration_invalidates_cached_aggregates():
+    app = create_test_app()
+    client = app.test_client()
+    register(client, 'A1', 'Dell')
+    before = client.get('/api/hardware/')
+    assert before.get_json()['manufacturers'] == {'Dell': 1}
+
+    register(client, 'A2', 'HP')
+    after = client.get('/api/hardware/', headers={'If-None-Match': before.headers['ETag']})
+    assert after.status_code == 200
+    assert after.get_json()['manufacturers'] == {'Dell': 1, 'HP': 1}
+    assert client.get('/api/statistics/cache').get_json()['invalidations'] == 2
@@ -2,7 +2,8 @@ import os
 import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 
-from server.app import create_app
+from server.app import create_app, shutdown_app
+from server.config.server_config import ServerConfig
 
 
 def test_app_factory():
@@ -19,3 +20,15 @@ def test_dashboard_route():
     resp = client.get('/')
     assert resp.status_code == 200
     assert b'System Monitor' in resp.data
+
+
+def test_shutdown_app_flushes_and_stops_workers():
+    app = create_app(ServerConfig(database_uri="sqlite:///:memory:"))
+    client = app.test_client()
+    client.post('/api/agents/register', json={'agent_id': 'A1'})
+    assert client.post('/api/agents/monitoring-data', json={'system': {'agent_id': 'A1'}}).status_code == 202
+
+    shutdown_app(app)
+    assert app.extensions['shutdown_hooks'] == []
+    assert app.extensions['ingest_queue'].metrics()['written'] == 1
+    shutdown_app(app)
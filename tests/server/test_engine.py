@@ -0,0 +1,32 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from sqlalchemy import text
+
+from server.app import create_app
+from server.config.server_config import ServerConfig
+from server.engine import engine_options
+from server.models import db
+
+
+def pragma(name):
+    return db.session.execute(text(f"PRAGMA {name}")).scalar()
+
+
+def test_sqlite_connections_use_configured_pragmas(tmp_path):
+    app = create_app(ServerConfig(database_uri=f"sqlite:///{tmp_path / 'monitoring.db'}", retention_interval=0))
+    with app.app_context():
+        assert pragma('journal_mode') == 'wal'
+        assert pragma('synchronous') == 1  # NORMAL
+        assert pragma('busy_timeout') == 5000
+        assert pragma('cache_size') == -64000
+        db.session.remove()
+        db.engine.dispose()
+
+
+def test_pool_options_only_for_server_databases():
+    assert engine_options(ServerConfig(database_uri="sqlite:///:memory:")) == {}
+    options = engine_options(ServerConfig(database_uri="postgresql://monitor@db/monitoring", db_pool_size=5))
+    assert options == {'pool_size': 5, 'max_overflow': 20, 'pool_pre_ping': True, 'pool_recycle': 1800}
@@ -0,0 +1,83 @@
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from server.app import create_app
+from server.config.server_config import ServerConfig
+from server.services.broadcaster import EventBroadcaster
+
+
+def create_test_app():
+    return create_app(ServerConfig(
+        database_uri="sqlite:///:memory:",
+        ingest_async=False,
+        stream_keepalive=0.05,
+    ))
+
+
+def read_event(chunks, max_chunks=40):
+    """Return the next ``(event, data)`` pair, skipping keepalive comments."""
+    for _, chunk in zip(range(max_chunks), chunks):
+        text = chunk.decode() if isinstance(chunk, bytes) else chunk
+        if text.startswith('event:'):
+            event_line, data_line = text.strip().split('\n')
+            return event_line[len('event: '):], json.loads(data_line[len('data: '):])
+    return None
+
+
+def test_publish_fans_out_to_every_subscriber():
+    broadcaster = EventBroadcaster(queue_size=10)
+    first = broadcaster.subscribe()
+    second = broadcaster.subscribe()
+
+    broadcaster.publish('status', {'agent_id': 'A1', 'online': True})
+
+    for subscription in (first, second):
+        event, data = subscription.get(timeout=0)
+        assert event == 'status'
+        assert json.loads(data) == {'agent_id': 'A1', 'online': True}
+
+
+def test_slow_subscriber_is_dropped_without_blocking():
+    broadcaster = EventBroadcaster(queue_size=2)
+    slow = broadcaster.subscribe()
+    fast = broadcaster.subscribe()
+
+    for n in range(3):
+        broadcaster.publish('monitoring-data', {'agent_ids': [str(n)], 'changed': []})
+        fast.get(timeout=0)
+
+    assert slow.closed
+    assert not fast.closed
+    assert broadcaster.subscriber_count == 1
+    assert broadcaster.dropped == 1
+
+
+def test_stream_pushes_registration_and_changes():
+    app = create_test_app()
+    client = app.test_client()
+    response = client.get('/api/agents/stream', buffered=False)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    chunks = iter(response.response)
+    assert next(chunks).startswith(b'retry:')
+
+    client.post('/api/agents/register', json={'agent_id': 'A1'})
+    assert read_event(chunks) == ('agent-registered', {'agent_id': 'A1'})
+
+    app.extensions['liveness'].expire(datetime.utcnow() + timedelta(minutes=10))
+    assert read_event(chunks) == ('status', {'agent_id': 'A1', 'online': False})
+
+    client.post('/api/agents/monitoring-data', json={
+        'system': {'agent_id': 'A1'},
+        'backup': {'status': 'found'},
+    })
+    events = [read_event(chunks), read_event(chunks)]
+    assert ('monitoring-data', {'agent_ids': ['A1'], 'changed': ['A1']}) in events
+    assert ('status', {'agent_id': 'A1', 'online': True}) in events
+
+    response.close()
+    assert app.extensions['event_broadcaster'].subscriber_count == 0
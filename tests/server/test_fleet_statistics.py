@@ -0,0 +1,86 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from sqlalchemy import event
+
+from server.app import create_app
+from server.config.server_config import ServerConfig
+from server.models import db
+from server.services.events import agent_status_changed
+
+
+def create_test_app():
+    return create_app(ServerConfig(database_uri="sqlite:///:memory:", ingest_async=False))
+
+
+def seed(client):
+    client.post('/api/agents/register', json={'agent_id': 'A1', 'manufacturer': 'Dell', 'service_tag': 'T1'})
+    client.post('/api/agents/register', json={'agent_id': 'A2', 'manufacturer': 'Dell', 'model': 'OptiPlex'})
+    client.post('/api/agents/register', json={'agent_id': 'A3', 'manufacturer': 'HP'})
+    client.post('/api/agents/monitoring-data/batch', json=[
+        {'system': {'agent_id': 'A1'}, 'software': {'office': {'installed': True, 'activation_status': 'licensed'}},
+         'backup': {'status': 'found'}},
+        {'system': {'agent_id': 'A2'}, 'backup': {'status': 'error'}},
+    ])
+
+
+def test_counters_follow_registrations_and_ingest_without_queries():
+    app = create_test_app()
+    client = app.test_client()
+    seed(client)
+    client.post('/api/agents/monitoring-data', json={'system': {'agent_id': 'A2'}, 'backup': {'status': 'found'}})
+
+    statements = []
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+    stats = client.get('/api/statistics/').get_json()
+    assert statements == []
+    assert stats['total'] == 3
+    assert stats['manufacturers'] == {'Dell': 2, 'HP': 1}
+    assert stats['models'] == {'Unknown': 2, 'OptiPlex': 1}
+    assert stats['detection'] == {'success': 1, 'failed': 2}
+    assert stats['office'] == {'installed': 1, 'unknown': 2}
+    assert stats['office_activation'] == {'licensed': 1, 'unknown': 2}
+    assert stats['backup'] == {'found': 2, 'unknown': 1}
+    assert stats['status'] == {'online': 3}
+
+    with app.app_context():
+        agent_status_changed.send(app, agent_id='A3', online=False)
+    assert client.get('/api/statistics/').get_json()['status'] == {'online': 2, 'offline': 1}
+
+
+def test_reconcile_matches_incremental_counters():
+    app = create_test_app()
+    client = app.test_client()
+    seed(client)
+    statistics = app.extensions['fleet_statistics']
+    incremental = statistics.snapshot()
+    with app.app_context():
+        statistics.reconcile()
+    reconciled = statistics.snapshot()
+    assert {k: v for k, v in reconciled.items() if k != 'reconciled_at'} == {
+        k: v for k, v in incremental.items() if k != 'reconciled_at'
+    }
+
+    hardware = client.get('/api/statistics/hardware').get_json()
+    assert hardware == {'manufacturers': {'Dell': 2, 'HP': 1}, 'detection_success': 1, 'detection_failed': 2, 'total': 3}
+
+
+def test_updates_during_reconcile_are_replayed():
+    app = create_test_app()
+    client = app.test_client()
+    seed(client)
+    statistics = app.extensions['fleet_statistics']
+    load_agents = statistics._load_agents
+
+    def load_while_agent_goes_offline():
+        agents = load_agents()
+        agent_status_changed.send(app, agent_id='A3', online=False)
+        return agents
+
+    statistics._load_agents = load_while_agent_goes_offline
+    with app.app_context():
+        statistics.reconcile()
+    assert statistics.snapshot()['status'] == {'online': 2, 'offline': 1}
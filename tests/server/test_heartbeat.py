@@ -0,0 +1,113 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from sqlalchemy import event
+
+from server.app import create_app
+from server.config.server_config import ServerConfig
+from server.models import db, Agent
+
+
+def create_test_app():
+    return create_app(ServerConfig(database_uri="sqlite:///:memory:", ingest_async=False))
+
+
+def test_heartbeats_are_buffered_and_flushed_in_bulk():
+    app = create_test_app()
+    client = app.test_client()
+    for agent_id in ('A1', 'A2'):
+        client.post('/api/agents/register', json={'agent_id': agent_id})
+    with app.app_context():
+        registered = {a.agent_id: a.last_seen for a in Agent.query}
+
+    response = client.post('/api/agents/heartbeat', json={'agent_ids': ['A1', 'A2', 'GHOST']})
+    assert response.status_code == 200
+    assert response.get_json() == {'status': 'ok', 'unknown': ['GHOST']}
+    with app.app_context():
+        assert {a.agent_id: a.last_seen for a in Agent.query} == registered
+
+    heartbeats = app.extensions['heartbeats']
+    with app.app_context():
+        assert heartbeats.flush() == 2
+        assert all(a.last_seen > registered[a.agent_id] for a in Agent.query)
+    metrics = client.get('/api/agents/heartbeat/metrics').get_json()
+    assert metrics == {'buffered': 0, 'received': 2, 'unknown': 1, 'written': 2, 'flushes': 1}
+
+
+def test_flush_never_moves_last_seen_backwards():
+    app = create_test_app()
+    client = app.test_client()
+    client.post('/api/agents/register', json={'agent_id': 'A1'})
+    heartbeats = app.extensions['heartbeats']
+    heartbeats.beat(['A1'], datetime.utcnow() - timedelta(minutes=1))
+    with app.app_context():
+        before = Agent.query.filter_by(agent_id='A1').one().last_seen
+        heartbeats.flush()
+        assert Agent.query.filter_by(agent_id='A1').one().last_seen == before
+
+
+def test_heartbeat_brings_offline_agent_back_online():
+    app = create_test_app()
+    client = app.test_client()
+    client.post('/api/agents/register', json={'agent_id': 'A1'})
+    liveness = app.extensions['liveness']
+    assert liveness.expire(datetime.utcnow() + timedelta(minutes=6)) == ['A1']
+
+    client.post('/api/agents/heartbeat', json={'agent_id': 'A1'})
+    assert client.get('/api/agents/offline').get_json()['agents'] == []
+
+
+def test_heartbeat_validation():
+    app = create_test_app()
+    client = app.test_client()
+    assert client.post('/api/agents/heartbeat', json={}).status_code == 400
+    assert client.post('/api/agents/heartbeat', json={'agent_ids': 'A1'}).status_code == 400
+    ids = [f'A{n}' for n in range(1001)]
+    assert client.post('/api/agents/heartbeat', json={'agent_ids': ids}).status_code == 413
+
+
+def test_heartbeats_cost_no_queries_and_flush_in_one_update():
+    app = create_test_app()
+    with app.app_context():
+        db.session.execute(db.insert(Agent), [{'agent_id': f'A{n}'} for n in range(10_000)])
+        db.session.commit()
+        app.extensions['liveness'].load()
+    heartbeats = app.extensions['heartbeats']
+    statements = []
+
+    def record(_conn, _cursor, statement, _parameters, _context, executemany):
+        statements.append((statement.split()[0], executemany))
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', record)
+        for n in range(10_000):
+            heartbeats.beat([f'A{n}'])
+        assert statements == []
+        assert heartbeats.flush() == 10_000
+        assert statements == [('UPDATE', True)] * 10
+        event.remove(db.engine, 'before_cursor_execute', record)
+        assert Agent.query.filter(Agent.last_seen.is_(None)).count() == 0
+
+
+def test_agent_back_online_is_in_the_history_delta():
+    app = create_test_app()
+    client = app.test_client()
+    client.post('/api/agents/register', json={'agent_id': 'A1'})
+    liveness = app.extensions['liveness']
+    now = datetime.utcnow()
+
+    liveness.expire(now + timedelta(minutes=6))
+    cursor = client.get('/api/agents/history').get_json()['cursor']
+    client.post('/api/agents/heartbeat', json={'agent_id': 'A1'})
+    body = client.get('/api/agents/history', query_string={'since': cursor}).get_json()
+    assert [(a['agent_id'], a['online']) for a in body['agents']] == [('A1', True)]
+
+    # An unchanged re-registration is handled as a heartbeat as well.
+    liveness.expire(now + timedelta(minutes=11))
+    cursor = body['cursor']
+    client.post('/api/agents/register', json={'agent_id': 'A1'})
+    body = client.get('/api/agents/history', query_string={'since': cursor}).get_json()
+    assert [(a['agent_id'], a['online']) for a in body['agents']] == [('A1', True)]
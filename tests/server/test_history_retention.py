@@ -0,0 +1,115 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from server.app import create_app
+from server.compact_history import compact_history
+from server.config.server_config import ServerConfig
+from server.models import db, Agent, OfficeRecord, BackupRecord
+from server.services.data_service import DataService
+from server.services.retention import HistoryCompactor
+
+NOW = datetime(2025, 6, 1)
+
+
+def create_test_app(uri="sqlite:///:memory:"):
+    return create_app(ServerConfig(database_uri=uri, ingest_async=False, retention_interval=0))
+
+
+def seed(versions: list[str], start: datetime) -> None:
+    db.session.add(Agent(agent_id='A1'))
+    db.session.execute(
+        db.insert(OfficeRecord),
+        [
+            {'agent_id': 'A1', 'is_installed': True, 'version': version, 'recorded_at': start + timedelta(hours=n)}
+            for n, version in enumerate(versions)
+        ],
+    )
+    db.session.commit()
+
+
+def office_history():
+    return [
+        (r.version, r.recorded_at, r.last_seen)
+        for r in OfficeRecord.query.order_by(OfficeRecord.recorded_at)
+    ]
+
+
+def test_old_identical_runs_collapse_into_spans():
+    app = create_test_app()
+    with app.app_context():
+        old = NOW - timedelta(days=60)
+        seed(['16.0', '16.0', '16.0', '16.1', '16.1', '16.0'], old)
+        recent = NOW - timedelta(days=1)
+        db.session.execute(db.insert(OfficeRecord), [
+            {'agent_id': 'A1', 'is_installed': True, 'version': '16.0', 'recorded_at': recent},
+            {'agent_id': 'A1', 'is_installed': True, 'version': '16.0', 'recorded_at': recent + timedelta(hours=1)},
+        ])
+        db.session.commit()
+
+        report = HistoryCompactor(raw_days=30, batch_size=2).run(now=NOW)
+
+        assert office_history() == [
+            ('16.0', old, old + timedelta(hours=2)),
+            ('16.1', old + timedelta(hours=3), old + timedelta(hours=4)),
+            ('16.0', old + timedelta(hours=5), None),
+            ('16.0', recent, None),
+            ('16.0', recent + timedelta(hours=1), None),
+        ]
+        assert report.tables['office_record'].merged == 3
+        assert report.batches == 3
+
+        # A later run extends an existing span rather than starting a new one.
+        HistoryCompactor(raw_days=0, batch_size=2).run(now=NOW)
+        assert office_history()[-1] == ('16.0', old + timedelta(hours=5), recent + timedelta(hours=1))
+
+
+def test_records_past_max_age_expire():
+    app = create_test_app()
+    with app.app_context():
+        seed(['16.0', '16.1'], NOW - timedelta(days=400))
+        db.session.add(BackupRecord(agent_id='A1', backup_status='found', recorded_at=NOW - timedelta(days=2)))
+        db.session.commit()
+
+        report = HistoryCompactor(raw_days=30, max_days=365, batch_size=1).run(now=NOW)
+
+        assert [r[0] for r in office_history()] == ['16.1']
+        assert BackupRecord.query.count() == 1
+        assert report.tables['office_record'].expired == 1
+
+
+def test_newest_record_of_unchanged_state_is_kept():
+    app = create_test_app()
+    client = app.test_client()
+    client.post('/api/agents/register', json={'agent_id': 'A1'})
+    office = {'installed': True, 'version': '16.0', 'activation_status': None}
+    payload = {'system': {'agent_id': 'A1'}, 'software': {'office': office}}
+    client.post('/api/agents/monitoring-data', json=payload)
+    with app.app_context():
+        OfficeRecord.query.update({'recorded_at': datetime.utcnow() - timedelta(days=100)})
+        db.session.commit()
+    client.post('/api/agents/monitoring-data', json=payload)
+
+    with app.app_context():
+        assert OfficeRecord.query.count() == 1
+        report = HistoryCompactor(raw_days=30, max_days=90).run()
+        assert report.tables['office_record'].expired == 0
+        DataService().rebuild_latest_state()
+    assert client.get('/api/agents/history').get_json()['agents'][0]['office'] == office
+
+
+def test_cli_reports_removed_records(tmp_path, capsys):
+    uri = f"sqlite:///{tmp_path / 'monitoring.db'}"
+    app = create_test_app(uri)
+    with app.app_context():
+        seed(['16.0'] * 50, datetime.utcnow() - timedelta(days=90))
+        db.session.remove()
+        db.engine.dispose()
+
+    compact_history(['--database-uri', uri, '--vacuum'])
+
+    out = capsys.readouterr().out
+    assert 'office_record: scanned 50, merged 49, expired 0' in out
+    assert 'Removed 49 records' in out
@@ -0,0 +1,125 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from server.app import create_app
+from server.config.server_config import ServerConfig
+from server.models import db, Agent, AgentStatusChange
+from server.services.liveness import LivenessTracker
+
+
+def create_test_app():
+    return create_app(ServerConfig(database_uri="sqlite:///:memory:", ingest_async=False))
+
+
+def test_transitions_are_served_and_persisted():
+    app = create_test_app()
+    client = app.test_client()
+    client.post('/api/agents/register', json={'agent_id': 'A1'})
+    client.post('/api/agents/register', json={'agent_id': 'A2'})
+    liveness = app.extensions['liveness']
+    now = datetime.utcnow()
+
+    assert liveness.expire(now + timedelta(minutes=4)) == []
+    liveness.seen(['A2'], now + timedelta(minutes=4))
+    assert liveness.expire(now + timedelta(minutes=6)) == ['A1']
+
+    body = client.get('/api/agents/offline').get_json()
+    assert [a['agent_id'] for a in body['agents']] == ['A1']
+    assert (body['online'], body['offline']) == (1, 1)
+
+    client.post('/api/agents/monitoring-data', json={'system': {'agent_id': 'A1'}})
+    assert client.get('/api/agents/offline').get_json()['agents'] == []
+    with app.app_context():
+        assert liveness.persist() == 2
+        changes = AgentStatusChange.query.order_by(AgentStatusChange.id).all()
+        assert [(c.agent_id, c.online) for c in changes] == [('A1', False), ('A1', True)]
+
+
+def test_stale_agents_start_offline():
+    app = create_test_app()
+    with app.app_context():
+        db.session.add(Agent(agent_id='OLD', last_seen=datetime.utcnow() - timedelta(hours=1)))
+        db.session.add(Agent(agent_id='NEW', last_seen=datetime.utcnow()))
+        db.session.commit()
+        liveness = LivenessTracker(app)
+        liveness.load()
+    assert [a['agent_id'] for a in liveness.offline()[0]] == ['OLD']
+    assert liveness.seen(['OLD', 'NEW']) == ['OLD']
+
+
+def test_tick_cost_with_50k_agents():
+    app = create_test_app()
+    liveness = LivenessTracker(app)
+    with app.app_context():
+        liveness.load()
+    start = datetime.utcnow()
+    for n in range(50_000):
+        liveness.seen([f'A{n}'], start + timedelta(seconds=n % 300))
+
+    liveness.expire(start + timedelta(seconds=300))  # catch up from load()
+    for second in range(301, 311):
+        inspected = liveness.inspected
+        went_offline = liveness.expire(start + timedelta(seconds=second))
+        assert 160 <= len(went_offline) <= 170
+        # A tick only looks at the agents whose deadline falls in it.
+        assert liveness.inspected - inspected == len(went_offline)
+
+
+def test_failed_persist_keeps_transitions():
+    app = create_test_app()
+    client = app.test_client()
+    client.post('/api/agents/register', json={'agent_id': 'A1'})
+    liveness = app.extensions['liveness']
+    liveness.expire(datetime.utcnow() + timedelta(minutes=6))
+    broken = {'agent_id': 'A1', 'online': None, 'changed_at': datetime.utcnow()}
+    liveness._pending.append(broken)
+    with app.app_context():
+        with pytest.raises(Exception):
+            liveness.persist()
+        assert liveness.metrics()['pending'] == 2
+        broken['online'] = True
+        assert liveness.persist() == 2
+        assert AgentStatusChange.query.count() == 2
+
+
+def test_stop_persists_pending_transitions():
+    app = create_test_app()
+    client = app.test_client()
+    client.post('/api/agents/register', json={'agent_id': 'A1'})
+    liveness = app.extensions['liveness']
+    liveness.expire(datetime.utcnow() + timedelta(minutes=6))
+
+    liveness.stop()
+    assert liveness.metrics()['pending'] == 0
+    with app.app_context():
+        assert [(c.agent_id, c.online) for c in AgentStatusChange.query] == [('A1', False)]
+
+
+def test_offline_agents_are_paged():
+    app = create_test_app()
+    client = app.test_client()
+    for n in range(5):
+        client.post('/api/agents/register', json={'agent_id': f'A{n}'})
+    liveness = app.extensions['liveness']
+    liveness.expire(datetime.utcnow() + timedelta(minutes=6))
+
+    agents, after = [], None
+    while True:
+        params = {'limit': 2, 'sort': 'agent_id', **({'after': after} if after else {})}
+        body = client.get('/api/agents/offline', query_string=params).get_json()
+        agents += [a['agent_id'] for a in body['agents']]
+        after = body['next']
+        if not after:
+            break
+    assert agents == ['A0', 'A1', 'A2', 'A3', 'A4']
+    assert body['offline'] == 5
+
+    body = client.get('/api/agents/offline', query_string={'fields': 'agent_id', 'limit': 1}).get_json()
+    assert list(body['agents'][0]) == ['agent_id']
+    assert client.get('/api/agents/offline', query_string={'after': 'WzEsMl0'}).status_code == 400
+    assert client.get('/api/agents/offline', query_string={'sort': 'secret'}).status_code == 400
@@ -0,0 +1,100 @@
+import os
+import sqlite3
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from sqlalchemy import inspect
+
+from server.app import create_app
+from server.config.server_config import ServerConfig
+from server.migrate import migrate
+from server.migrations import MigrationContext, MigrationRunner
+from server.models import db, Agent
+
+# Schema of databases created before the migration framework existed.
+LEGACY_SCHEMA = """
+CREATE TABLE agent (id INTEGER PRIMARY KEY, agent_id VARCHAR(120) NOT NULL UNIQUE, hostname VARCHAR(120),
+                    ip_address VARCHAR(45), operating_system VARCHAR(120), last_seen DATETIME);
+CREATE TABLE office_record (id INTEGER PRIMARY KEY, agent_id VARCHAR(120) REFERENCES agent (agent_id),
+                            is_installed BOOLEAN, version VARCHAR(50), activation_status VARCHAR(50),
+                            recorded_at DATETIME);
+CREATE TABLE cad_record (id INTEGER PRIMARY KEY, agent_id VARCHAR(120) REFERENCES agent (agent_id),
+                         software_name VARCHAR(50), is_installed BOOLEAN, version VARCHAR(50),
+                         license_status VARCHAR(50), recorded_at DATETIME);
+CREATE TABLE backup_record (id INTEGER PRIMARY KEY, agent_id VARCHAR(120) REFERENCES agent (agent_id),
+                            backup_status VARCHAR(50), backup_location VARCHAR(255), versions_data TEXT,
+                            last_backup_date DATETIME, recorded_at DATETIME);
+INSERT INTO agent (agent_id, hostname, last_seen) VALUES ('A1', 'HOST1', '2024-01-01 00:00:00');
+INSERT INTO office_record (agent_id, is_installed, version, recorded_at)
+    VALUES ('A1', 1, '15.0', '2024-01-01 00:00:00'), ('A1', 1, '16.0', '2024-01-02 00:00:00');
+"""
+
+
+def legacy_database(tmp_path) -> str:
+    path = tmp_path / 'legacy.db'
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_SCHEMA)
+    conn.close()
+    return f"sqlite:///{path}"
+
+
+def test_fresh_database_is_created_at_head():
+    app = create_app(ServerConfig(database_uri="sqlite:///:memory:", retention_interval=0))
+    with app.app_context():
+        runner = MigrationRunner()
+        assert runner.current_version() == runner.head
+        assert runner.pending() == []
+        assert runner.upgrade() == []
+
+
+def test_legacy_database_is_upgraded(tmp_path, capsys):
+    uri = legacy_database(tmp_path)
+    migrate(['--database-uri', uri])
+    out = capsys.readouterr().out
+    assert 'Applied 0001 agent hardware columns' in out
+    assert ', 0 pending' in out
+
+    app = create_app(ServerConfig(database_uri=uri, ingest_async=False, retention_interval=0))
+    with app.app_context():
+        inspector = inspect(db.engine)
+        columns = {c['name'] for c in inspector.get_columns('agent')}
+        assert {'service_tag', 'change_seq', 'registration_fingerprint'} <= columns
+        assert inspector.has_table('agent_registration_change')
+        assert 'ix_office_record_agent_id_recorded_at' in {i['name'] for i in inspector.get_indexes('office_record')}
+        assert Agent.query.one().change_seq == 0
+    client = app.test_client()
+    agents = client.get('/api/agents/history').get_json()['agents']
+    assert agents[0]['office']['version'] == '16.0'
+    with app.app_context():
+        db.engine.dispose()
+
+
+def test_database_without_baseline_tables_is_upgraded(tmp_path):
+    # Tables of a pre-release schema that shares no table with the baseline.
+    path = tmp_path / 'old.db'
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE agents (id INTEGER PRIMARY KEY, agent_id VARCHAR(100) NOT NULL UNIQUE)')
+    conn.close()
+
+    app = create_app(ServerConfig(database_uri=f"sqlite:///{path}", ingest_async=False, retention_interval=0))
+    client = app.test_client()
+    client.post('/api/agents/register', json={'agent_id': 'A1'})
+    assert [a['agent_id'] for a in client.get('/api/agents/history').get_json()['agents']] == ['A1']
+    with app.app_context():
+        assert MigrationRunner().pending() == []
+        inspector = inspect(db.engine)
+        for name, table in db.metadata.tables.items():
+            assert {c['name'] for c in inspector.get_columns(name)} == set(table.c.keys())
+        db.engine.dispose()
+
+
+def test_backfill_runs_in_batches():
+    app = create_app(ServerConfig(database_uri="sqlite:///:memory:", retention_interval=0))
+    with app.app_context():
+        db.session.execute(db.insert(Agent), [{'agent_id': f'A{n}'} for n in range(25)])
+        db.session.commit()
+        ctx = MigrationContext(db.engine)
+        updated = ctx.backfill('agent', "hostname = 'host-' || agent_id", 'hostname IS NULL', batch_size=10)
+        assert updated == 25
+        assert Agent.query.filter(Agent.hostname.is_(None)).count() == 0
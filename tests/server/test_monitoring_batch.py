@@ -0,0 +1,114 @@
+import json
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from sqlalchemy import event
+
+from server.app import create_app
+from server.config.server_config import ServerConfig
+from server.models import db, Agent, OfficeRecord, BackupRecord
+
+
+def create_test_app(agents: int = 0):
+    app = create_app(ServerConfig(database_uri="sqlite:///:memory:", ingest_async=False))
+    with app.app_context():
+        if agents:
+            db.session.execute(
+                db.insert(Agent),
+                [{'agent_id': f'AGENT{i}', 'hostname': f'HOST{i}'} for i in range(agents)],
+            )
+            db.session.commit()
+    return app
+
+
+def make_payload(agent_id: str) -> dict:
+    return {
+        'system': {'agent_id': agent_id},
+        'software': {'office': {'installed': True, 'version': '16.0'}},
+        'backup': {'status': 'found', 'backup_location': r'\\nas\backup'},
+    }
+
+
+def test_batch_reports_per_item_status():
+    app = create_test_app(agents=2)
+    client = app.test_client()
+    payloads = [make_payload('AGENT0'), make_payload('MISSING'), {'system': {}}, make_payload('AGENT1')]
+    resp = client.post('/api/agents/monitoring-data/batch', json=payloads)
+    assert resp.status_code == 200
+    statuses = [r['status'] for r in resp.get_json()['results']]
+    assert statuses == ['ok', 'unknown_agent', 'invalid', 'ok']
+    with app.app_context():
+        assert OfficeRecord.query.count() == 2
+        assert BackupRecord.query.count() == 2
+    history = {a['agent_id']: a for a in client.get('/api/agents/history').get_json()['agents']}
+    assert history['AGENT1']['backup']['status'] == 'found'
+
+
+def test_malformed_items_do_not_fail_the_batch():
+    app = create_test_app(agents=1)
+    client = app.test_client()
+    payloads = [
+        {'system': {'agent_id': ['AGENT0']}},
+        {'system': {'agent_id': 'AGENT0'}, 'software': 'x'},
+        {'system': {'agent_id': 'AGENT0'}, 'software': {'office': []}},
+        {'system': {'agent_id': 'AGENT0'}, 'backup': 'x'},
+        make_payload('AGENT0'),
+    ]
+    resp = client.post('/api/agents/monitoring-data/batch', json=payloads)
+    assert resp.status_code == 200
+    assert [r['status'] for r in resp.get_json()['results']] == ['invalid'] * 4 + ['ok']
+    with app.app_context():
+        assert BackupRecord.query.count() == 1
+
+
+def test_batch_accepts_ndjson():
+    app = create_test_app(agents=1)
+    client = app.test_client()
+    body = json.dumps(make_payload('AGENT0')) + '\n' + 'not json\n'
+    resp = client.post(
+        '/api/agents/monitoring-data/batch', data=body, content_type='application/x-ndjson'
+    )
+    assert resp.status_code == 200
+    assert [r['status'] for r in resp.get_json()['results']] == ['ok', 'invalid']
+
+
+def test_batch_rejects_non_array():
+    client = create_test_app().test_client()
+    resp = client.post('/api/agents/monitoring-data/batch', json={'system': {}})
+    assert resp.status_code == 400
+
+
+def record_statements(app) -> list[str]:
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):  # noqa: ARG001
+        statements.append(statement)
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return statements
+
+
+def test_batch_ingest_statement_count():
+    count = 500
+    payloads = [make_payload(f'AGENT{i}') for i in range(count)]
+
+    single_app = create_test_app(agents=count)
+    single_client = single_app.test_client()
+    single_statements = record_statements(single_app)
+    for payload in payloads[:10]:
+        single_client.post('/api/agents/monitoring-data', json=payload)
+
+    batch_app = create_test_app(agents=count)
+    batch_client = batch_app.test_client()
+    batch_statements = record_statements(batch_app)
+    resp = batch_client.post('/api/agents/monitoring-data/batch', json=payloads)
+
+    assert all(r['status'] == 'ok' for r in resp.get_json()['results'])
+    # Single ingest costs statements per payload; a batch costs a constant number.
+    assert len(single_statements) >= 10 * 3
+    assert len(batch_statements) < 20
+    with batch_app.app_context():
+        assert OfficeRecord.query.count() == count
@@ -0,0 +1,90 @@
+import os
+import sys
+
+from sqlalchemy import event
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from server.app import create_app
+from server.config.server_config import ServerConfig
+from server.models import db, Agent, AgentRegistrationChange
+
+REGISTRATION = {
+    'agent_id': 'A1',
+    'hostname': 'HOST-1',
+    'os': 'Windows 11',
+    'service_tag': 'TAG1',
+    'manufacturer': 'Dell Inc.',
+    'model': 'Latitude 7440',
+}
+
+
+def create_test_app():
+    return create_app(ServerConfig(database_uri="sqlite:///:memory:", ingest_async=False))
+
+
+def executed_statements(app, action):
+    statements = []
+
+    def record(_conn, _cursor, statement, *_args):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        action()
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    return statements
+
+
+def test_unchanged_registration_writes_nothing():
+    app = create_test_app()
+    client = app.test_client()
+    client.post('/api/agents/register', json=REGISTRATION)
+    with app.app_context():
+        registered = Agent.query.one()
+        seq, last_seen = registered.change_seq, registered.last_seen
+
+    statements = executed_statements(app, lambda: client.post('/api/agents/register', json=REGISTRATION))
+    assert statements == []
+
+    with app.app_context():
+        assert Agent.query.one().change_seq == seq
+        assert app.extensions['heartbeats'].flush() == 1
+        assert Agent.query.one().last_seen > last_seen
+        assert AgentRegistrationChange.query.count() == 0
+
+
+def test_changed_fields_are_recorded():
+    app = create_test_app()
+    client = app.test_client()
+    client.post('/api/agents/register', json=REGISTRATION)
+    client.post('/api/agents/register', json={**REGISTRATION, 'model': 'Latitude 7450', 'os': 'Windows 11 24H2'})
+    client.post('/api/agents/register', json={**REGISTRATION, 'model': 'Latitude 7450', 'os': 'Windows 11 24H2'})
+
+    body = client.get('/api/agents/A1/registration-changes').get_json()
+    changes = {(c['field'], c['old_value'], c['new_value']) for c in body['changes']}
+    assert changes == {
+        ('model', 'Latitude 7440', 'Latitude 7450'),
+        ('operating_system', 'Windows 11', 'Windows 11 24H2'),
+    }
+    assert client.get('/api/agents/service-tag/TAG1').get_json()['model'] == 'Latitude 7450'
+
+
+def test_agents_without_fingerprint_are_rewritten_once():
+    app = create_test_app()
+    client = app.test_client()
+    client.post('/api/agents/register', json=REGISTRATION)
+    with app.app_context():
+        Agent.query.one().registration_fingerprint = None
+        db.session.commit()
+    app.extensions['agent_registry'].invalidate('A1')
+
+    client.post('/api/agents/register', json=REGISTRATION)
+    with app.app_context():
+        assert Agent.query.one().registration_fingerprint is not None
+        assert AgentRegistrationChange.query.count() == 0
+    statements = executed_statements(app, lambda: client.post('/api/agents/register', json=REGISTRATION))
+    assert statements == []
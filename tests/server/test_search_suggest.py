@@ -0,0 +1,54 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from sqlalchemy import event
+
+from server.app import create_app
+from server.config.server_config import ServerConfig
+from server.models import db
+
+
+def create_test_app():
+    return create_app(ServerConfig(database_uri="sqlite:///:memory:", ingest_async=False))
+
+
+def suggest(client, prefix, **params):
+    body = client.get('/api/search/suggest', query_string=dict(params, prefix=prefix)).get_json()
+    return [(s['value'], s['field']) for s in body['suggestions']]
+
+
+def test_suggestions_follow_registrations_without_queries():
+    app = create_test_app()
+    client = app.test_client()
+    client.post('/api/agents/register', json={'agent_id': 'A1', 'hostname': 'SALES-01', 'service_tag': 'SVC1'})
+    client.post('/api/agents/register', json={'agent_id': 'A2', 'hostname': 'sales-02', 'serial_number': 'SN-SALES'})
+    client.post('/api/agents/register', json={'agent_id': 'A3', 'hostname': 'HR-01', 'service_tag': 'SAL9'})
+
+    statements = []
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+    assert suggest(client, 'sal') == [('SAL9', 'service_tag'), ('SALES-01', 'hostname'), ('sales-02', 'hostname')]
+    assert suggest(client, 'SALES', limit=1) == [('SALES-01', 'hostname')]
+    assert statements == []
+
+    client.post('/api/agents/register', json={'agent_id': 'A1', 'hostname': 'FINANCE-01', 'service_tag': 'SVC1'})
+    assert suggest(client, 'sales') == [('sales-02', 'hostname')]
+    assert suggest(client, 'fin') == [('FINANCE-01', 'hostname')]
+
+
+def test_index_is_loaded_from_existing_agents():
+    app = create_test_app()
+    client = app.test_client()
+    client.post('/api/agents/register', json={'agent_id': 'A1', 'hostname': 'LAB-01'})
+    index = app.extensions['suggest_index']
+    index._entries.clear()
+    with app.app_context():
+        assert index.load() == 1
+    assert suggest(client, 'lab') == [('LAB-01', 'hostname')]
+
+
+def test_prefix_is_required():
+    app = create_test_app()
+    assert app.test_client().get('/api/search/suggest').status_code == 400